@@ -0,0 +1,52 @@
+"""
+Compares the per-event matching loop with the joined-buffer batch scan
+for batches of mostly non-matching events, to find the crossover point.
+
+    python benchmarks/bench_batch_scan.py
+"""
+import os
+import sys
+import timeit
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+
+CONFIG = {
+    "stream_types": [
+        {"type": "api-critical", "pattern": "api-.*", "filters": ["CRITICAL", "FATAL"]},
+        {"type": "api-error", "pattern": "api-.*", "filters": ["ERROR", "Exception", "Traceback"],
+         "whitelist": ["HealthCheck", "User \\\\d+ failed auth"]}
+    ]
+}
+
+
+def make_events(count: int, match_every: int = 200):
+    events = []
+    for i in range(count):
+        level = "ERROR" if i % match_every == 0 else "INFO"
+        events.append(LogEvent(str(i), 1600000000000 + i,
+                               f"2020-09-13T12:26:40Z [{level}] GET /api/v1/orders/{i} 200 12ms worker-{i % 7}"))
+    return events
+
+
+def main() -> None:
+    logging.disable(logging.CRITICAL)
+    serial = LogProcessor(batch_scan_min_events=0)
+    batch = LogProcessor(batch_scan_min_events=1)
+
+    print(f"{'events':>8}{'per-event ms':>16}{'batch ms':>12}{'speedup':>10}")
+    for count in (8, 16, 32, 64, 128, 1000, 10000):
+        events = make_events(count)
+        assert [m.event.id for m in serial.process_log_batch('g', 'api-1', events, CONFIG)] == \
+               [m.event.id for m in batch.process_log_batch('g', 'api-1', events, CONFIG)]
+        number = max(1, 20000 // count)
+        t_serial = timeit.timeit(lambda: serial.process_log_batch('g', 'api-1', events, CONFIG), number=number) / number
+        t_batch = timeit.timeit(lambda: batch.process_log_batch('g', 'api-1', events, CONFIG), number=number) / number
+        print(f"{count:>8}{t_serial * 1000:>16.3f}{t_batch * 1000:>12.3f}{t_serial / t_batch:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares serial matching with the process-pool scan for growing batch sizes, to
+find the crossover point for PARALLEL_SCAN_MIN_EVENTS. Run it on a machine (or
+Lambda memory size) with the vCPU count you deploy with:
+
+    python benchmarks/bench_parallel_scan.py [workers]
+"""
+import os
+import sys
+import timeit
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+from src.parallel_scan import ParallelScanner
+
+CONFIG = {
+    "stream_types": [
+        {"type": "api-critical", "pattern": "api-.*", "filters": ["CRITICAL", "FATAL"]},
+        {"type": "api-error", "pattern": "api-.*", "filters": ["ERROR", "Exception", "Traceback", "Timeout"],
+         "whitelist": ["HealthCheck", "User \\d+ failed auth", "retry \\d+ of \\d+ succeeded"],
+         "field_filters": ["level in [ERROR, FATAL]"]}
+    ]
+}
+
+
+def make_events(count: int, match_every: int = 200):
+    events = []
+    for i in range(count):
+        level = "ERROR" if i % match_every == 0 else "INFO"
+        events.append(LogEvent(str(i), 1600000000000 + i,
+                               f"2020-09-13T12:26:40Z [{level}] GET /api/v1/orders/{i} 200 12ms worker-{i % 7}"))
+    return events
+
+
+def main() -> None:
+    logging.disable(logging.CRITICAL)
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(1, (os.cpu_count() or 1) - 1)
+    scanner = ParallelScanner(workers, min_events=1)
+    serial = LogProcessor(batch_scan_min_events=0, parallel_scanner=ParallelScanner(0, 0))
+    parallel = LogProcessor(batch_scan_min_events=0, parallel_scanner=scanner)
+
+    print(f"CPUs: {os.cpu_count()}, workers: {workers} (+ calling process)")
+    print(f"{'events':>8}{'serial ms':>12}{'parallel ms':>14}{'speedup':>10}")
+    crossover = None
+    try:
+        for count in (500, 1000, 2000, 5000, 10000, 20000, 50000):
+            events = make_events(count)
+            expected = [m.event.id for m in serial.process_log_batch('g', 'api-1', events, CONFIG)]
+            assert [m.event.id for m in parallel.process_log_batch('g', 'api-1', events, CONFIG)] == expected
+            number = max(1, 50000 // count)
+            t_serial = min(timeit.repeat(lambda: serial.process_log_batch('g', 'api-1', events, CONFIG),
+                                         number=number, repeat=3)) / number
+            t_parallel = min(timeit.repeat(lambda: parallel.process_log_batch('g', 'api-1', events, CONFIG),
+                                           number=number, repeat=3)) / number
+            if crossover is None and t_parallel < t_serial:
+                crossover = count
+            print(f"{count:>8}{t_serial * 1000:>12.3f}{t_parallel * 1000:>14.3f}{t_serial / t_parallel:>9.2f}x")
+    finally:
+        scanner.close()
+    print(f"Crossover: {crossover if crossover else 'none in tested range'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Compares the legacy dict based pipeline with the slotted record pipeline
+for a 10k-event batch: decode, match, build notification data, render.
+
+Each mode runs in its own subprocess so RSS numbers do not interfere.
+
+    python benchmarks/bench_records.py
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import resource
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+EVENTS = 10000
+MATCH_EVERY = 10
+CONTEXT_EVENTS = 10
+
+CONFIG = {
+    "stream_types": [{
+        "type": "api",
+        "pattern": "api-.*",
+        "filters": ["ERROR"],
+        "whitelist": ["HealthCheck"]
+    }]
+}
+
+
+def build_payload() -> bytes:
+    events = []
+    for i in range(EVENTS):
+        level = "ERROR" if i % MATCH_EVERY == 0 else "INFO"
+        events.append({
+            "id": f"{36000000000000000000000000000000000000000000000000000000 + i}",
+            "timestamp": 1600000000000 + i,
+            "message": f"2020-09-13T12:26:40Z [{level}] request {i} handled by worker-{i % 7}"
+        })
+    data = {"logGroup": "/aws/lambda/app", "logStream": "api-1", "logEvents": events}
+    return gzip.compress(json.dumps(data).encode('utf-8'))
+
+
+def context_for(timestamp):
+    return [{'timestamp': timestamp - n, 'message': f'[INFO] context line {n}', 'ingestionTime': timestamp}
+            for n in range(CONTEXT_EVENTS, 0, -1)]
+
+
+def run_legacy(compressed: bytes):
+    from src.models import to_jst_str
+    from src.notifications.slack_webhook_provider import SlackWebhookProvider
+
+    payload = json.loads(gzip.decompress(compressed))
+    events = payload['logEvents']
+    matches = []
+    for event in events:
+        message = event.get('message', '')
+        if 'error' in message.lower() and 'healthcheck' not in message.lower():
+            matches.append({'event': event, 'config': CONFIG['stream_types'][0]})
+
+    notifications = []
+    for match in matches:
+        matched = match['event']
+        matched_jst = matched.copy()
+        matched_jst['timestamp_jst'] = to_jst_str(matched['timestamp'])
+        context_jst = []
+        for log in context_for(matched['timestamp']):
+            log_copy = log.copy()
+            log_copy['timestamp_jst'] = to_jst_str(log['timestamp'])
+            context_jst.append(log_copy)
+        notifications.append({
+            'log_group': payload['logGroup'],
+            'log_stream': payload['logStream'],
+            'log_stream_type': 'api',
+            'matched_event': matched_jst,
+            'context_events': context_jst,
+            'aws_region': 'us-east-1'
+        })
+    return payload, notifications, SlackWebhookProvider()
+
+
+def run_records(compressed: bytes):
+    from src.log_processor import LogProcessor
+    from src.models import LogEvent, NotificationData, decode_log_object
+    from src.notifications.slack_webhook_provider import SlackWebhookProvider
+
+    payload = json.loads(gzip.decompress(compressed), object_hook=decode_log_object)
+    matches = LogProcessor().process_log_batch(payload['logGroup'], payload['logStream'], payload['logEvents'], CONFIG)
+
+    notifications = []
+    for match in matches:
+        notifications.append(NotificationData(
+            log_group=payload['logGroup'],
+            log_stream=payload['logStream'],
+            log_stream_type='api',
+            matched_event=match.event,
+            context_events=[LogEvent.from_dict(log) for log in context_for(match.event.timestamp)]
+        ))
+    return payload, notifications, SlackWebhookProvider()
+
+
+def measure(mode: str) -> dict:
+    import logging
+    logging.disable(logging.CRITICAL)
+    compressed = build_payload()
+    runner = run_legacy if mode == 'legacy' else run_records
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+
+    payload, notifications, provider = runner(compressed)
+    held_blocks = sys.getallocatedblocks() - blocks_before
+    held_bytes, _ = tracemalloc.get_traced_memory()
+    for data in notifications:
+        provider.render(data)
+
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    del payload, notifications
+
+    # Timing is measured separately, tracemalloc distorts it heavily
+    start = time.perf_counter()
+    payload, notifications, provider = runner(compressed)
+    for data in notifications:
+        provider.render(data)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'mode': mode,
+        'held_blocks': held_blocks,
+        'held_kib': held_bytes // 1024,
+        'peak_kib': peak_bytes // 1024,
+        'rss_growth_kib': rss_after - rss_before,
+        'seconds': round(elapsed, 3),
+        'notifications': len(notifications)
+    }
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        print(json.dumps(measure(sys.argv[1])))
+        return
+
+    results = []
+    for mode in ('legacy', 'records'):
+        out = subprocess.run([sys.executable, __file__, mode], capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    keys = ['held_blocks', 'held_kib', 'peak_kib', 'rss_growth_kib', 'seconds']
+    print(f"{'mode':<10}" + "".join(f"{k:>16}" for k in keys))
+    for r in results:
+        print(f"{r['mode']:<10}" + "".join(f"{r[k]:>16}" for k in keys))
+    legacy, records = results
+    for k in keys[:-1]:
+        if legacy[k]:
+            print(f"{k}: {100 * (legacy[k] - records[k]) / legacy[k]:.1f}% lower")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Routing cost for a central config with ~2,000 stream_types:
+linear scan (the previous _get_matching_configs) vs RoutingIndex.
+
+    python benchmarks/bench_routing.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.routing import RoutingIndex
+
+SERVICES = 2000
+
+
+def build_stream_types():
+    stream_types = []
+    for i in range(SERVICES):
+        kind = i % 4
+        if kind == 0:
+            stream_types.append({'type': f's{i}', 'log_group_pattern': f'^/aws/lambda/service-{i}$'})
+        elif kind == 1:
+            stream_types.append({'type': f's{i}', 'log_group_pattern': f'^/aws/ecs/service-{i}', 'pattern': '^web-'})
+        elif kind == 2:
+            stream_types.append({'type': f's{i}', 'pattern': f'^service-{i}-\\d+$'})
+        else:
+            stream_types.append({'type': f's{i}', 'log_group_pattern': f'/service-{i}/'})
+    return stream_types
+
+
+def linear_scan(stream_types, cache, log_group, log_stream):
+    matches = []
+    for st in stream_types:
+        group_pattern = st.get('log_group_pattern')
+        if group_pattern:
+            if group_pattern not in cache:
+                cache[group_pattern] = re.compile(group_pattern)
+            if not cache[group_pattern].search(log_group):
+                continue
+        stream_pattern = st.get('pattern')
+        if stream_pattern:
+            if stream_pattern not in cache:
+                cache[stream_pattern] = re.compile(stream_pattern)
+            if not cache[stream_pattern].search(log_stream):
+                continue
+        elif not group_pattern:
+            continue
+        matches.append(st)
+    return matches
+
+
+def main() -> None:
+    stream_types = build_stream_types()
+    lookups = [(f'/aws/lambda/service-{i}', f'service-{i}-1') for i in range(0, SERVICES, 7)]
+
+    cache = {}
+    linear_scan(stream_types, cache, *lookups[0])
+    start = time.perf_counter()
+    expected = [linear_scan(stream_types, cache, g, s) for g, s in lookups]
+    t_linear = (time.perf_counter() - start) / len(lookups)
+
+    start = time.perf_counter()
+    index = RoutingIndex(stream_types, re.compile)
+    t_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [index.match(g, s) for g, s in lookups]
+    t_index = (time.perf_counter() - start) / len(lookups)
+    assert actual == expected
+
+    start = time.perf_counter()
+    for g, s in lookups:
+        index.match(g, s)
+    t_cached = (time.perf_counter() - start) / len(lookups)
+
+    print(f"stream_types: {SERVICES}, lookups: {len(lookups)}")
+    print(f"linear scan:        {t_linear * 1e6:10.1f} us/lookup")
+    print(f"index build:        {t_build * 1e3:10.1f} ms (once per config load)")
+    print(f"index (uncached):   {t_index * 1e6:10.1f} us/lookup")
+    print(f"index (memoized):   {t_cached * 1e6:10.1f} us/lookup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import os
+import gzip
+import json
+import time
+import uuid
+import logging
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from src.aws_client import AWSClient
+from src.models import Match
+
+logger = logging.getLogger()
+
+# S3 requires parts of at least 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class ArchiveBackend(ABC):
+    """Destination for archive objects."""
+
+    @abstractmethod
+    def write(self, key: str, body: bytes) -> None:
+        """Stores body under key. Raises on failure."""
+        pass
+
+
+class S3ArchiveBackend(ArchiveBackend):
+    """Writes one object per flush; bodies above multipart_threshold are uploaded in parts."""
+
+    def __init__(self, bucket: str, aws_client: Optional[AWSClient] = None,
+                 multipart_threshold: int = 16 * 1024 * 1024, part_size: int = 8 * 1024 * 1024) -> None:
+        self.bucket = bucket
+        self.aws_client = aws_client or AWSClient()
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(part_size, MIN_PART_SIZE)
+
+    def write(self, key: str, body: bytes) -> None:
+        if len(body) > self.multipart_threshold:
+            self.aws_client.put_s3_object_multipart(self.bucket, key, body, self.part_size, 'application/gzip')
+        else:
+            self.aws_client.put_s3_object(self.bucket, key, body, 'application/gzip')
+
+
+class LocalArchiveBackend(ArchiveBackend):
+    """Writes archive objects below a local directory, for development and tests."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def write(self, key: str, body: bytes) -> None:
+        path = os.path.join(self.directory, *key.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+
+
+class MatchArchive:
+    """
+    Buffers matched events in memory and writes them as one gzip'd NDJSON object per
+    partition and invocation, keyed <prefix>dt=YYYY-MM-DD/log_group=<group>/<time>-<request id>.ndjson.gz.
+    The partition is the log group and the UTC date of each event, so a batch (or a
+    catch-up run) spanning several groups or days writes one object per group and day.
+    """
+
+    def __init__(self, backend: ArchiveBackend, prefix: str = 'matches/') -> None:
+        self.backend = backend
+        self.prefix = prefix
+        # (dt, log group) -> records
+        self._partitions: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self.buffered_bytes = 0
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._partitions.values())
+
+    def add(self, matches: List[Match], log_group: str, log_stream: str) -> None:
+        for match in matches:
+            event = match.event
+            dt = time.strftime('%Y-%m-%d', time.gmtime(event.timestamp / 1000))
+            self._partitions.setdefault((dt, log_group), []).append({
+                'log_group': log_group,
+                'log_stream': log_stream,
+                'stream_type': match.config.get('type', 'Unknown'),
+                'severity': match.config.get('severity'),
+                'event_ids': list(event.ids),
+                'timestamp': event.timestamp,
+                'message': event.message
+            })
+            self.buffered_bytes += len(event.message)
+
+    def flush(self, request_id: Optional[str] = None, now: Optional[float] = None) -> List[str]:
+        """
+        Writes the buffered records, one object per partition, and clears the buffer.
+        Returns the written keys. If a write fails the remaining partitions are still
+        written and the first error is raised afterwards.
+        """
+        partitions, self._partitions = self._partitions, {}
+        self.buffered_bytes = 0
+        now = time.time() if now is None else now
+        name = f"{time.strftime('%H%M%S', time.gmtime(now))}-{request_id or uuid.uuid4().hex}.ndjson.gz"
+        keys: List[str] = []
+        error: Optional[Exception] = None
+        for (dt, log_group), records in sorted(partitions.items()):
+            key = f"{self.prefix}dt={dt}/log_group={urllib.parse.quote(log_group, safe='')}/{name}"
+            body = gzip.compress(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8'))
+            try:
+                self.backend.write(key, body)
+            except Exception as e:
+                logger.error(f"Failed to archive {len(records)} matches to {key}: {e}")
+                error = error or e
+                continue
+            logger.info(f"Archived {len(records)} matches to {key} ({len(body)} bytes)")
+            keys.append(key)
+        if error is not None:
+            raise error
+        return keys
+
+
+def create_archive(aws_client: Optional[AWSClient] = None) -> Optional[MatchArchive]:
+    """Creates the match archive configured via ARCHIVE_TYPE (S3, LOCAL or NONE)."""
+    archive_type = os.environ.get('ARCHIVE_TYPE', 'NONE').upper()
+    prefix = os.environ.get('ARCHIVE_PREFIX', 'matches/')
+
+    if archive_type == 'S3':
+        bucket = os.environ.get('ARCHIVE_BUCKET')
+        if not bucket:
+            raise ValueError("ARCHIVE_BUCKET environment variable is required for S3 archive")
+        return MatchArchive(S3ArchiveBackend(bucket, aws_client), prefix)
+
+    if archive_type == 'LOCAL':
+        return MatchArchive(LocalArchiveBackend(os.environ.get('ARCHIVE_PATH', '/tmp/match_archive')), prefix)
+
+    return None
@@ -1,18 +1,30 @@
 import boto3
 import json
+import time
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Set
 from botocore.exceptions import ClientError
+from src.rate_governor import RateGovernor, is_throttling_error
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Unprocessed DynamoDB batch entries are resent with exponential backoff, at most this often
+DYNAMODB_BATCH_MAX_ATTEMPTS = 5
+DYNAMODB_BATCH_BASE_DELAY_SECONDS = 0.05
+
+# Context is optional: a notification is sent without it rather than waiting longer for a Logs API token
+CONTEXT_MAX_WAIT_SECONDS = 1.0
+
 class AWSClient:
-    def __init__(self) -> None:
+    def __init__(self, logs_governor: Optional[RateGovernor] = None) -> None:
+        self.logs_governor = logs_governor
         self.ssm = boto3.client('ssm')
         self.s3 = boto3.client('s3')
         self.logs = boto3.client('logs')
         self.sns = boto3.client('sns')
+        self.sqs = boto3.client('sqs')
+        self.dynamodb = boto3.client('dynamodb')
 
     def publish_sns_message(self, topic_arn: str, message: str) -> None:
         """Publishes a message to an SNS topic. Raises ClientError on failure."""
@@ -25,6 +37,134 @@ class AWSClient:
             logger.error(f"Error publishing to SNS {topic_arn}: {e}")
             raise
 
+    def send_sqs_message(self, queue_url: str, body: str, delay_seconds: int = 0) -> None:
+        """Sends a message to an SQS queue. Raises ClientError on failure."""
+        try:
+            self.sqs.send_message(
+                QueueUrl=queue_url,
+                MessageBody=body,
+                DelaySeconds=delay_seconds
+            )
+        except ClientError as e:
+            logger.error(f"Error sending message to SQS {queue_url}: {e}")
+            raise
+
+    def receive_sqs_messages(self, queue_url: str, max_messages: int = 10) -> List[Dict[str, Any]]:
+        """Receives up to max_messages (at most 10) from an SQS queue. Raises ClientError on failure."""
+        try:
+            response = self.sqs.receive_message(
+                QueueUrl=queue_url,
+                MaxNumberOfMessages=min(max_messages, 10),
+                WaitTimeSeconds=0
+            )
+            return response.get('Messages', [])
+        except ClientError as e:
+            logger.error(f"Error receiving messages from SQS {queue_url}: {e}")
+            raise
+
+    def delete_sqs_messages(self, queue_url: str, receipt_handles: List[str]) -> List[str]:
+        """
+        Deletes messages from an SQS queue in batches of 10. Entries SQS fails to delete
+        are retried once unless the failure is the caller's fault; the handles that still
+        failed are logged and returned, as those messages will be received again.
+        Raises ClientError on failure of the whole call.
+        """
+        failed: List[str] = []
+        try:
+            for start in range(0, len(receipt_handles), 10):
+                chunk = receipt_handles[start:start + 10]
+                for attempt in range(2):
+                    response = self.sqs.delete_message_batch(
+                        QueueUrl=queue_url,
+                        Entries=[{'Id': str(i), 'ReceiptHandle': handle} for i, handle in enumerate(chunk)]
+                    )
+                    errors = response.get('Failed', [])
+                    retryable = [chunk[int(e['Id'])] for e in errors if not e.get('SenderFault')]
+                    if attempt == 0 and retryable:
+                        failed.extend(chunk[int(e['Id'])] for e in errors if e.get('SenderFault'))
+                        chunk = retryable
+                        continue
+                    failed.extend(chunk[int(e['Id'])] for e in errors)
+                    break
+        except ClientError as e:
+            logger.error(f"Error deleting messages from SQS {queue_url}: {e}")
+            raise
+        if failed:
+            logger.error(f"Failed to delete {len(failed)} messages from SQS {queue_url}; they will be redelivered")
+        return failed
+
+    def get_dynamodb_item(self, table_name: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reads a single item (DynamoDB attribute format). Raises ClientError on failure."""
+        try:
+            response = self.dynamodb.get_item(TableName=table_name, Key=key, ConsistentRead=True)
+            return response.get('Item')
+        except ClientError as e:
+            logger.error(f"Error reading item from DynamoDB table {table_name}: {e}")
+            raise
+
+    def put_dynamodb_item(self, table_name: str, item: Dict[str, Any]) -> None:
+        """Writes a single item (DynamoDB attribute format). Raises ClientError on failure."""
+        try:
+            self.dynamodb.put_item(TableName=table_name, Item=item)
+        except ClientError as e:
+            logger.error(f"Error writing item to DynamoDB table {table_name}: {e}")
+            raise
+
+    def batch_get_dynamodb_keys(self, table_name: str, key_name: str, keys: List[str]) -> Set[str]:
+        """
+        Returns the subset of string keys that exist in a DynamoDB table. Keys still
+        unprocessed after the retries are treated as absent. Raises ClientError on failure.
+        """
+        found: Set[str] = set()
+        try:
+            for start in range(0, len(keys), 100):
+                request: Dict[str, Any] = {
+                    table_name: {
+                        'Keys': [{key_name: {'S': k}} for k in keys[start:start + 100]],
+                        'ProjectionExpression': key_name
+                    }
+                }
+                for attempt in range(DYNAMODB_BATCH_MAX_ATTEMPTS):
+                    if attempt:
+                        time.sleep(DYNAMODB_BATCH_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(table_name, []):
+                        found.add(item[key_name]['S'])
+                    request = response.get('UnprocessedKeys') or {}
+                    if not request:
+                        break
+                else:
+                    logger.error(f"Gave up reading {len(request[table_name]['Keys'])} keys from DynamoDB table "
+                                 f"{table_name} after {DYNAMODB_BATCH_MAX_ATTEMPTS} attempts")
+            return found
+        except ClientError as e:
+            logger.error(f"Error reading keys from DynamoDB table {table_name}: {e}")
+            raise
+
+    def batch_put_dynamodb_items(self, table_name: str, items: List[Dict[str, Any]]) -> None:
+        """
+        Writes items (in DynamoDB attribute format) in batches of 25. Items still
+        unprocessed after the retries are logged and dropped. Raises ClientError on failure.
+        """
+        try:
+            for start in range(0, len(items), 25):
+                request: Dict[str, Any] = {
+                    table_name: [{'PutRequest': {'Item': item}} for item in items[start:start + 25]]
+                }
+                for attempt in range(DYNAMODB_BATCH_MAX_ATTEMPTS):
+                    if attempt:
+                        time.sleep(DYNAMODB_BATCH_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+                    response = self.dynamodb.batch_write_item(RequestItems=request)
+                    request = response.get('UnprocessedItems') or {}
+                    if not request:
+                        break
+                else:
+                    logger.error(f"Gave up writing {len(request[table_name])} items to DynamoDB table "
+                                 f"{table_name} after {DYNAMODB_BATCH_MAX_ATTEMPTS} attempts")
+        except ClientError as e:
+            logger.error(f"Error writing items to DynamoDB table {table_name}: {e}")
+            raise
+
     def get_ssm_parameter(self, name: str) -> str:
         """Retrieves a parameter from SSM Parameter Store. Raises ClientError on failure."""
         try:
@@ -63,25 +203,145 @@ class AWSClient:
             logger.error(f"Error getting S3 object {bucket}/{key}: {e}")
             raise
 
-    def get_context_logs(self, log_group: str, log_stream: str, end_time: int, limit: int = 10) -> List[Dict[str, Any]]:
+    def put_s3_object(self, bucket: str, key: str, body: bytes, content_type: str = 'application/octet-stream') -> None:
+        """Writes an object to S3. Raises ClientError on failure."""
+        try:
+            self.s3.put_object(Bucket=bucket, Key=key, Body=body, ContentType=content_type)
+        except ClientError as e:
+            logger.error(f"Error putting S3 object {bucket}/{key}: {e}")
+            raise
+
+    def put_s3_object_multipart(self, bucket: str, key: str, body: bytes, part_size: int,
+                                content_type: str = 'application/octet-stream') -> None:
+        """
+        Writes a large object to S3 in parts of part_size bytes (at least 5 MiB except the last).
+        The upload is aborted if a part fails. Raises ClientError on failure.
+        """
+        upload_id = None
+        try:
+            upload_id = self.s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)['UploadId']
+            parts = []
+            for number, offset in enumerate(range(0, len(body), part_size), start=1):
+                response = self.s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number,
+                                               Body=body[offset:offset + part_size])
+                parts.append({'ETag': response['ETag'], 'PartNumber': number})
+            self.s3.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                              MultipartUpload={'Parts': parts})
+        except ClientError as e:
+            logger.error(f"Error uploading S3 object {bucket}/{key} in parts: {e}")
+            if upload_id is not None:
+                try:
+                    self.s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                except ClientError:
+                    pass
+            raise
+
+    def set_function_environment_variable(self, function_name: str, name: str, value: str) -> None:
+        """
+        Sets one environment variable of a Lambda function, keeping the others. Lambda
+        starts new execution environments for the updated configuration.
+        Raises ClientError on failure.
+        """
+        # Only needed for config change events, so the client is not created at cold start
+        lambda_client = boto3.client('lambda')
+        try:
+            current = lambda_client.get_function_configuration(FunctionName=function_name)
+            variables = dict(current.get('Environment', {}).get('Variables', {}))
+            variables[name] = value
+            lambda_client.update_function_configuration(
+                FunctionName=function_name,
+                Environment={'Variables': variables},
+                RevisionId=current['RevisionId']
+            )
+        except ClientError as e:
+            logger.error(f"Error updating environment of function {function_name}: {e}")
+            raise
+
+    def describe_log_streams(self, log_group: str, next_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns one page of the log streams of a group, most recent events first.
+        Raises ClientError on failure.
+        """
+        kwargs: Dict[str, Any] = {'logGroupName': log_group, 'orderBy': 'LastEventTime', 'descending': True}
+        if next_token:
+            kwargs['nextToken'] = next_token
+        try:
+            return self._governed(self.logs.describe_log_streams, **kwargs)
+        except ClientError as e:
+            logger.error(f"Error describing log streams of {log_group}: {e}")
+            raise
+
+    def filter_log_events(self, log_group: str, log_stream: str, start_time: int, end_time: int,
+                          next_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns one page of the events of a log stream between start_time and end_time (milliseconds).
+        Raises ClientError on failure.
+        """
+        kwargs: Dict[str, Any] = {
+            'logGroupName': log_group,
+            'logStreamNames': [log_stream],
+            'startTime': start_time,
+            'endTime': end_time
+        }
+        if next_token:
+            kwargs['nextToken'] = next_token
+        try:
+            return self._governed(self.logs.filter_log_events, **kwargs)
+        except ClientError as e:
+            logger.error(f"Error filtering log events of {log_group}/{log_stream}: {e}")
+            raise
+
+    def get_context_logs(self, log_group: str, log_stream: str, end_time: int, limit: int = 10,
+                         start_time: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Retrieves preceding logs for context.
         end_time: The timestamp of the matched event (in milliseconds).
+        start_time: Optional lower bound (in milliseconds) to only fetch a time window.
         
         Strategy: Fetch the last 'limit' events before 'end_time' by querying backwards
         from the event timestamp. startFromHead=False ensures we get the most recent events.
         """
+        kwargs: Dict[str, Any] = {}
+        if start_time is not None:
+            kwargs['startTime'] = start_time
+        governor = self.logs_governor
+        if governor is not None:
+            if not governor.acquire(CONTEXT_MAX_WAIT_SECONDS):
+                logger.warning(f"Logs API rate exhausted, sending notification for {log_group}/{log_stream} without context")
+                governor.record_skipped_context()
+                return []
+            limit = governor.context_limit(limit)
         try:
             response = self.logs.get_log_events(
                 logGroupName=log_group,
                 logStreamName=log_stream,
                 endTime=end_time,
                 limit=limit,
-                startFromHead=False
+                startFromHead=False,
+                **kwargs
             )
+            if governor is not None:
+                governor.record_success()
             return response.get('events', [])
         except ClientError as e:
+            if governor is not None and is_throttling_error(e):
+                governor.record_throttle()
             logger.error(f"Error getting logs from {log_group}/{log_stream}: {e}")
             # For context logs, it might be acceptable to return empty list rather than failing the whole process
             # But let's log it clearly.
             return []
+
+    def _governed(self, call: Callable[..., Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        """Makes a Logs API call through the rate governor, waiting for a token."""
+        governor = self.logs_governor
+        if governor is None:
+            return call(**kwargs)
+        governor.acquire()
+        try:
+            response = call(**kwargs)
+        except ClientError as e:
+            if is_throttling_error(e):
+                governor.record_throttle()
+            raise
+        governor.record_success()
+        return response
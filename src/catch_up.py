@@ -0,0 +1,230 @@
+"""
+Backfills matches for a time range that was missed, e.g. while the function or the
+subscription was down. Events are pulled with FilterLogEvents, one log stream per
+worker thread, and each page is run through the same pipeline as a pushed batch
+(event ledger dedup, matching, thresholds, sampling, notification).
+
+Progress is checkpointed after every page, so an interrupted run resumes where it
+stopped; pages replayed after a crash are deduplicated by the event ledger.
+
+    python -m src.catch_up --log-group /aws/lambda/api --start 2024-05-01T10:00:00Z \\
+        --end 2024-05-01T12:00:00Z --checkpoint catch_up.json --workers 4
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from src.aws_client import AWSClient
+from src.models import LogEvent
+
+logger = logging.getLogger()
+
+# (log group, log stream, events) -> number of matches handled
+ProcessFunc = Callable[[str, str, List[LogEvent]], int]
+StreamKey = Tuple[str, str]
+
+# lastEventTimestamp of a log stream is only updated eventually (within about an hour)
+STREAM_LOOKBACK_MS = 3600 * 1000
+
+
+class CheckpointStore:
+    """Catch-up progress as a JSON document in a local file or at s3://bucket/key."""
+
+    def __init__(self, path: str, aws_client: Optional[AWSClient] = None) -> None:
+        self.path = path
+        self.aws_client = aws_client
+
+    def load(self) -> Dict[str, Any]:
+        if self.path.startswith('s3://'):
+            bucket, _, key = self.path[len('s3://'):].partition('/')
+            client = self.aws_client or AWSClient()
+            try:
+                return json.loads(client.get_s3_object(bucket, key))
+            except Exception as e:
+                code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+                if code in ('NoSuchKey', '404'):
+                    return {}
+                raise
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, state: Dict[str, Any]) -> None:
+        body = json.dumps(state, sort_keys=True)
+        if self.path.startswith('s3://'):
+            bucket, _, key = self.path[len('s3://'):].partition('/')
+            (self.aws_client or AWSClient()).put_s3_object(bucket, key, body.encode('utf-8'), 'application/json')
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp_path, self.path)
+
+
+class CatchUpScanner:
+    """
+    Pulls the events of log groups in [start_time, end_time] and hands each page to
+    `process` on the calling thread. Up to `workers` streams are fetched concurrently;
+    the pipeline itself (ledger, thresholds, notification) stays single-threaded.
+    """
+
+    def __init__(self, aws_client: AWSClient, process: ProcessFunc, checkpoints: CheckpointStore,
+                 workers: int = 4) -> None:
+        self.aws_client = aws_client
+        self.process = process
+        self.checkpoints = checkpoints
+        self.workers = max(1, workers)
+
+    def run(self, log_groups: List[str], start_time: int, end_time: int,
+            should_continue: Callable[[], bool] = lambda: True) -> Dict[str, Any]:
+        """
+        Scans until every stream is done or should_continue() returns False.
+        Returns counters and whether the range was covered completely.
+        """
+        state = self.checkpoints.load()
+        if state.get('start_time') != start_time or state.get('end_time') != end_time:
+            state = {'start_time': start_time, 'end_time': end_time, 'groups': {}}
+        groups = state['groups']
+        stats: Dict[str, Any] = {'streams': 0, 'pages': 0, 'events': 0, 'matches': 0, 'failed': 0}
+
+        for log_group in log_groups:
+            group_state = groups.setdefault(log_group, {'listed': False, 'streams': {}})
+            if not group_state['listed']:
+                for log_stream in self._list_streams(log_group, start_time, end_time):
+                    group_state['streams'].setdefault(log_stream, {'token': None, 'done': False})
+                group_state['listed'] = True
+                self.checkpoints.save(state)
+
+        queue: Deque[StreamKey] = deque(
+            (log_group, log_stream)
+            for log_group in log_groups
+            for log_stream, stream_state in groups[log_group]['streams'].items()
+            if not stream_state['done']
+        )
+        stats['streams'] = len(queue)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            in_flight: Dict[Future, StreamKey] = {}
+
+            def submit(key: StreamKey) -> None:
+                token = groups[key[0]]['streams'][key[1]]['token']
+                in_flight[pool.submit(self.aws_client.filter_log_events, key[0], key[1],
+                                      start_time, end_time, token)] = key
+
+            while queue and len(in_flight) < self.workers and should_continue():
+                submit(queue.popleft())
+
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    log_group, log_stream = in_flight.pop(future)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        # The checkpoint still points at the failed page; a rerun retries it
+                        logger.error(f"Catch-up of {log_group}/{log_stream} failed: {e}")
+                        stats['failed'] += 1
+                        continue
+
+                    events = [LogEvent(e.get('eventId'), e['timestamp'], e['message'],
+                                       ingestion_time=e.get('ingestionTime'))
+                              for e in page.get('events', [])]
+                    if events:
+                        stats['matches'] += self.process(log_group, log_stream, events)
+                    stats['pages'] += 1
+                    stats['events'] += len(events)
+
+                    token = page.get('nextToken')
+                    stream_state = groups[log_group]['streams'][log_stream]
+                    stream_state['token'] = token
+                    stream_state['done'] = not token
+                    self.checkpoints.save(state)
+                    if token and should_continue():
+                        submit((log_group, log_stream))
+
+                while queue and len(in_flight) < self.workers and should_continue():
+                    submit(queue.popleft())
+
+        stats['complete'] = all(s['done'] for g in log_groups for s in groups[g]['streams'].values())
+        logger.info(f"Catch-up finished: {stats}")
+        return stats
+
+    def _list_streams(self, log_group: str, start_time: int, end_time: int) -> List[str]:
+        """Streams of the group that can hold events in the range."""
+        cutoff = start_time - STREAM_LOOKBACK_MS
+        streams: List[str] = []
+        token: Optional[str] = None
+        while True:
+            page = self.aws_client.describe_log_streams(log_group, token)
+            for stream in page.get('logStreams', []):
+                last_event = stream.get('lastEventTimestamp')
+                if last_event is None:
+                    continue
+                if last_event < cutoff:
+                    # Ordered by last event time: no later stream can reach the range
+                    return streams
+                if stream.get('firstEventTimestamp', 0) <= end_time:
+                    streams.append(stream['logStreamName'])
+            token = page.get('nextToken')
+            if not token:
+                return streams
+
+
+def parse_time(value: str) -> int:
+    """Epoch milliseconds, or an ISO 8601 timestamp (UTC unless it has an offset)."""
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def catch_up(log_groups: List[str], start_time: int, end_time: int, checkpoint_path: str, workers: int = 4,
+             should_continue: Callable[[], bool] = lambda: True) -> Dict[str, Any]:
+    """Runs a catch-up scan through the function's notification pipeline."""
+    from src import lambda_function
+
+    config = lambda_function.config_loader.load_config()
+    if not config:
+        raise ValueError("Configuration is empty")
+
+    def process(log_group: str, log_stream: str, events: List[LogEvent]) -> int:
+        if not lambda_function.log_processor.routes(log_group, log_stream, config):
+            return 0
+        return lambda_function.process_events(log_group, log_stream, events, config, backfill=True)
+
+    aws_client = lambda_function.aws_client
+    scanner = CatchUpScanner(aws_client, process, CheckpointStore(checkpoint_path, aws_client), workers)
+    try:
+        return scanner.run(log_groups, start_time, end_time, should_continue)
+    finally:
+        lambda_function._flush_archive(None)
+        lambda_function._flush_latency()
+        lambda_function._flush_logs_governor()
+        lambda_function._flush_memory_governor()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill matches for a time range with FilterLogEvents")
+    parser.add_argument('--log-group', action='append', required=True, help="Log group to scan (repeatable)")
+    parser.add_argument('--start', required=True, help="Start time (ISO 8601 or epoch ms)")
+    parser.add_argument('--end', required=True, help="End time (ISO 8601 or epoch ms)")
+    parser.add_argument('--checkpoint', default='catch_up_checkpoint.json',
+                        help="Checkpoint file or s3://bucket/key; reruns with the same range resume from it")
+    parser.add_argument('--workers', type=int, default=4, help="Log streams fetched concurrently")
+    args = parser.parse_args(argv)
+
+    stats = catch_up(args.log_group, parse_time(args.start), parse_time(args.end), args.checkpoint, args.workers)
+    print(json.dumps(stats))
+    return 0 if stats['complete'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import time
+import hashlib
+import logging
+from typing import Callable, Dict, Optional, Tuple
+from src.config import env_float, env_int
+from src.metrics import emit_emf
+
+logger = logging.getLogger()
+
+METRIC_NAMESPACE = 'CloudWatchLogMonitor/Notifications'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def describe_target(channel: str, target: str) -> str:
+    """Loggable name of a target; webhook URLs are secrets and only shown as a digest."""
+    if channel == 'slack':
+        return f"slack:{hashlib.blake2b(target.encode('utf-8'), digest_size=4).hexdigest()}"
+    return f"{channel}:{target}"
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and consecutive failures are counted.
+    Open: after failure_threshold consecutive failures calls are refused for cooldown_seconds.
+    Half-open: after the cooldown one probe call is let through; its success closes
+    the circuit, its failure opens it for another cooldown.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_seconds: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.cooldown_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._probing = False
+        if self._probing:
+            # One probe at a time
+            return False
+        self._probing = True
+        return True
+
+    def is_open(self) -> bool:
+        """Whether calls are currently refused (without taking the half-open probe slot)."""
+        return self.state == OPEN and self.clock() - self.opened_at < self.cooldown_seconds
+
+    def record(self, success: bool) -> None:
+        """Records the outcome of an allowed call."""
+        self._probing = False
+        if success:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if self.state != OPEN:
+            logger.error(f"Circuit for {self.name} opened after {self.failures} consecutive failures; "
+                         f"sends are refused for {self.cooldown_seconds:g}s")
+            emit_emf(METRIC_NAMESPACE, {'Target': self.name}, {'CircuitOpened': (1, 'Count')})
+        self.state = OPEN
+        self.opened_at = self.clock()
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per (channel, target), kept across warm invocations."""
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, channel: str, target: str) -> CircuitBreaker:
+        key = (channel, target)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                describe_target(channel, target), self.failure_threshold, self.cooldown_seconds, self.clock)
+        return breaker
+
+
+def create_circuit_breakers() -> Optional[CircuitBreakers]:
+    """
+    Creates the breakers if CIRCUIT_FAILURE_THRESHOLD is set (0 disables them).
+    CIRCUIT_COOLDOWN_SECONDS is how long an open circuit refuses sends before a probe.
+    """
+    threshold = env_int('CIRCUIT_FAILURE_THRESHOLD', 0)
+    if threshold <= 0:
+        return None
+    cooldown = env_float('CIRCUIT_COOLDOWN_SECONDS', 60)
+    return CircuitBreakers(threshold, cooldown)
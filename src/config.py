@@ -1,17 +1,145 @@
 import os
 import json
-import yaml
 import logging
 import time
-from typing import List, Dict, Any, Optional, Union
+import urllib.parse
+from typing import Callable, List, Dict, Any, Optional, Union
 from src.aws_client import AWSClient
 
 logger = logging.getLogger()
 
+# Compiled config artifacts written by src/config_compiler.py
+ARTIFACT_FORMAT = 'cloudwatch-log-monitor/compiled-config'
+ARTIFACT_VERSION = 1
+
+
+def parse_config_content(content: str) -> Optional[Any]:
+    """Parses JSON or YAML content. YAML is only imported when the content is not JSON."""
+    try:
+        # Try JSON first
+        return json.loads(content)
+    except json.JSONDecodeError:
+        import yaml
+        try:
+            # Try YAML
+            return yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            logger.error(f"Failed to parse config content: {e}")
+            return None
+
+
+def merge_config_fragments(config_contents: List[str],
+                           parse: Callable[[str], Optional[Any]] = parse_config_content) -> Dict[str, Any]:
+    """Merges multiple configuration strings into a single config object."""
+    merged_config: Dict[str, List[Any]] = {"stream_types": []}
+
+    for content in config_contents:
+        parsed = parse(content)
+        if not parsed:
+            continue
+
+        # If the chunk has 'stream_types', extend the main list
+        if isinstance(parsed, dict) and 'stream_types' in parsed and isinstance(parsed['stream_types'], list):
+            merged_config['stream_types'].extend(parsed['stream_types'])
+        # If the chunk IS a list (YAML list), assume it's a list of stream types
+        elif isinstance(parsed, list):
+            merged_config['stream_types'].extend(parsed)
+        else:
+            logger.warning(f"Skipping invalid config chunk structure: {type(parsed)}")
+
+    return merged_config
+
+
+def is_config_artifact(data: Any) -> bool:
+    return isinstance(data, dict) and data.get('format') == ARTIFACT_FORMAT
+
+
+def unwrap_config_artifact(artifact: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the config stored in a compiled artifact, with its precomputed index
+    under '_index' and its content hash under '_config_hash'.
+    """
+    if artifact.get('version') != ARTIFACT_VERSION:
+        logger.error(f"Unsupported config artifact version {artifact.get('version')} (expected {ARTIFACT_VERSION})")
+        return None
+    return {
+        'stream_types': artifact.get('stream_types', []),
+        '_index': artifact.get('index', {}),
+        '_config_hash': artifact.get('config_hash')
+    }
+
+def config_change_source(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Recognizes control events announcing that the configured config source changed:
+    S3 event notifications and EventBridge 'Object Created' events for S3_BUCKET/S3_KEY,
+    and EventBridge 'Parameter Store Change' events for SSM_PARAMETER_NAME (or a
+    parameter under it, for paths). Returns the changed location, or None.
+    """
+    config_source = os.environ.get('CONFIG_SOURCE', 'ENV').upper()
+    changed: List[str] = []
+
+    if config_source == 'S3':
+        objects = []
+        for record in event.get('Records') or []:
+            if isinstance(record, dict) and record.get('eventSource') == 'aws:s3':
+                s3 = record.get('s3', {})
+                # Keys in S3 notifications are URL-encoded with '+' for spaces
+                objects.append((s3.get('bucket', {}).get('name'),
+                                urllib.parse.unquote_plus(s3.get('object', {}).get('key', ''))))
+        if event.get('source') == 'aws.s3' and event.get('detail-type') == 'Object Created':
+            detail = event.get('detail', {})
+            objects.append((detail.get('bucket', {}).get('name'), detail.get('object', {}).get('key')))
+        target = (os.environ.get('S3_BUCKET'), os.environ.get('S3_KEY'))
+        changed = [f"s3://{bucket}/{key}" for bucket, key in objects if (bucket, key) == target]
+
+    elif config_source == 'SSM':
+        if event.get('source') == 'aws.ssm' and event.get('detail-type') == 'Parameter Store Change':
+            name = event.get('detail', {}).get('name', '')
+            param_name = os.environ.get('SSM_PARAMETER_NAME', '')
+            if param_name and (name == param_name or (param_name.endswith('/') and name.startswith(param_name))):
+                changed = [f"ssm:{name}"]
+
+    return changed[0] if changed else None
+
+
+def is_control_event(event: Dict[str, Any]) -> bool:
+    """Whether an invocation event is an S3/EventBridge notification rather than log data."""
+    if 'awslogs' in event:
+        return False
+    records = event.get('Records')
+    return bool(event.get('source') and event.get('detail-type')) or \
+        bool(records and isinstance(records, list) and isinstance(records[0], dict) and 'eventSource' in records[0])
+
+
+def env_int(name: str, default: int) -> int:
+    """Integer environment setting; a malformed value is logged and the default used."""
+    return _env_number(name, default, int)
+
+
+def env_float(name: str, default: float) -> float:
+    """Numeric environment setting that may be fractional, parsed like env_int()."""
+    return _env_number(name, default, float)
+
+
+def _env_number(name: str, default: Any, parse: Callable[[str], Any]) -> Any:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return parse(value)
+    except ValueError:
+        logger.warning(f"Invalid {name}={value!r}, using {default}")
+        return default
+
+
 class ConfigLoader:
     _config_cache: Optional[Dict[str, Any]] = None
     _cache_timestamp: float = 0
-    _cache_ttl: int = 300  # 5 minutes in seconds
+    # Overridden by CONFIG_CACHE_TTL_SECONDS; with change events routed to the
+    # function it can be raised to hours
+    _cache_ttl: int = env_int('CONFIG_CACHE_TTL_SECONDS', 300)
+    # Bumped whenever a configuration is (re)loaded
+    _load_count: int = 0
 
     def __init__(self, aws_client: Optional[AWSClient] = None):
         self.aws_client = aws_client or AWSClient()
@@ -45,6 +173,15 @@ class ConfigLoader:
                 if config_content:
                     config_data = self._parse_content(config_content)
 
+        elif config_source == 'FILE':
+            # Compiled artifact (or plain config) shipped in the deployment package
+            path = os.environ.get('CONFIG_FILE_PATH', 'config.compiled.json')
+            try:
+                with open(path, encoding='utf-8') as f:
+                    config_data = self._parse_content(f.read())
+            except OSError as e:
+                logger.error(f"Failed to read config file {path}: {e}")
+
         elif config_source == 'S3':
             bucket = os.environ.get('S3_BUCKET')
             key = os.environ.get('S3_KEY')
@@ -62,6 +199,9 @@ class ConfigLoader:
             else:
                 logger.warning("STREAM_CONFIG environment variable is empty")
 
+        if is_config_artifact(config_data):
+            config_data = unwrap_config_artifact(config_data)  # type: ignore[arg-type]
+
         if not config_data:
             logger.error("Failed to load configuration or configuration is empty")
             return {}
@@ -73,38 +213,28 @@ class ConfigLoader:
 
         ConfigLoader._config_cache = config_data
         ConfigLoader._cache_timestamp = time.time()
+        ConfigLoader._load_count += 1
         return config_data
 
+    @staticmethod
+    def invalidate() -> None:
+        """Drops the cached configuration; the next load_config() fetches it again."""
+        ConfigLoader._config_cache = None
+        ConfigLoader._cache_timestamp = 0
+
+    @staticmethod
+    def config_version(config: Dict[str, Any]) -> str:
+        """
+        Identifies a loaded configuration: the content hash of compiled artifacts,
+        otherwise the load it came from.
+        """
+        return config.get('_config_hash') or f"load-{ConfigLoader._load_count}"
+
 
     def _parse_content(self, content: str) -> Optional[Dict[str, Any]]:
         """Parses JSON or YAML content."""
-        try:
-            # Try JSON first
-            return json.loads(content)
-        except json.JSONDecodeError:
-            try:
-                # Try YAML
-                return yaml.safe_load(content)
-            except yaml.YAMLError as e:
-                logger.error(f"Failed to parse config content: {e}")
-                return None
+        return parse_config_content(content)
 
     def _merge_configs(self, config_contents: List[str]) -> Dict[str, Any]:
         """Merges multiple configuration strings into a single config object."""
-        merged_config: Dict[str, List[Any]] = {"stream_types": []}
-        
-        for content in config_contents:
-            parsed = self._parse_content(content)
-            if not parsed:
-                continue
-            
-            # If the chunk has 'stream_types', extend the main list
-            if isinstance(parsed, dict) and 'stream_types' in parsed and isinstance(parsed['stream_types'], list):
-                merged_config['stream_types'].extend(parsed['stream_types'])
-            # If the chunk IS a list (YAML list), assume it's a list of stream types
-            elif isinstance(parsed, list):
-                merged_config['stream_types'].extend(parsed)
-            else:
-                logger.warning(f"Skipping invalid config chunk structure: {type(parsed)}")
-        
-        return merged_config
+        return merge_config_fragments(config_contents, self._parse_content)
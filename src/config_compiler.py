@@ -0,0 +1,272 @@
+"""
+Build-time config compiler.
+
+Validates stream_types configuration (YAML/JSON files or an SSM parameter path),
+merges the fragments the same way ConfigLoader does and writes a versioned JSON
+artifact with a precomputed routing index. Load it at runtime with
+CONFIG_SOURCE=FILE (deployment package), S3 or SSM.
+
+    python -m src.config_compiler config/*.yaml -o config.compiled.json
+    python -m src.config_compiler --ssm-path /log-monitor/config/ -o config.compiled.json
+"""
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
+from src.config import ARTIFACT_FORMAT, ARTIFACT_VERSION, merge_config_fragments, \
+    unwrap_config_artifact
+from src.json_rules import compile_field_rule
+from src.redaction import parse_redact_rules
+from src.context_policy import ContextPolicy
+from src.regex_engine import complexity_issue
+from src.routing import RoutingIndex, classify_pattern
+
+
+class ConfigValidationError(ValueError):
+    """Raised with every problem found in a configuration."""
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__(f"{len(errors)} configuration error(s):\n" + '\n'.join(f"  - {e}" for e in errors))
+        self.errors = errors
+
+
+def validate_config(config: Dict[str, Any]) -> List[str]:
+    """Returns a list of problems that the runtime would otherwise log and skip."""
+    stream_types = config.get('stream_types') if isinstance(config, dict) else None
+    if not isinstance(stream_types, list):
+        return ["missing 'stream_types' list"]
+
+    errors = []
+    for i, st_config in enumerate(stream_types):
+        if not isinstance(st_config, dict):
+            errors.append(f"stream_types[{i}]: must be an object")
+            continue
+        where = f"stream_types[{i}] ({st_config.get('type', '?')})"
+
+        if not isinstance(st_config.get('type'), str) or not st_config['type']:
+            errors.append(f"{where}: 'type' is required")
+        if not st_config.get('pattern') and not st_config.get('log_group_pattern'):
+            errors.append(f"{where}: needs 'pattern' or 'log_group_pattern'")
+        for key in ('pattern', 'log_group_pattern'):
+            if st_config.get(key):
+                errors.extend(f"{where}: {key}: {e}" for e in _regex_errors([st_config[key]], 0))
+
+        whitelist = st_config.get('whitelist', [])
+        filters = st_config.get('filters', [])
+        field_filters = st_config.get('field_filters', [])
+        if not isinstance(whitelist, list) or not isinstance(filters, list) or not isinstance(field_filters, list):
+            errors.append(f"{where}: 'whitelist', 'filters' and 'field_filters' must be lists")
+            continue
+        errors.extend(f"{where}: whitelist: {e}" for e in _regex_errors(whitelist, re.IGNORECASE))
+        for keyword in filters:
+            if not isinstance(keyword, str) or not keyword or '\x00' in keyword:
+                errors.append(f"{where}: filters: invalid keyword {keyword!r}")
+        for rule in field_filters:
+            try:
+                compile_field_rule(rule)
+            except ValueError as e:
+                errors.append(f"{where}: field_filters: {e}")
+
+        multiline = st_config.get('multiline')
+        if multiline:
+            if not isinstance(multiline, dict) or not multiline.get('start_pattern'):
+                errors.append(f"{where}: multiline needs a 'start_pattern'")
+            else:
+                errors.extend(f"{where}: multiline: {e}" for e in _regex_errors([multiline['start_pattern']], 0))
+
+        sample_size = st_config.get('sample_size')
+        if sample_size is not None and (not isinstance(sample_size, int) or sample_size < 0):
+            errors.append(f"{where}: sample_size must be a non-negative integer")
+
+        if st_config.get('redact') is not None:
+            try:
+                parse_redact_rules(st_config['redact'])
+            except (ValueError, re.error) as e:
+                errors.append(f"{where}: redact: {e}")
+
+        try:
+            ContextPolicy.from_config(st_config.get('context'))
+        except ValueError as e:
+            errors.append(f"{where}: {e}")
+
+        threshold = st_config.get('threshold')
+        if threshold:
+            try:
+                if int(threshold['count']) <= 0 or float(threshold['window_minutes']) <= 0:
+                    raise ValueError
+            except (KeyError, TypeError, ValueError):
+                errors.append(f"{where}: threshold needs positive 'count' and 'window_minutes': {threshold}")
+    return errors
+
+
+def complexity_warnings(config: Dict[str, Any]) -> List[str]:
+    """Regexes that may backtrack catastrophically; at runtime they run under REGEX_BUDGET_MS."""
+    warnings = []
+    for i, st_config in enumerate(config.get('stream_types', [])):
+        where = f"stream_types[{i}] ({st_config.get('type', '?')})"
+        checks = [(key, st_config[key], 0) for key in ('pattern', 'log_group_pattern') if st_config.get(key)]
+        checks += [('whitelist', p, re.IGNORECASE) for p in st_config.get('whitelist', [])]
+        checks += [('redact', r['pattern'], 0) for r in st_config.get('redact') or []
+                   if isinstance(r, dict) and isinstance(r.get('pattern'), str)]
+        for key, pattern, flags in checks:
+            issue = complexity_issue(pattern, flags)
+            if issue:
+                warnings.append(f"{where}: {key}: {pattern!r} may backtrack catastrophically ({issue})")
+    return warnings
+
+
+def _regex_errors(patterns: List[Any], flags: int) -> List[str]:
+    errors = []
+    for pattern in patterns:
+        try:
+            re.compile(pattern, flags)
+        except (re.error, TypeError) as e:
+            errors.append(f"invalid regex {pattern!r}: {e}")
+    return errors
+
+
+def normalize_stream_type(st_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Lowercases filter keywords (matching is case-insensitive) and drops empty lists."""
+    normalized = dict(st_config)
+    if normalized.get('filters'):
+        normalized['filters'] = [k.lower() for k in normalized['filters']]
+    for key in ('filters', 'whitelist', 'field_filters'):
+        if key in normalized and not normalized[key]:
+            del normalized[key]
+    return normalized
+
+
+def build_index(stream_types: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Precomputes the classify_pattern() results used by RoutingIndex."""
+    routing = []
+    for st_config in stream_types:
+        routing.append([
+            list(classify_pattern(st_config[key])) if st_config.get(key) else None
+            for key in ('log_group_pattern', 'pattern')
+        ])
+    return {'routing': routing}
+
+
+def compile_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Validates and compiles a config into an artifact. Raises ConfigValidationError."""
+    errors = validate_config(config)
+    if errors:
+        raise ConfigValidationError(errors)
+
+    stream_types = [normalize_stream_type(st) for st in config['stream_types']]
+    canonical = json.dumps(stream_types, sort_keys=True, separators=(',', ':'))
+    return {
+        'format': ARTIFACT_FORMAT,
+        'version': ARTIFACT_VERSION,
+        'config_hash': hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16],
+        'stream_types': stream_types,
+        'index': build_index(stream_types)
+    }
+
+
+def serialize_artifact(artifact: Dict[str, Any]) -> str:
+    return json.dumps(artifact, separators=(',', ':'), ensure_ascii=False)
+
+
+def measure_load_times(source_contents: Sequence[str], artifact_text: str, repeat: int = 20) -> Tuple[float, float]:
+    """
+    Median milliseconds to go from raw text to a ready routing index, for the source
+    fragments (JSON attempt, YAML fallback, merge, classify) and for the artifact.
+    Regexes are compiled in both cases, as the runtime does.
+    """
+    def load_source() -> None:
+        config = merge_config_fragments(list(source_contents))
+        RoutingIndex(config['stream_types'], _compile)
+
+    def load_artifact() -> None:
+        config = unwrap_config_artifact(json.loads(artifact_text))
+        assert config is not None
+        RoutingIndex(config['stream_types'], _compile, classifications=config['_index'].get('routing'))
+
+    return _median_ms(load_source, repeat), _median_ms(load_artifact, repeat)
+
+
+def _compile(pattern: str) -> Optional[Pattern]:
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def _median_ms(func: Any, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        re.purge()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def measure_yaml_import_ms() -> Optional[float]:
+    """Time a fresh interpreter spends importing PyYAML, which artifact loading avoids."""
+    code = "import time;t=time.perf_counter();import yaml;print((time.perf_counter()-t)*1000)"
+    try:
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=30, check=True)
+        return float(out.stdout.strip())
+    except (subprocess.SubprocessError, ValueError, OSError):
+        return None
+
+
+def _read_sources(args: argparse.Namespace) -> List[str]:
+    contents = []
+    for path in args.inputs:
+        with open(path, encoding='utf-8') as f:
+            contents.append(f.read())
+    if args.ssm_path:
+        from src.aws_client import AWSClient
+        contents.extend(AWSClient().get_ssm_parameters_by_path(args.ssm_path))
+    return contents
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile stream_types configuration into a fast-loading artifact")
+    parser.add_argument('inputs', nargs='*', help="YAML/JSON config files or fragments, merged in order")
+    parser.add_argument('--ssm-path', help="Also merge every parameter under this SSM path (e.g. /log-monitor/config/)")
+    parser.add_argument('-o', '--output', default='config.compiled.json', help="Artifact path ('-' for stdout)")
+    parser.add_argument('--no-timing', action='store_true', help="Skip the cold-start timing report")
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.ssm_path:
+        parser.error("give at least one input file or --ssm-path")
+
+    sources = _read_sources(args)
+    try:
+        artifact = compile_config(merge_config_fragments(sources))
+    except ConfigValidationError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    for warning in complexity_warnings(artifact):
+        print(f"warning: {warning}", file=sys.stderr)
+
+    text = serialize_artifact(artifact)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Wrote {args.output}: {len(artifact['stream_types'])} stream types, "
+              f"version {artifact['version']}, hash {artifact['config_hash']}", file=sys.stderr)
+
+    if not args.no_timing:
+        source_ms, artifact_ms = measure_load_times(sources, text)
+        print(f"Config load: source {source_ms:.2f} ms, artifact {artifact_ms:.2f} ms "
+              f"(saves {source_ms - artifact_ms:.2f} ms per cold start)", file=sys.stderr)
+        yaml_ms = measure_yaml_import_ms()
+        if yaml_ms is not None:
+            print(f"PyYAML import avoided when loading the artifact: {yaml_ms:.2f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Dict, List, Optional
+from src.aws_client import AWSClient
+from src.models import LogEvent
+
+logger = logging.getLogger()
+
+DEFAULT_CONTEXT_EVENTS = 10
+# Cap on the events fetched for a time window; notifications keep the last ~2-3 KB anyway
+MAX_WINDOW_EVENTS = 100
+
+
+class ContextPolicy:
+    """
+    How much preceding context a stream type's notifications carry, from its 'context'
+    setting: {"events": N} (default 10), {"window_seconds": S} (events in the S seconds
+    before the match, at most `events` or 100), or "none".
+    """
+    __slots__ = ('events', 'window_ms')
+
+    def __init__(self, events: int = DEFAULT_CONTEXT_EVENTS, window_ms: Optional[int] = None) -> None:
+        self.events = events
+        self.window_ms = window_ms
+
+    @classmethod
+    def from_config(cls, setting: Any) -> 'ContextPolicy':
+        """Raises ValueError for invalid settings."""
+        if setting is None:
+            return cls()
+        if setting == 'none' or setting is False:
+            return cls(0)
+        if not isinstance(setting, dict):
+            raise ValueError(f"context must be 'none' or an object, got {setting!r}")
+        window = setting.get('window_seconds')
+        events = setting.get('events', MAX_WINDOW_EVENTS if window is not None else DEFAULT_CONTEXT_EVENTS)
+        if not isinstance(events, int) or isinstance(events, bool) or not 0 <= events <= 10000:
+            raise ValueError(f"context events must be an integer between 0 and 10000, got {events!r}")
+        if window is not None:
+            if not isinstance(window, (int, float)) or isinstance(window, bool) or window <= 0:
+                raise ValueError(f"context window_seconds must be positive, got {window!r}")
+            return cls(min(events, MAX_WINDOW_EVENTS), int(window * 1000))
+        return cls(events)
+
+    @property
+    def enabled(self) -> bool:
+        return self.events > 0
+
+    def fetch(self, aws_client: AWSClient, log_group: str, log_stream: str, timestamp: int) -> List[LogEvent]:
+        if not self.enabled:
+            return []
+        start_time = timestamp - self.window_ms if self.window_ms is not None else None
+        logs = aws_client.get_context_logs(log_group, log_stream, timestamp, self.events, start_time)
+        return [LogEvent.from_dict(log) for log in logs]
+
+
+_DEFAULT = ContextPolicy()
+
+
+def context_policy_for(st_config: Dict[str, Any]) -> ContextPolicy:
+    """The context policy of a stream type; invalid settings fall back to the default."""
+    setting = st_config.get('context')
+    if setting is None:
+        return _DEFAULT
+    try:
+        return ContextPolicy.from_config(setting)
+    except ValueError as e:
+        logger.warning(f"Invalid context setting for stream type {st_config.get('type')}: {e}")
+        return _DEFAULT
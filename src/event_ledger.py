@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set
+from src.aws_client import AWSClient
+from src.config import env_int
+from src.models import LogEvent, Match
+
+logger = logging.getLogger()
+
+
+class LedgerStore(ABC):
+    """
+    Shared store for processed event ids, so retries landing on another
+    container are deduplicated as well.
+    """
+
+    @abstractmethod
+    def contains_many(self, event_ids: List[str]) -> Set[str]:
+        """Returns the subset of event_ids that were already processed."""
+        pass
+
+    @abstractmethod
+    def add_many(self, event_ids: List[str]) -> None:
+        """Records event_ids as processed."""
+        pass
+
+
+class DynamoDBLedgerStore(LedgerStore):
+    """
+    Stores processed event ids in a DynamoDB table keyed on 'event_id'.
+    Items carry an 'expires_at' attribute for DynamoDB TTL.
+    """
+
+    def __init__(self, table_name: str, aws_client: Optional[AWSClient] = None, ttl_seconds: int = 86400) -> None:
+        self.table_name = table_name
+        self.aws_client = aws_client or AWSClient()
+        self.ttl_seconds = ttl_seconds
+
+    def contains_many(self, event_ids: List[str]) -> Set[str]:
+        if not event_ids:
+            return set()
+        return self.aws_client.batch_get_dynamodb_keys(self.table_name, 'event_id', event_ids)
+
+    def add_many(self, event_ids: List[str]) -> None:
+        if not event_ids:
+            return
+        expires_at = str(int(time.time()) + self.ttl_seconds)
+        self.aws_client.batch_put_dynamodb_items(
+            self.table_name,
+            [{'event_id': {'S': event_id}, 'expires_at': {'N': expires_at}} for event_id in event_ids]
+        )
+
+
+class ProcessedEventLedger:
+    """
+    Bounded LRU set of CloudWatch event ids that were already alerted on.
+    Lives in the warm container; ids are stored as 64-bit hashes to keep it compact.
+    An optional LedgerStore is consulted for ids not found locally.
+    """
+
+    def __init__(self, max_entries: int = 10000, store: Optional[LedgerStore] = None) -> None:
+        self.max_entries = max_entries
+        self.store = store
+        self._seen: 'OrderedDict[int, None]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, event_id: str) -> bool:
+        return hash(event_id) in self._seen
+
+    def filter_unprocessed(self, events: List[LogEvent]) -> List[LogEvent]:
+        """
+        Drops events whose id was already processed by this container. Events without
+        an id are kept. The shared store is only consulted for matches (filter_matches).
+        """
+        seen = self._seen
+        local_hits = 0
+        remaining = []
+        for event in events:
+            event_id = event.id
+            if event_id:
+                key = hash(event_id)
+                if key in seen:
+                    seen.move_to_end(key)
+                    local_hits += 1
+                    continue
+            remaining.append(event)
+        if local_hits:
+            logger.info(f"Skipping {local_hits} already processed events")
+        return remaining
+
+    def filter_matches(self, matches: List[Match]) -> List[Match]:
+        """
+        Drops matches the shared store knows as processed. Only matched events are ever
+        recorded there, so batches without matches never reach the store.
+        """
+        if not self.store or not matches:
+            return matches
+        ids = [m.event.id for m in matches if m.event.id]
+        if not ids:
+            return matches
+        try:
+            remote_hits = self.store.contains_many(ids)
+        except Exception as e:
+            logger.error(f"Processed-event store lookup failed, continuing without it: {e}")
+            return matches
+        if not remote_hits:
+            return matches
+        self._remember(remote_hits)
+        logger.info(f"Skipping {len(remote_hits)} matches already processed by another container")
+        return [m for m in matches if m.event.id not in remote_hits]
+
+    def mark_processed(self, event_ids: Iterable[Optional[str]]) -> None:
+        """Records event ids as processed, locally and in the shared store."""
+        ids = [event_id for event_id in event_ids if event_id]
+        if not ids:
+            return
+        self._remember(ids)
+        if self.store:
+            try:
+                self.store.add_many(ids)
+            except Exception as e:
+                logger.error(f"Failed to record processed events in store: {e}")
+
+    def _remember(self, event_ids: Iterable[str]) -> None:
+        seen = self._seen
+        for event_id in event_ids:
+            key = hash(event_id)
+            seen[key] = None
+            seen.move_to_end(key)
+        while len(seen) > self.max_entries:
+            seen.popitem(last=False)
+
+
+def create_ledger(aws_client: Optional[AWSClient] = None) -> ProcessedEventLedger:
+    """Creates the ledger configured via LEDGER_MAX_ENTRIES and LEDGER_TABLE_NAME."""
+    store: Optional[LedgerStore] = None
+    table_name = os.environ.get('LEDGER_TABLE_NAME')
+    if table_name:
+        store = DynamoDBLedgerStore(
+            table_name,
+            aws_client,
+            ttl_seconds=env_int('LEDGER_TTL_SECONDS', 86400)
+        )
+    return ProcessedEventLedger(env_int('LEDGER_MAX_ENTRIES', 10000), store)
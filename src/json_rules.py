@@ -0,0 +1,160 @@
+import re
+import json
+from typing import Any, Dict, Optional, Union
+
+# "<field> <op> <value>", e.g. "level in [ERROR, FATAL]" or "http.status >= 500"
+_RULE_RE = re.compile(r'^\s*([A-Za-z0-9_.\-@]+)\s+(not\s+in|in|==|!=|>=|<=|>|<)\s+(.+?)\s*$')
+
+_NUMERIC_OPS = {'>=', '<=', '>', '<'}
+
+
+class LazyJson:
+    """
+    Parses a log message as a JSON object at most once, and only when asked.
+    """
+    __slots__ = ('message', '_doc', '_parsed')
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+        self._doc: Optional[Dict[str, Any]] = None
+        self._parsed = False
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        if not self._parsed:
+            self._parsed = True
+            try:
+                doc = json.loads(self.message)
+                if isinstance(doc, dict):
+                    self._doc = doc
+            except ValueError:
+                pass
+        return self._doc
+
+
+def _parse_value(raw: str) -> Any:
+    """Parses a rule value: number, quoted/bare string, or [a, b] list."""
+    raw = raw.strip()
+    if raw.startswith('[') and raw.endswith(']'):
+        inner = raw[1:-1].strip()
+        return [_parse_value(v) for v in inner.split(',')] if inner else []
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in ('"', "'"):
+        return raw[1:-1]
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def _normalize(value: Any) -> Any:
+    """String comparisons are case-insensitive, like keyword filters."""
+    return value.lower() if isinstance(value, str) else value
+
+
+class FieldRule:
+    """
+    A single condition on a field of a JSON-structured log message.
+    """
+    __slots__ = ('field', 'op', 'value', 'path', 'key_literals', '_expected')
+
+    def __init__(self, field: str, op: str, value: Any) -> None:
+        op = ' '.join(op.split())
+        if op not in ('in', 'not in', '==', '!=', '>=', '<=', '>', '<'):
+            raise ValueError(f"Unsupported operator '{op}'")
+        if op in ('in', 'not in') and not isinstance(value, list):
+            raise ValueError(f"Operator '{op}' requires a list value")
+        if op in _NUMERIC_OPS and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"Operator '{op}' requires a numeric value")
+
+        self.field = field
+        self.op = op
+        self.value = value
+        self.path = field.split('.')
+        # Cheap pre-check: every path segment must appear as a quoted key
+        self.key_literals = [json.dumps(part) for part in self.path]
+        if isinstance(value, list):
+            self._expected: Any = {_normalize(v) for v in value}
+        else:
+            self._expected = _normalize(value)
+
+    def __repr__(self) -> str:
+        return f"FieldRule({self.field} {self.op} {self.value!r})"
+
+    def could_match(self, message: str) -> bool:
+        """Pre-check on the raw message before any JSON parsing."""
+        if not message.startswith('{'):
+            return False
+        for literal in self.key_literals:
+            if literal not in message:
+                return False
+        return True
+
+    def matches(self, message: str, doc: Optional[LazyJson] = None) -> bool:
+        if not self.could_match(message):
+            return False
+
+        parsed = (doc or LazyJson(message)).get()
+        if parsed is None:
+            return False
+
+        current: Any = parsed
+        for part in self.path:
+            if not isinstance(current, dict) or part not in current:
+                return False
+            current = current[part]
+
+        return self._compare(current)
+
+    def _compare(self, actual: Any) -> bool:
+        op = self.op
+        if op in _NUMERIC_OPS:
+            if isinstance(actual, bool):
+                return False
+            if isinstance(actual, str):
+                try:
+                    actual = float(actual)
+                except ValueError:
+                    return False
+            if not isinstance(actual, (int, float)):
+                return False
+            if op == '>=':
+                return actual >= self.value
+            if op == '<=':
+                return actual <= self.value
+            if op == '>':
+                return actual > self.value
+            return actual < self.value
+
+        actual = _normalize(actual)
+        if isinstance(actual, (list, dict)):
+            return op in ('!=', 'not in')
+        if op == '==':
+            return actual == self._expected
+        if op == '!=':
+            return actual != self._expected
+        if op == 'in':
+            return actual in self._expected
+        return actual not in self._expected
+
+
+def compile_field_rule(rule: Union[str, Dict[str, Any]]) -> FieldRule:
+    """
+    Compiles a rule given as "field op value" or {"field", "op", "value"}.
+    Raises ValueError for invalid rules.
+    """
+    if isinstance(rule, dict):
+        if 'field' not in rule or 'op' not in rule:
+            raise ValueError(f"Field rule requires 'field' and 'op': {rule}")
+        return FieldRule(str(rule['field']), str(rule['op']), rule.get('value'))
+
+    if not isinstance(rule, str):
+        raise ValueError(f"Field rule must be a string or object: {rule!r}")
+
+    parsed = _RULE_RE.match(rule)
+    if not parsed:
+        raise ValueError(f"Cannot parse field rule '{rule}'")
+    return FieldRule(parsed.group(1), parsed.group(2), _parse_value(parsed.group(3)))
+
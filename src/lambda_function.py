@@ -3,15 +3,30 @@ import gzip
 import base64
 import logging
 import os
-from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-JST = timezone(timedelta(hours=9))
-from src.config import ConfigLoader
+from src.config import ConfigLoader, config_change_source, env_int, is_control_event
 from src.aws_client import AWSClient
+from src.notifications import NotificationProvider
 from src.notifications.slack_webhook_provider import SlackWebhookProvider
 from src.notifications.sns_provider import SNSProvider
 from src.log_processor import LogProcessor
+from src.outbox import create_outbox, drain_outbox, make_entry
+from src.event_ledger import create_ledger
+from src.rate_rules import create_threshold_evaluator
+from src.sampling import create_sampler
+from src.profiling import sampled_profiling
+from src.models import LogEvent, Match, NotificationData, decode_log_object
+from src.payload import peek_log_source
+from src.routing import NegativeRoutingCache
+from src.circuit_breaker import create_circuit_breakers, describe_target
+from src.archive import create_archive
+from src.redaction import REDACTION_FAILED, redactor_for
+from src.context_policy import context_policy_for
+from src.latency import create_latency_recorder
+from src.rate_governor import create_logs_governor
+from src.memory_governor import DIGEST, DROP_CONTEXT, NORMAL, TRUNCATE, create_memory_governor, truncate_message
 
 # Configure logging
 class JsonFormatter(logging.Formatter):
@@ -33,30 +48,81 @@ logger.handlers = [handler]
 logger.setLevel(logging.INFO)
 
 # Initialize components (outside handler for reuse)
-aws_client = AWSClient()
+aws_client = AWSClient(create_logs_governor())
 config_loader = ConfigLoader(aws_client)
 log_processor = LogProcessor()
+# Event ids already alerted on, so Lambda retries of the same batch are not re-alerted
+ledger = create_ledger(aws_client)
+# Log streams no stream type routes, for the current config version
+unrouted_streams = NegativeRoutingCache()
+# Sliding-window counters for 'threshold' stream types, kept across warm invocations
+threshold_evaluator = create_threshold_evaluator(aws_client)
+# Bounds the matches per invocation that are notified during error storms
+sampler = create_sampler()
 
 # Initialize Providers
 slack_provider = SlackWebhookProvider()
 sns_provider = SNSProvider(aws_client)
+providers: Dict[str, NotificationProvider] = {
+    'sns': sns_provider,
+    'slack': slack_provider
+}
 
+# Failed notifications are parked here instead of failing the whole batch
+outbox = create_outbox(aws_client)
+# Every match of an invocation is archived as one compressed object
+archive = create_archive(aws_client)
+# Time-to-alert histograms per target and severity (LATENCY_METRICS)
+latency_recorder = create_latency_recorder()
+# Backfilled alerts lag by hours; they are kept out of the live time-to-alert metrics
+catch_up_latency_recorder = create_latency_recorder({'Source': 'CatchUp'})
+# Degrades notifications as the container nears its memory budget (MEMORY_BUDGET_MB)
+memory_governor = create_memory_governor()
+# Per-target circuit breakers, so a dead endpoint fails fast instead of timing out every send
+circuit_breakers = create_circuit_breakers()
+
+def _deliver(channel: str, target: str, payload: Dict[str, Any]) -> bool:
+    """Delivers a rendered payload. Returns False instead of raising on failure."""
+    breaker = circuit_breakers.get(channel, target) if circuit_breakers is not None else None
+    if breaker is not None and not breaker.allow():
+        logger.warning(f"Circuit for {describe_target(channel, target)} is open, notification not sent")
+        return False
+    try:
+        providers[channel].send_payload(target, payload)
+        delivered = True
+    except Exception as e:
+        logger.error(f"Failed to send notification via {channel}: {e}")
+        delivered = False
+    if breaker is not None:
+        breaker.record(delivered)
+    return delivered
+
+def _enqueue_failed(channel: str, target: str, payload: Dict[str, Any]) -> None:
+    """Stores a failed notification in the outbox for later redelivery."""
+    if outbox is None:
+        logger.error(f"Notification via {channel} lost: no outbox configured")
+        return
+    try:
+        outbox.put(make_entry(channel, target, payload))
+        logger.warning(f"Notification via {channel} stored in outbox for redelivery")
+    except Exception as e:
+        logger.error(f"Failed to store notification in outbox: {e}")
+
+@sampled_profiling(aws_client)
 def lambda_handler(event: Dict[str, Any], context: Any) -> None:
     """
     Main Lambda entry point.
     """
+    if is_control_event(event):
+        _handle_control_event(event)
+        return
+
+    started_ms = time.time() * 1000
     try:
-        # 1. Decode and decompress log data
+        # 1. Decode log data and find out where it comes from
         cw_data = event['awslogs']['data']
         compressed_payload = base64.b64decode(cw_data)
-        uncompressed_payload = gzip.decompress(compressed_payload)
-        payload = json.loads(uncompressed_payload)
-
-        log_group = payload['logGroup']
-        log_stream = payload['logStream']
-        log_events = payload['logEvents']
-
-        logger.info(f"Received {len(log_events)} events from {log_group}/{log_stream}")
+        source = peek_log_source(compressed_payload)
 
         # 2. Load Configuration
         try:
@@ -69,70 +135,334 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> None:
             logger.error("Configuration is empty, aborting.")
             return
 
-        # 3. Process Logs
-        matches = log_processor.process_log_batch(log_group, log_stream, log_events, config)
-        
-        if not matches:
-            logger.info("No matching events found.")
-            return
+        if source is not None:
+            # Unmonitored streams are dropped before the log events are decompressed and parsed
+            version = ConfigLoader.config_version(config)
+            if unrouted_streams.contains(version, *source):
+                return
+            if not log_processor.routes(source[0], source[1], config):
+                unrouted_streams.add(version, *source)
+                logger.info(f"No configuration found for log stream: {source[1]} in group: {source[0]}")
+                return
+
+        uncompressed_payload = gzip.decompress(compressed_payload)
+        # Log events are decoded straight into LogEvent records
+        payload = json.loads(uncompressed_payload, object_hook=decode_log_object)
+
+        log_group = payload['logGroup']
+        log_stream = payload['logStream']
+        log_events: List[LogEvent] = payload['logEvents']
+
+        logger.info(f"Received {len(log_events)} events from {log_group}/{log_stream}")
 
-        logger.info(f"Found {len(matches)} matching events.")
-
-        # 4. Handle Matches
-        for match in matches:
-            matched_event = match['event']
-            stream_config = match['config']
-            
-            # Fetch context
-            context_logs = aws_client.get_context_logs(
-                log_group, 
-                log_stream, 
-                matched_event['timestamp']
-            )
-
-            # Convert timestamps to JST
-            def to_jst_str(timestamp_ms):
-                dt = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-                return dt.astimezone(JST).strftime('%Y-%m-%d %H:%M:%S')
-
-            matched_event_jst = matched_event.copy()
-            matched_event_jst['timestamp_jst'] = to_jst_str(matched_event['timestamp'])
-            
-            context_logs_jst = []
-            for log in context_logs:
-                log_copy = log.copy()
-                log_copy['timestamp_jst'] = to_jst_str(log['timestamp'])
-                context_logs_jst.append(log_copy)
-
-            # Prepare notification data
-            aws_region = os.environ.get('AWS_REGION', 'us-east-1')
-            notification_data = {
-                'log_group': log_group,
-                'log_stream': log_stream,
-                'log_stream_type': stream_config.get('type', 'Unknown'),
-                'matched_event': matched_event_jst,
-                'context_events': context_logs_jst,
-                'aws_region': aws_region,
-                'severity': stream_config.get('severity'),
-                'mention': stream_config.get('mention')
-            }
-
-            # Send notification
-            sns_topic_arn = stream_config.get('sns_topic_arn')
-            webhook_url = stream_config.get('slack_webhook_url')
-
-            try:
-                if sns_topic_arn:
-                    logger.info(f"Sending notification via SNS to {sns_topic_arn}")
-                    sns_provider.send_notification(sns_topic_arn, notification_data)
-                elif webhook_url:
-                    logger.info("Sending notification via Slack Webhook")
-                    slack_provider.send_notification(webhook_url, notification_data)
-                else:
-                    logger.warning(f"No notification target configured for stream type {stream_config.get('type')}")
-            except Exception as e:
-                logger.error(f"Failed to send notification: {e}")
+        # 3. Process Logs and handle matches
+        process_events(log_group, log_stream, log_events, config, started_ms)
 
     except Exception as e:
         logger.error(f"Error processing logs: {e}", exc_info=True)
         raise e
+    finally:
+        _flush_archive(context)
+        _flush_latency()
+        _flush_logs_governor()
+        _flush_memory_governor()
+
+def _handle_control_event(event: Dict[str, Any]) -> None:
+    """Reloads the configuration and recompiles its rules when the config source changed."""
+    changed = config_change_source(event)
+    if changed is None:
+        logger.info("Ignoring control event that does not concern the configuration source")
+        return
+    logger.info(f"Configuration changed at {changed}, reloading")
+    ConfigLoader.invalidate()
+    log_processor.clear_caches()
+    try:
+        config_loader.load_config()
+    except Exception as e:
+        # The next log batch retries the load
+        logger.error(f"Configuration reload failed: {e}")
+
+    # The event reaches a single container; changing the function configuration
+    # retires every other warm container and its cached config
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+    if os.environ.get('CONFIG_RELOAD_ALL_CONTAINERS', 'false').lower() == 'true' and function_name:
+        try:
+            aws_client.set_function_environment_variable(function_name, 'CONFIG_GENERATION', str(int(time.time())))
+        except Exception as e:
+            logger.error(f"Failed to recycle containers after configuration change: {e}")
+
+def process_events(log_group: str, log_stream: str, log_events: List[LogEvent], config: Dict[str, Any],
+                   started_ms: Optional[float] = None, backfill: bool = False) -> int:
+    """
+    Runs decoded log events of one stream through dedup, matching, thresholds,
+    sampling and notification. Returns the number of matches handled.
+    started_ms is when handling began (epoch ms), for the latency metrics; backfill
+    marks events read back by catch-up scans, whose latency is recorded separately.
+    """
+    if started_ms is None:
+        started_ms = time.time() * 1000
+    log_events = ledger.filter_unprocessed(log_events)
+    if not log_events:
+        logger.info("All events were already processed.")
+        return 0
+
+    matches = log_processor.process_log_batch(log_group, log_stream, log_events, config)
+    # Retries on another container are caught by the shared store, looked up for matches only
+    matches = ledger.filter_matches(matches)
+    if archive is not None:
+        archive.add(matches, log_group, log_stream)
+
+    # Threshold rules only pass on the match that crosses the threshold
+    matches, counted = threshold_evaluator.evaluate(log_group, log_stream, matches)
+    if counted:
+        logger.info(f"{len(counted)} matches counted towards thresholds without notification.")
+        ledger.mark_processed(event_id for m in counted for event_id in m.event.ids)
+
+    # Repetitive matches are reduced to a few samples carrying the exact count
+    matches, dropped = sampler.sample(matches)
+    if dropped:
+        ledger.mark_processed(event_id for m in dropped for event_id in m.event.ids)
+
+    if not matches:
+        logger.info("No matching events found.")
+        return 0
+
+    logger.info(f"Found {len(matches)} matching events.")
+
+    handled_ids: List[Optional[str]] = []
+    try:
+        _handle_matches(matches, log_group, log_stream, handled_ids, started_ms, backfill)
+    finally:
+        # Record what was alerted even if a later match raised, so a retry skips it
+        ledger.mark_processed(handled_ids)
+    return len(matches)
+
+def _flush_archive(context: Any) -> None:
+    """Writes the archived matches of the invocation; a failed write never fails the batch."""
+    if archive is None:
+        return
+    try:
+        archive.flush(getattr(context, 'aws_request_id', None))
+    except Exception as e:
+        logger.error(f"Failed to write match archive: {e}")
+
+def _flush_latency() -> None:
+    """Emits the latency percentiles of the invocation."""
+    for recorder in (latency_recorder, catch_up_latency_recorder):
+        if recorder is None:
+            continue
+        try:
+            recorder.flush()
+        except Exception as e:
+            logger.error(f"Failed to emit latency metrics: {e}")
+
+def _flush_logs_governor() -> None:
+    """Emits the Logs API throttling and reduced-context counts of the invocation."""
+    if aws_client.logs_governor is None:
+        return
+    try:
+        aws_client.logs_governor.flush()
+    except Exception as e:
+        logger.error(f"Failed to emit Logs API metrics: {e}")
+
+def _flush_memory_governor() -> None:
+    """Emits the degradation counts of the invocation and resets the degradation level."""
+    if memory_governor is None:
+        return
+    try:
+        memory_governor.flush()
+    except Exception as e:
+        logger.error(f"Failed to emit memory metrics: {e}")
+
+def _handle_matches(matches: List[Match], log_group: str, log_stream: str, handled_ids: List[Optional[str]],
+                    started_ms: Optional[float] = None, backfill: bool = False) -> None:
+    """Fetches context, renders and dispatches a notification for each match."""
+    if started_ms is None:
+        started_ms = time.time() * 1000
+    for index, match in enumerate(matches):
+        level = _memory_level()
+        if level >= DIGEST:
+            # Close to the memory limit: the rest of the batch goes out as one digest per stream type
+            for digest in _digest_matches(matches[index:]):
+                _notify(digest, log_group, log_stream, handled_ids, started_ms, level, backfill)
+            return
+        _notify(match, log_group, log_stream, handled_ids, started_ms, level, backfill)
+
+def _memory_level() -> int:
+    if memory_governor is None:
+        return NORMAL
+    return memory_governor.level(archive.buffered_bytes if archive is not None else 0)
+
+def _digest_matches(matches: List[Match]) -> List[Match]:
+    """One match per stream type standing for all of its matches (and their event ids)."""
+    grouped: Dict[int, List[Match]] = {}
+    for match in matches:
+        grouped.setdefault(id(match.config), []).append(match)
+    digests = []
+    for group in grouped.values():
+        first = group[0].event
+        ids = tuple(event_id for m in group for event_id in m.event.ids)
+        event = LogEvent(first.id, first.timestamp, first.message, ids[1:], first.ingestion_time)
+        occurrences = sum(m.occurrences for m in group)
+        digests.append(Match(event, group[0].config, occurrences,
+                             f"Memory limit near: {len(group)} matches ({occurrences} occurrences) "
+                             f"summarized, showing the first"))
+        if memory_governor is not None:
+            memory_governor.record_degraded(DIGEST, len(group))
+    return digests
+
+def _notify(match: Match, log_group: str, log_stream: str, handled_ids: List[Optional[str]],
+            started_ms: float, level: int = NORMAL, backfill: bool = False) -> None:
+    """Fetches context, renders and dispatches the notification of one match."""
+    matched_event = match.event
+    stream_config = match.config
+
+    primary = _notification_target(stream_config, '')
+    if primary is None:
+        logger.warning(f"No notification target configured for stream type {stream_config.get('type')}")
+        handled_ids.extend(matched_event.ids)
+        return
+
+    channel, target = primary
+    if level >= DROP_CONTEXT:
+        context_events: List[LogEvent] = []
+    elif _may_be_sent(channel, target, stream_config):
+        # Context is fetched only now that the notification is known to go out
+        context_events = context_policy_for(stream_config).fetch(
+            aws_client, log_group, log_stream, matched_event.timestamp)
+    else:
+        # The send will be refused and the notification lost; skip the GetLogEvents call
+        context_events = []
+
+    shown_event = matched_event
+    if level >= TRUNCATE:
+        shown_event = LogEvent(matched_event.id, matched_event.timestamp, truncate_message(matched_event.message),
+                               matched_event.extra_ids, matched_event.ingestion_time)
+    if memory_governor is not None and level < DIGEST:
+        memory_governor.record_degraded(level)
+
+    # Prepare notification data (JST timestamps are formatted lazily at render time)
+    notification_data = NotificationData(
+        log_group=log_group,
+        log_stream=log_stream,
+        log_stream_type=stream_config.get('type', 'Unknown'),
+        matched_event=shown_event,
+        context_events=context_events,
+        aws_region=os.environ.get('AWS_REGION', 'us-east-1'),
+        severity=stream_config.get('severity'),
+        mention=stream_config.get('mention'),
+        summary=match.summary,
+        redactor=redactor_for(stream_config)
+    )
+
+    # Send notification
+    logger.info(f"Sending notification via {describe_target(channel, target)}")
+    try:
+        payload = providers[channel].render(notification_data)
+    except Exception as e:
+        # Fail closed: alert without the log text rather than not at all
+        logger.error(f"Failed to render notification, sending it with the log text withheld: {e}")
+        notification_data = _withheld(notification_data)
+        try:
+            payload = providers[channel].render(notification_data)
+        except Exception as e:
+            logger.error(f"Failed to render notification for events {matched_event.ids}, it is lost: {e}")
+            return
+
+    delivered_to: Optional[Tuple[str, str]] = primary
+    if not _deliver(channel, target, payload):
+        delivered_to = _deliver_fallback(stream_config, notification_data)
+    recorder = catch_up_latency_recorder if backfill else latency_recorder
+    if delivered_to is None:
+        _enqueue_failed(channel, target, payload)
+    elif recorder is not None:
+        recorder.record_delivery(describe_target(*delivered_to), stream_config.get('severity'),
+                                 matched_event.timestamp, matched_event.ingestion_time, started_ms)
+    handled_ids.extend(matched_event.ids)
+
+def _withheld(data: NotificationData) -> NotificationData:
+    """Copy of the notification data without any log text, for when rendering failed."""
+    event = data.matched_event
+    return NotificationData(
+        log_group=data.log_group,
+        log_stream=data.log_stream,
+        log_stream_type=data.log_stream_type,
+        matched_event=LogEvent(event.id, event.timestamp, REDACTION_FAILED, event.extra_ids, event.ingestion_time),
+        context_events=[],
+        aws_region=data.aws_region,
+        severity=data.severity,
+        mention=data.mention,
+        summary=data.summary
+    )
+
+def _may_be_sent(channel: str, target: str, stream_config: Dict[str, Any]) -> bool:
+    """False only if the notification would be lost anyway: open circuit, no fallback and no outbox."""
+    if circuit_breakers is None or outbox is not None or _notification_target(stream_config, 'fallback_'):
+        return True
+    return not circuit_breakers.get(channel, target).is_open()
+
+def _notification_target(stream_config: Dict[str, Any], prefix: str) -> Optional[Tuple[str, str]]:
+    """(channel, target) of a stream type; prefix 'fallback_' selects the fallback target."""
+    sns_topic_arn = stream_config.get(f'{prefix}sns_topic_arn')
+    if sns_topic_arn:
+        return 'sns', sns_topic_arn
+    webhook_url = stream_config.get(f'{prefix}slack_webhook_url')
+    if webhook_url:
+        return 'slack', webhook_url
+    return None
+
+def _deliver_fallback(stream_config: Dict[str, Any], notification_data: NotificationData) -> Optional[Tuple[str, str]]:
+    """Sends to the stream type's fallback target, if it has one. Returns the target on success."""
+    fallback = _notification_target(stream_config, 'fallback_')
+    if fallback is None:
+        return None
+    channel, target = fallback
+    logger.warning(f"Primary target failed, sending notification via fallback {describe_target(channel, target)}")
+    try:
+        payload = providers[channel].render(notification_data)
+    except Exception as e:
+        logger.error(f"Failed to render fallback notification: {e}")
+        return None
+    return fallback if _deliver(channel, target, payload) else None
+
+def drain_handler(event: Dict[str, Any], context: Any) -> Dict[str, int]:
+    """
+    Scheduled entry point that redelivers notifications stored in the outbox.
+    """
+    if outbox is None:
+        logger.warning("No outbox configured, nothing to drain.")
+        return {'delivered': 0, 'retried': 0, 'dropped': 0, 'unacked': 0}
+
+    def should_continue() -> bool:
+        # Leave room for one more delivery (the Slack timeout is 5 s) and the final acks
+        return context is None or context.get_remaining_time_in_millis() > 10000
+
+    return drain_outbox(
+        outbox,
+        _deliver,
+        batch_size=env_int('OUTBOX_DRAIN_BATCH_SIZE', 10),
+        max_attempts=env_int('OUTBOX_MAX_ATTEMPTS', 5),
+        base_delay_seconds=env_int('OUTBOX_BASE_DELAY_SECONDS', 30),
+        should_continue=should_continue
+    )
+
+def catch_up_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Entry point that backfills a missed time range:
+    {"log_groups": [...], "start_time": <ms>, "end_time": <ms>}.
+    It stops before the invocation times out; invoke it again with the same event
+    to resume from the checkpoint (CATCH_UP_CHECKPOINT, an s3://bucket/key: a re-invoke
+    may run in a fresh container, so a local file would restart the scan).
+    """
+    from src.catch_up import catch_up
+
+    checkpoint = os.environ.get('CATCH_UP_CHECKPOINT', '')
+    if not checkpoint.startswith('s3://'):
+        raise ValueError("CATCH_UP_CHECKPOINT must be an s3://bucket/key location")
+    workers = env_int('CATCH_UP_WORKERS', 4)
+
+    def should_continue() -> bool:
+        return context is None or context.get_remaining_time_in_millis() > 30000
+
+    return catch_up(event['log_groups'], int(event['start_time']), int(event['end_time']),
+                    checkpoint, workers, should_continue)
@@ -0,0 +1,116 @@
+import os
+import time
+from typing import Dict, Optional, Tuple
+from src.metrics import Metrics, emit_emf
+
+METRIC_NAMESPACE = 'CloudWatchLogMonitor/Latency'
+
+# Lags of a delivered notification, in milliseconds from the matched event's timestamp
+# (ProcessingTime is measured from handler start instead)
+INGESTION_LAG = 'IngestionLag'
+HANDLER_START_LAG = 'HandlerStartLag'
+DELIVERY_LAG = 'DeliveryLag'
+PROCESSING_TIME = 'ProcessingTime'
+STAGES = (INGESTION_LAG, HANDLER_START_LAG, DELIVERY_LAG, PROCESSING_TIME)
+
+# 2**SUB_BUCKET_BITS linear buckets per power of two: values are kept with at most
+# 1/32 (~3%) relative error, values below 64 exactly
+SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_EXACT_LIMIT = 2 * _SUB_BUCKETS
+
+
+def bucket_index(value: int) -> int:
+    if value < _EXACT_LIMIT:
+        return value
+    shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+    return _EXACT_LIMIT + (shift - 1) * _SUB_BUCKETS + ((value >> shift) - _SUB_BUCKETS)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Highest value that falls into the bucket."""
+    if index < _EXACT_LIMIT:
+        return index
+    shift = (index - _EXACT_LIMIT) // _SUB_BUCKETS + 1
+    top = (index - _EXACT_LIMIT) % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style histogram of non-negative integer values with log-linear buckets."""
+    __slots__ = ('counts', 'count', 'max')
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.max = 0
+
+    def record(self, value: float) -> None:
+        value = max(0, int(value))
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> int:
+        """Upper bound of the bucket holding the p-th percentile (0-100), capped at the maximum."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+
+class LatencyRecorder:
+    """
+    Histograms per (target, severity, stage), emitted and reset by flush().
+    dimensions are added to every document, e.g. to keep backfilled alerts apart.
+    """
+
+    def __init__(self, dimensions: Optional[Dict[str, str]] = None) -> None:
+        self.dimensions = dimensions or {}
+        self.histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+
+    def record(self, target: str, severity: str, stage: str, value_ms: float) -> None:
+        key = (target, severity, stage)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(value_ms)
+
+    def record_delivery(self, target: str, severity: Optional[str], event_timestamp: int,
+                        ingestion_time: Optional[int], handler_started_ms: float,
+                        delivered_ms: Optional[float] = None) -> None:
+        """Records the lags of one delivered notification."""
+        delivered_ms = time.time() * 1000 if delivered_ms is None else delivered_ms
+        severity = (severity or 'CRITICAL').upper()
+        if ingestion_time is not None:
+            self.record(target, severity, INGESTION_LAG, ingestion_time - event_timestamp)
+        self.record(target, severity, HANDLER_START_LAG, handler_started_ms - event_timestamp)
+        self.record(target, severity, DELIVERY_LAG, delivered_ms - event_timestamp)
+        self.record(target, severity, PROCESSING_TIME, delivered_ms - handler_started_ms)
+
+    def flush(self) -> None:
+        """One EMF document per target and severity with p50/p95/p99 of every stage."""
+        by_dimensions: Dict[Tuple[str, str], Metrics] = {}
+        for (target, severity, stage), histogram in self.histograms.items():
+            metrics = by_dimensions.setdefault((target, severity), {})
+            for p in (50, 95, 99):
+                metrics[f'{stage}P{p}'] = (histogram.percentile(p), 'Milliseconds')
+            if stage == DELIVERY_LAG:
+                metrics['DeliveredNotifications'] = (histogram.count, 'Count')
+        for (target, severity), metrics in by_dimensions.items():
+            emit_emf(METRIC_NAMESPACE, {'Target': target, 'Severity': severity, **self.dimensions}, metrics)
+        self.histograms = {}
+
+
+def create_latency_recorder(dimensions: Optional[Dict[str, str]] = None) -> Optional[LatencyRecorder]:
+    """Creates the recorder if LATENCY_METRICS is true."""
+    if os.environ.get('LATENCY_METRICS', 'false').lower() != 'true':
+        return None
+    return LatencyRecorder(dimensions)
@@ -1,19 +1,57 @@
 import re
+import json
 import logging
-from typing import List, Dict, Any, Optional, Pattern
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Dict, Any, Optional, Pattern, Sequence, Set, Tuple, Union
+from src.config import env_float, env_int
+from src.json_rules import FieldRule, LazyJson, compile_field_rule
+from src.models import LogEvent, Match
+from src.multiline import MultilineCoalescer
+from src.parallel_scan import ParallelScanner, create_parallel_scanner
+from src.regex_engine import RegexEngine
+from src.rule_stats import RuleStats
+from src.routing import RoutingIndex
 
 logger = logging.getLogger()
 
+# Joins messages in batch scan mode; filter keywords never contain it
+BATCH_SEPARATOR = '\x00'
+# Up to this many keywords, a str.find pass per keyword is faster than one regex pass
+BATCH_FIND_MAX_KEYWORDS = 12
+
 class LogProcessor:
-    def __init__(self) -> None:
+    def __init__(self, batch_scan_min_events: Optional[int] = None, rule_stats: Optional[RuleStats] = None,
+                 parallel_scanner: Optional[ParallelScanner] = None) -> None:
+        # User-supplied regexes go through re2 when available, or a budget for risky `re` patterns
+        self.regex_engine = RegexEngine()
         self._pattern_cache: Dict[str, Pattern] = {}
+        self._field_rule_cache: Dict[str, FieldRule] = {}
+        self._filter_regex_cache: Dict[Tuple[str, ...], Pattern] = {}
+        # Batches with at least this many events are scanned as one joined buffer (0 disables)
+        if batch_scan_min_events is None:
+            batch_scan_min_events = env_int('BATCH_SCAN_MIN_EVENTS', 32)
+        self.batch_scan_min_events = batch_scan_min_events
+        self._routing_index: Optional[RoutingIndex] = None
+        self._routing_config: Optional[Dict[str, Any]] = None
+        self._coalescer = MultilineCoalescer(self.regex_engine)
+        # Sampled per-rule evaluation stats (RULE_STATS_SAMPLE_EVERY, 0 disables)
+        if rule_stats is None:
+            sample_every = env_int('RULE_STATS_SAMPLE_EVERY', 0)
+            if sample_every > 0:
+                rule_stats = RuleStats(sample_every, env_float('RULE_STATS_FLUSH_SECONDS', 300))
+        self.rule_stats = rule_stats
+        # Batches of at least PARALLEL_SCAN_MIN_EVENTS are split across worker processes
+        self.parallel_scanner = parallel_scanner if parallel_scanner is not None else create_parallel_scanner()
 
-    def process_log_batch(self, log_group: str, log_stream: str, log_events: List[Dict[str, Any]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def process_log_batch(self, log_group: str, log_stream: str,
+                          log_events: Sequence[Union[LogEvent, Dict[str, Any]]],
+                          config: Dict[str, Any]) -> List[Match]:
         """
-        Processes a batch of log events.
+        Processes a batch of log events (LogEvent records or raw event dicts).
         Returns a list of matched events with their stream configuration.
         """
-        matches: List[Dict[str, Any]] = []
+        matches: List[Match] = []
         
         matching_configs = self._get_matching_configs(log_group, log_stream, config)
         if not matching_configs:
@@ -22,67 +60,206 @@ class LogProcessor:
 
         logger.info(f"Processing {len(log_events)} events for stream {log_stream} ({len(matching_configs)} matching configs)")
 
-        # Pre-compile whitelist patterns and filters for each matching config
+        if any(st_config.get('multiline') for st_config in matching_configs):
+            # Continuation lines (e.g. stack traces) are matched and alerted as one record
+            log_events = self._coalescer.coalesce(
+                [e if isinstance(e, LogEvent) else LogEvent.from_dict(e) for e in log_events],
+                matching_configs
+            )
+
+        prepared_configs = self._prepare_configs(matching_configs)
+        has_field_rules = any(prepared['field_rules'] for prepared in prepared_configs)
+
+        if self.rule_stats is not None:
+            # Outside the matching loops, which stay uninstrumented
+            self.rule_stats.observe(log_events, prepared_configs)
+            self.rule_stats.maybe_flush()
+
+        if self.parallel_scanner is not None and self.parallel_scanner.should_scan(len(log_events)):
+            events = [e if isinstance(e, LogEvent) else LogEvent.from_dict(e) for e in log_events]
+            parallel_matches = self.parallel_scanner.scan(
+                events,
+                config.get('stream_types', []),
+                matching_configs,
+                lambda chunk: self._match_events(chunk, prepared_configs, has_field_rules),
+                self.regex_engine.mark_disabled
+            )
+            if parallel_matches is not None:
+                return parallel_matches
+            log_events = events
+
+        return self._match_events(log_events, prepared_configs, has_field_rules)
+
+    def _match_events(self, log_events: Sequence[Union[LogEvent, Dict[str, Any]]],
+                      prepared_configs: List[Dict[str, Any]], has_field_rules: bool) -> List[Match]:
+        """Matches events against the prepared configs, in event order."""
+        if self.batch_scan_min_events and len(log_events) >= self.batch_scan_min_events:
+            events = [e if isinstance(e, LogEvent) else LogEvent.from_dict(e) for e in log_events]
+            batch_matches = self._scan_batch(events, prepared_configs)
+            if batch_matches is not None:
+                return batch_matches
+            log_events = events
+
+        matches: List[Match] = []
+        for raw_event in log_events:
+            event = raw_event if isinstance(raw_event, LogEvent) else LogEvent.from_dict(raw_event)
+            message = event.message
+            # Shared across configs so each message is parsed as JSON at most once
+            doc = LazyJson(message) if has_field_rules else None
+            
+            # Check against each matching configuration in order
+            for prepared in prepared_configs:
+                if self._is_match(message, prepared['filters'], prepared['whitelist_patterns'],
+                                  prepared['field_rules'], doc):
+                    matches.append(Match(event, prepared['config']))
+                    break # Stop at first matching configuration for this event
+
+        return matches
+
+    def _prepare_configs(self, stream_types: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Pre-compiles whitelist patterns and filters for each matching config."""
         prepared_configs = []
-        for st_config in matching_configs:
+        for st_config in stream_types:
             prepared_configs.append({
                 'config': st_config,
                 'whitelist_patterns': self._compile_patterns(st_config.get('whitelist', [])),
-                'filters': st_config.get('filters', [])
+                'filters': st_config.get('filters', []),
+                'field_rules': self._compile_field_rules(st_config.get('field_filters', []))
             })
+        return prepared_configs
 
-        for event in log_events:
-            message = event.get('message', '')
-            
-            # Check against each matching configuration in order
-            for prepared in prepared_configs:
-                if self._is_match(message, prepared['filters'], prepared['whitelist_patterns']):
-                    matches.append({
-                        'event': event,
-                        'config': prepared['config']
-                    })
+    def _scan_batch(self, events: List[LogEvent], prepared_configs: List[Dict[str, Any]]) -> Optional[List[Match]]:
+        """
+        Batch matching mode: all messages are joined into one buffer that is lowercased
+        once, and each config's filter keywords are searched over the whole buffer in C.
+        Hits are mapped back to events via an offset array and bisect, so the Python
+        loop and whitelist checks only run for events that were hit.
+        Returns None if the buffer cannot be scanned this way.
+        """
+        messages = [event.message for event in events]
+        buffer = BATCH_SEPARATOR.join(messages)
+        lowered = buffer.lower()
+        if len(lowered) != len(buffer):
+            # Some characters change length when lowercased, offsets would not line up
+            return None
+        # offsets[i] is where message i starts in the buffer
+        offsets = list(accumulate((len(m) + 1 for m in messages), initial=0))
+
+        keyword_hits: List[Set[int]] = []
+        field_candidates: List[Set[int]] = []
+        for prepared in prepared_configs:
+            keyword_hits.append(self._keyword_hits(prepared['filters'], lowered, offsets))
+
+            # Events that pass the cheap key-literal pre-check of any field rule
+            candidates: Set[int] = set()
+            for rule in prepared['field_rules']:
+                self._find_hits(rule.key_literals[0], buffer, offsets, candidates)
+            field_candidates.append(candidates)
+
+        hit_indices: Set[int] = set()
+        for hits in keyword_hits:
+            hit_indices |= hits
+        for candidates in field_candidates:
+            hit_indices |= candidates
+
+        matches: List[Match] = []
+        for idx in sorted(hit_indices):
+            message = messages[idx]
+            doc: Optional[LazyJson] = None
+            for i, prepared in enumerate(prepared_configs):
+                is_filtered = idx in keyword_hits[i]
+                if not is_filtered and idx in field_candidates[i]:
+                    if doc is None:
+                        doc = LazyJson(message)
+                    is_filtered = any(rule.matches(message, doc) for rule in prepared['field_rules'])
+                if is_filtered and not self._is_whitelisted(message, prepared['whitelist_patterns']):
+                    matches.append(Match(events[idx], prepared['config']))
                     break # Stop at first matching configuration for this event
 
         return matches
 
+    def _keyword_hits(self, filters: List[str], lowered: str, offsets: List[int]) -> Set[int]:
+        """Finds the events of a lowercased joined buffer that contain any filter keyword."""
+        hits: Set[int] = set()
+        if not filters:
+            return hits
+
+        keywords = list(dict.fromkeys(k.lower() for k in filters))
+        if len(keywords) > BATCH_FIND_MAX_KEYWORDS:
+            # One regex pass beats a str.find pass per keyword for long keyword lists
+            self._regex_hits(self._compile_filter_regex(keywords), lowered, offsets, hits)
+        else:
+            for keyword in keywords:
+                self._find_hits(keyword, lowered, offsets, hits)
+        return hits
+
+    def _find_hits(self, needle: str, buffer: str, offsets: List[int], hits: Set[int]) -> None:
+        """Adds the index of every event whose message contains needle."""
+        last = len(offsets) - 2
+        find = buffer.find
+        pos = find(needle)
+        while pos != -1:
+            idx = bisect_right(offsets, pos) - 1
+            hits.add(idx)
+            if idx >= last:
+                break
+            # Skip the rest of this event, one hit is enough
+            pos = find(needle, offsets[idx + 1])
+
+    def _regex_hits(self, pattern: Pattern, buffer: str, offsets: List[int], hits: Set[int]) -> None:
+        """Adds the index of every event whose message the pattern finds a match in."""
+        last = len(offsets) - 2
+        search = pattern.search
+        found = search(buffer)
+        while found:
+            idx = bisect_right(offsets, found.start()) - 1
+            hits.add(idx)
+            if idx >= last:
+                break
+            found = search(buffer, offsets[idx + 1])
+
+    def _compile_filter_regex(self, keywords: List[str]) -> Pattern:
+        """Compiles lowercased filter keywords into one alternation."""
+        key = tuple(keywords)
+        if key not in self._filter_regex_cache:
+            self._filter_regex_cache[key] = re.compile('|'.join(re.escape(k) for k in keywords))
+        return self._filter_regex_cache[key]
+
+    def clear_caches(self) -> None:
+        """Drops compiled rules and the routing index, e.g. after the configuration changed."""
+        self.regex_engine = RegexEngine()
+        self._coalescer = MultilineCoalescer(self.regex_engine)
+        self._pattern_cache = {}
+        self._field_rule_cache = {}
+        self._filter_regex_cache = {}
+        self._routing_index = None
+        self._routing_config = None
+
+    def routes(self, log_group: str, log_stream: str, config: Dict[str, Any]) -> bool:
+        """Whether any stream type matches the log stream."""
+        return bool(self._get_matching_configs(log_group, log_stream, config))
+
     def _get_matching_configs(self, log_group: str, log_stream: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Finds all matching configurations for a log stream."""
-        stream_types = config.get('stream_types', [])
-        matches = []
-        
-        for st_config in stream_types:
-            # Check log group pattern if present
-            log_group_pattern = st_config.get('log_group_pattern')
-            if log_group_pattern:
-                if log_group_pattern not in self._pattern_cache:
-                    try:
-                        self._pattern_cache[log_group_pattern] = re.compile(log_group_pattern)
-                    except re.error as e:
-                        logger.error(f"Invalid regex pattern '{log_group_pattern}': {e}")
-                        continue
-                
-                if not self._pattern_cache[log_group_pattern].search(log_group):
-                    continue
+        """Finds all matching configurations for a log stream, in config order."""
+        if config is not self._routing_config or self._routing_index is None:
+            # Built once per loaded config; ConfigLoader hands out the same object until it reloads
+            self._routing_index = RoutingIndex(
+                config.get('stream_types', []),
+                self._compile_routing_pattern,
+                classifications=config.get('_index', {}).get('routing')
+            )
+            self._routing_config = config
+        return self._routing_index.match(log_group, log_stream)
 
-            pattern_str = st_config.get('pattern')
-            if pattern_str:
-                # Cache the compiled pattern for the stream type
-                if pattern_str not in self._pattern_cache:
-                    try:
-                        self._pattern_cache[pattern_str] = re.compile(pattern_str)
-                    except re.error as e:
-                        logger.error(f"Invalid regex pattern '{pattern_str}': {e}")
-                        continue
-                
-                if not self._pattern_cache[pattern_str].search(log_stream):
-                    continue
-            elif not log_group_pattern:
-                # If neither pattern nor log_group_pattern is specified, skip to avoid matching everything by accident
-                continue
-            
-            matches.append(st_config)
-        
-        return matches
+    def _compile_routing_pattern(self, pattern: str) -> Optional[Pattern]:
+        """Compiles a log group / stream pattern, returning None if it is invalid."""
+        if pattern not in self._pattern_cache:
+            try:
+                self._pattern_cache[pattern] = self.regex_engine.compile(pattern)
+            except re.error as e:
+                logger.error(f"Invalid regex pattern '{pattern}': {e}")
+                return None
+        return self._pattern_cache[pattern]
 
     def _compile_patterns(self, patterns: List[str]) -> List[Pattern]:
         """Compiles a list of regex strings into pattern objects."""
@@ -90,15 +267,30 @@ class LogProcessor:
         for p in patterns:
             if p not in self._pattern_cache:
                 try:
-                    self._pattern_cache[p] = re.compile(p, re.IGNORECASE)
+                    self._pattern_cache[p] = self.regex_engine.compile(p, re.IGNORECASE)
                 except re.error as e:
                     logger.error(f"Invalid whitelist regex pattern '{p}': {e}")
                     continue
             compiled.append(self._pattern_cache[p])
         return compiled
 
-    def _is_match(self, message: str, filters: List[str], whitelist_patterns: List[Pattern]) -> bool:
-        """Checks if a message matches filters and does not match whitelist."""
+    def _compile_field_rules(self, rules: List[Any]) -> List[FieldRule]:
+        """Compiles JSON field rules, caching them by their definition."""
+        compiled = []
+        for rule in rules:
+            key = json.dumps(rule, sort_keys=True)
+            if key not in self._field_rule_cache:
+                try:
+                    self._field_rule_cache[key] = compile_field_rule(rule)
+                except ValueError as e:
+                    logger.error(f"Invalid field rule {rule!r}: {e}")
+                    continue
+            compiled.append(self._field_rule_cache[key])
+        return compiled
+
+    def _is_match(self, message: str, filters: List[str], whitelist_patterns: List[Pattern],
+                  field_rules: Optional[List[FieldRule]] = None, doc: Optional[LazyJson] = None) -> bool:
+        """Checks if a message matches filters or field rules and does not match whitelist."""
         # Check if message matches any filter keyword (case-insensitive)
         is_filtered = False
         message_lower = message.lower()
@@ -107,13 +299,24 @@ class LogProcessor:
             if keyword.lower() in message_lower:
                 is_filtered = True
                 break
+
+        # Check JSON field rules (pre-checked on the raw message before parsing)
+        if not is_filtered and field_rules:
+            if doc is None:
+                doc = LazyJson(message)
+            for rule in field_rules:
+                if rule.matches(message, doc):
+                    is_filtered = True
+                    break
         
         if not is_filtered:
             return False
 
-        # Check if message matches any whitelist pattern (regex)
+        return not self._is_whitelisted(message, whitelist_patterns)
+
+    def _is_whitelisted(self, message: str, whitelist_patterns: List[Pattern]) -> bool:
+        """Checks if a message matches any whitelist pattern (regex)."""
         for pattern in whitelist_patterns:
             if pattern.search(message):
-                return False # Whitelisted, so ignore
-
-        return True
+                return True # Whitelisted, so ignore
+        return False
@@ -0,0 +1,100 @@
+import os
+import logging
+from typing import Callable, Dict, Optional, Tuple
+from src.config import env_float
+from src.metrics import emit_emf
+
+logger = logging.getLogger()
+
+METRIC_NAMESPACE = 'CloudWatchLogMonitor/Memory'
+
+# Degradation levels, each including the ones below it
+NORMAL = 0
+DROP_CONTEXT = 1
+TRUNCATE = 2
+DIGEST = 3
+LEVEL_NAMES = {NORMAL: 'Normal', DROP_CONTEXT: 'DropContext', TRUNCATE: 'Truncate', DIGEST: 'Digest'}
+
+# Fractions of the budget at which each level starts
+DEFAULT_THRESHOLDS = (0.70, 0.80, 0.90)
+
+# Matched messages are cut to this many characters from TRUNCATE on
+TRUNCATED_MESSAGE_CHARS = 500
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def read_rss_bytes() -> Optional[int]:
+    """Resident set size of this process from /proc/self/statm, or None where it is unavailable."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def truncate_message(message: str, limit: int = TRUNCATED_MESSAGE_CHARS) -> str:
+    if len(message) <= limit:
+        return message
+    return message[:limit] + f"... [{len(message) - limit} characters truncated]"
+
+
+class MemoryGovernor:
+    """
+    Watches RSS plus the bytes the pipeline still has buffered (and will copy again,
+    e.g. when the archive is compressed) against a budget, and tells the notification
+    path how far to degrade. Within an invocation the level only goes up; flush()
+    emits what was degraded and starts over.
+    """
+
+    def __init__(self, budget_bytes: int, thresholds: Tuple[float, float, float] = DEFAULT_THRESHOLDS,
+                 rss_reader: Callable[[], Optional[int]] = read_rss_bytes) -> None:
+        self.budget_bytes = budget_bytes
+        self.thresholds = thresholds
+        self.rss_reader = rss_reader
+        self.current = NORMAL
+        self.peak_bytes = 0
+        self.degraded: Dict[int, int] = {}
+
+    def level(self, buffered_bytes: int = 0) -> int:
+        used = (self.rss_reader() or 0) + buffered_bytes
+        self.peak_bytes = max(self.peak_bytes, used)
+        level = NORMAL
+        for candidate, fraction in enumerate(self.thresholds, start=DROP_CONTEXT):
+            if used >= self.budget_bytes * fraction:
+                level = candidate
+        if level > self.current:
+            logger.warning(f"Memory at {used / 2**20:.1f} of {self.budget_bytes / 2**20:.0f} MiB, "
+                           f"degrading notifications to level {LEVEL_NAMES[level]}")
+            self.current = level
+        return self.current
+
+    def record_degraded(self, level: int, count: int = 1) -> None:
+        """Counts notifications (or, for DIGEST, matches) handled at a degraded level."""
+        if level > NORMAL:
+            self.degraded[level] = self.degraded.get(level, 0) + count
+
+    def flush(self) -> None:
+        """Emits the degradation counts if anything was degraded, and resets the level."""
+        degraded, peak = self.degraded, self.peak_bytes
+        self.degraded, self.peak_bytes, self.current = {}, 0, NORMAL
+        if not degraded:
+            return
+        metrics = {f'{LEVEL_NAMES[level]}Notifications': (float(degraded.get(level, 0)), 'Count')
+                   for level in (DROP_CONTEXT, TRUNCATE, DIGEST)}
+        metrics['PeakMemoryUsed'] = (float(peak), 'Bytes')
+        emit_emf(METRIC_NAMESPACE, {'Level': LEVEL_NAMES[max(degraded)]}, metrics)
+
+
+def create_memory_governor() -> Optional[MemoryGovernor]:
+    """
+    Creates the governor if MEMORY_BUDGET_MB is set (0 disables it), typically to the
+    function's memory size.
+    """
+    budget_mb = env_float('MEMORY_BUDGET_MB', 0)
+    if budget_mb <= 0:
+        return None
+    return MemoryGovernor(int(budget_mb * 2**20))
@@ -0,0 +1,36 @@
+import sys
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# (value, unit) per metric name, e.g. {'Hits': (3, 'Count')}
+Metrics = Dict[str, Tuple[float, str]]
+
+
+def emf_document(namespace: str, dimensions: Dict[str, str], metrics: Metrics,
+                 properties: Optional[Dict[str, Any]] = None, timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+    """Builds a CloudWatch Embedded Metric Format document."""
+    document: Dict[str, Any] = {
+        '_aws': {
+            'Timestamp': timestamp_ms if timestamp_ms is not None else int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in metrics.items()]
+            }]
+        }
+    }
+    document.update(properties or {})
+    document.update(dimensions)
+    document.update({name: value for name, (value, _) in metrics.items()})
+    return document
+
+
+def emit_emf(namespace: str, dimensions: Dict[str, str], metrics: Metrics,
+             properties: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Writes an EMF document straight to stdout; CloudWatch extracts the metrics
+    from the Lambda log stream. It bypasses the JSON logger, which would wrap it.
+    """
+    sys.stdout.write(json.dumps(emf_document(namespace, dimensions, metrics, properties)) + '\n')
+    sys.stdout.flush()
@@ -0,0 +1,135 @@
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+JST = timezone(timedelta(hours=9))
+
+
+def to_jst_str(timestamp_ms: int) -> str:
+    """Formats an epoch millisecond timestamp as a JST date-time string."""
+    dt = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    return dt.astimezone(JST).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class LogEvent:
+    """
+    A single CloudWatch log event.
+    The JST timestamp is only formatted when a notification is rendered.
+    extra_ids holds the ids of continuation lines coalesced into this event.
+    ingestion_time is only known for events read back with FilterLogEvents; subscription
+    payloads do not carry it.
+    """
+    __slots__ = ('id', 'timestamp', 'message', 'extra_ids', 'ingestion_time', '_timestamp_jst')
+
+    def __init__(self, id: Optional[str], timestamp: int, message: str,
+                 extra_ids: Tuple[Optional[str], ...] = (), ingestion_time: Optional[int] = None) -> None:
+        self.id = id
+        self.timestamp = timestamp
+        self.message = message
+        self.extra_ids = extra_ids
+        self.ingestion_time = ingestion_time
+        self._timestamp_jst: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LogEvent':
+        event = cls(data.get('id'), data.get('timestamp', 0), data.get('message', ''))
+        if data.get('timestamp_jst'):
+            event._timestamp_jst = data['timestamp_jst']
+        return event
+
+    @property
+    def ids(self) -> Tuple[Optional[str], ...]:
+        """Ids of every CloudWatch event this event stands for."""
+        return (self.id,) + self.extra_ids
+
+    @property
+    def timestamp_jst(self) -> str:
+        if self._timestamp_jst is None:
+            self._timestamp_jst = to_jst_str(self.timestamp)
+        return self._timestamp_jst
+
+    def __repr__(self) -> str:
+        return f"LogEvent(id={self.id!r}, timestamp={self.timestamp!r}, message={self.message!r})"
+
+
+def decode_log_object(obj: Dict[str, Any]) -> Any:
+    """
+    json.loads object_hook that turns log event objects into LogEvent records
+    while the payload is parsed, so the per-event dicts are released right away.
+    """
+    if 'message' in obj and 'timestamp' in obj and 'id' in obj:
+        return LogEvent(obj['id'], obj['timestamp'], obj['message'])
+    return obj
+
+
+class Match:
+    """
+    A log event that matched a stream type configuration.
+    summary describes what the match stands for when it represents more than one
+    occurrence (e.g. a threshold crossing).
+    """
+    __slots__ = ('event', 'config', 'occurrences', 'summary')
+
+    def __init__(self, event: LogEvent, config: Dict[str, Any], occurrences: int = 1,
+                 summary: Optional[str] = None) -> None:
+        self.event = event
+        self.config = config
+        self.occurrences = occurrences
+        self.summary = summary
+
+    def __repr__(self) -> str:
+        return f"Match(type={self.config.get('type')!r}, event={self.event!r})"
+
+
+class NotificationData:
+    """
+    Everything a notification provider needs to render an alert.
+    redactor (see src/redaction.py) is applied by the providers to the log text they send.
+    """
+    __slots__ = ('log_group', 'log_stream', 'log_stream_type', 'matched_event', 'context_events',
+                 'aws_region', 'severity', 'mention', 'summary', 'redactor')
+
+    def __init__(self,
+                 log_group: str,
+                 log_stream: str,
+                 log_stream_type: str,
+                 matched_event: LogEvent,
+                 context_events: List[LogEvent],
+                 aws_region: str = 'us-east-1',
+                 severity: Optional[str] = None,
+                 mention: Optional[str] = None,
+                 summary: Optional[str] = None,
+                 redactor: Optional[Any] = None) -> None:
+        self.log_group = log_group
+        self.log_stream = log_stream
+        self.log_stream_type = log_stream_type
+        self.matched_event = matched_event
+        self.context_events = context_events
+        self.aws_region = aws_region
+        self.severity = severity
+        self.mention = mention
+        self.summary = summary
+        self.redactor = redactor
+
+    def redact(self, text: str) -> str:
+        return self.redactor.redact(text) if self.redactor is not None else text
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'NotificationData':
+        matched_event = data.get('matched_event') or {}
+        return cls(
+            log_group=data.get('log_group', ''),
+            log_stream=data.get('log_stream', ''),
+            log_stream_type=data.get('log_stream_type', 'Unknown'),
+            matched_event=matched_event if isinstance(matched_event, LogEvent) else LogEvent.from_dict(matched_event),
+            context_events=[e if isinstance(e, LogEvent) else LogEvent.from_dict(e)
+                            for e in data.get('context_events', [])],
+            aws_region=data.get('aws_region', 'us-east-1'),
+            severity=data.get('severity'),
+            mention=data.get('mention'),
+            summary=data.get('summary')
+        )
+
+    @classmethod
+    def coerce(cls, data: Any) -> 'NotificationData':
+        """Accepts either a NotificationData or the equivalent plain dict."""
+        return data if isinstance(data, cls) else cls.from_dict(data)
@@ -0,0 +1,93 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Pattern, Sequence
+from src.models import LogEvent
+from src.regex_engine import RegexEngine
+
+logger = logging.getLogger()
+
+DEFAULT_MAX_LINES = 200
+
+
+def coalesce_events(events: Sequence[LogEvent], start_pattern: Pattern, max_lines: int = DEFAULT_MAX_LINES) -> List[LogEvent]:
+    """
+    Joins continuation lines into logical records in one pass.
+    A record starts at every event whose message matches start_pattern (re.match) and
+    absorbs the following events that do not, up to max_lines lines. The record keeps
+    the first line's id and timestamp; the other ids go to extra_ids.
+    A batch that begins with continuation lines starts a record with them.
+    """
+    records: List[LogEvent] = []
+    head: Optional[LogEvent] = None
+    lines: List[str] = []
+    ids: List[Optional[str]] = []
+
+    def flush() -> None:
+        if head is None:
+            return
+        if len(lines) == 1:
+            records.append(head)
+        else:
+            records.append(LogEvent(head.id, head.timestamp, '\n'.join(lines), tuple(ids), head.ingestion_time))
+
+    for event in events:
+        if head is None or len(lines) >= max_lines or start_pattern.match(event.message):
+            flush()
+            head = event
+            lines = [event.message.rstrip('\n')]
+            ids = list(event.extra_ids)
+        else:
+            lines.append(event.message.rstrip('\n'))
+            ids.extend(event.ids)
+    flush()
+    return records
+
+
+class MultilineCoalescer:
+    """
+    Applies the 'multiline' setting of stream types, e.g.
+    {"start_pattern": "^\\d{4}-\\d{2}-\\d{2}", "max_lines": 200}.
+    The first matching stream type with a multiline setting decides how a
+    log stream is split into records. Start patterns are compiled by regex_engine,
+    like the other user-supplied regexes.
+    """
+
+    def __init__(self, regex_engine: Optional[RegexEngine] = None) -> None:
+        self.regex_engine = regex_engine or RegexEngine()
+        self._pattern_cache: Dict[str, Optional[Pattern]] = {}
+
+    def coalesce(self, events: Sequence[LogEvent], stream_types: Sequence[Dict[str, Any]]) -> Sequence[LogEvent]:
+        for st_config in stream_types:
+            multiline = st_config.get('multiline')
+            if not multiline:
+                continue
+            start_pattern = self._compile(multiline.get('start_pattern', ''))
+            if start_pattern is None:
+                return events
+            records = coalesce_events(events, start_pattern, self._max_lines(multiline))
+            if len(records) != len(events):
+                logger.info(f"Coalesced {len(events)} events into {len(records)} records")
+            return records
+        return events
+
+    def _compile(self, pattern: str) -> Optional[Pattern]:
+        if pattern not in self._pattern_cache:
+            compiled = None
+            if pattern:
+                try:
+                    compiled = self.regex_engine.compile(pattern)
+                except re.error as e:
+                    logger.error(f"Invalid multiline start_pattern '{pattern}': {e}")
+            else:
+                logger.error("multiline setting requires a start_pattern")
+            self._pattern_cache[pattern] = compiled
+        return self._pattern_cache[pattern]
+
+    @staticmethod
+    def _max_lines(multiline: Dict[str, Any]) -> int:
+        value = multiline.get('max_lines', DEFAULT_MAX_LINES)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            logger.error(f"Invalid multiline max_lines {value!r}, using {DEFAULT_MAX_LINES}")
+            return DEFAULT_MAX_LINES
@@ -1,13 +1,55 @@
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from abc import ABC, abstractmethod
+from src.models import NotificationData
+
+
+def render_context(data: NotificationData, limit: int) -> str:
+    """
+    Context lines as '[time] message' lines, keeping the last `limit` characters.
+    Lines are built newest first and only until the limit is reached, so lines that
+    are cut off are never formatted or redacted.
+    """
+    lines = []
+    total = 0
+    for event in reversed(data.context_events):
+        line = f"[{event.timestamp_jst}] {data.redact(event.message)}\n"
+        lines.append(line)
+        total += len(line)
+        if total > limit:
+            break
+    context_text = ''.join(reversed(lines))
+    if total > limit:
+        context_text = "... (truncated)\n" + context_text[-limit:]
+    return context_text
+
+
+class DeliveryError(Exception):
+    """Raised by send_payload when the target rejected a notification."""
+
 
 class NotificationProvider(ABC):
     @abstractmethod
-    def send_notification(self, target: str, data: Dict[str, Any]) -> None:
+    def send_notification(self, target: str, data: Union[NotificationData, Dict[str, Any]]) -> None:
         """
         Sends a notification to the target.
         :param target: The destination (URL, ARN, etc.)
-        :param data: The data dictionary containing log info.
+        :param data: The notification data (or equivalent dictionary) containing log info.
         :return: Boolean success status.
         """
         pass
+
+    @abstractmethod
+    def render(self, data: Union[NotificationData, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Renders the notification data into the provider specific payload.
+        The rendered payload is what gets stored in the outbox on delivery failure.
+        """
+        pass
+
+    @abstractmethod
+    def send_payload(self, target: str, payload: Dict[str, Any]) -> None:
+        """
+        Delivers an already rendered payload to the target.
+        Raises on failure (DeliveryError or the client's own exception).
+        """
+        pass
@@ -1,53 +1,58 @@
 import json
 import logging
 import requests
-from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 
 logger = logging.getLogger()
 
-from src.notifications import NotificationProvider
+from src.notifications import DeliveryError, NotificationProvider, render_context
+from src.models import NotificationData
 
 class SlackWebhookProvider(NotificationProvider):
-    def send_notification(self, webhook_url: str, notification_data: Dict[str, Any]) -> bool:
+    def send_notification(self, webhook_url: str, notification_data: Union[NotificationData, Dict[str, Any]]) -> bool:
         """Sends a formatted notification to Slack."""
         if not webhook_url:
             logger.error("No Slack webhook URL provided")
             return False
 
         payload = self._build_payload(notification_data)
-        
         try:
-            response = requests.post(
-                webhook_url,
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'},
-                timeout=5
-            )
-            if response.status_code != 200:
-                logger.error(f"Failed to send Slack notification: {response.status_code} {response.text}")
-                return False
+            self.send_payload(webhook_url, payload)
             return True
-        except requests.RequestException as e:
+        except (DeliveryError, requests.RequestException) as e:
             logger.error(f"Error sending Slack notification: {e}")
             return False
 
-    def _build_payload(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def render(self, notification_data: Union[NotificationData, Dict[str, Any]]) -> Dict[str, Any]:
+        """Renders the Slack payload without sending it."""
+        return self._build_payload(notification_data)
+
+    def send_payload(self, webhook_url: str, payload: Dict[str, Any]) -> None:
+        """
+        Posts an already rendered payload to Slack.
+        Raises DeliveryError on a non-200 response and RequestException on connection errors.
+        """
+        response = requests.post(
+            webhook_url,
+            data=json.dumps(payload),
+            headers={'Content-Type': 'application/json'},
+            timeout=5
+        )
+        if response.status_code != 200:
+            raise DeliveryError(f"Slack responded {response.status_code} {response.text}")
+
+    def _build_payload(self, data: Union[NotificationData, Dict[str, Any]]) -> Dict[str, Any]:
         """Builds the Slack Block Kit payload."""
-        log_group = data.get('log_group')
-        log_stream = data.get('log_stream')
-        stream_type = data.get('log_stream_type')
-        matched_event = data.get('matched_event', {})
-        context_events = data.get('context_events', [])
-        aws_region = data.get('aws_region', 'us-east-1')
+        data = NotificationData.coerce(data)
+        log_group = data.log_group
+        log_stream = data.log_stream
+        stream_type = data.log_stream_type
+        matched_event = data.matched_event
+        context_events = data.context_events
+        aws_region = data.aws_region
 
         # Format timestamp
-        ts = matched_event.get('timestamp', 0) / 1000
-        time_str = matched_event.get('timestamp_jst')
-        if not time_str:
-            time_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S UTC')
-        else:
-            time_str += " (JST)"
+        time_str = matched_event.timestamp_jst + " (JST)"
 
         # Generate CloudWatch Logs URL (compact format)
         # URL encode the log group and stream names
@@ -62,8 +67,8 @@ class SlackWebhookProvider(NotificationProvider):
             f"log-events/{encoded_log_stream}"
         )
 
-        severity = data.get('severity')
-        mention = data.get('mention')
+        severity = data.severity
+        mention = data.mention
         
         # Map severity to emoji
         emoji = ":rotating_light:"
@@ -118,6 +123,14 @@ class SlackWebhookProvider(NotificationProvider):
                 }
             ]
         })
+        if data.summary:
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*{data.summary}*"
+                }
+            })
         blocks.append({
             "type": "section",
             "text": {
@@ -139,23 +152,13 @@ class SlackWebhookProvider(NotificationProvider):
             "type": "section",
             "text": {
                 "type": "mrkdwn",
-                "text": f"```{matched_event.get('message', '')}```"
+                "text": f"```{data.redact(matched_event.message)}```"
             }
         })
 
         if context_events:
-            context_text = ""
-            for event in context_events:
-                # Format each context line
-                evt_ts = event.get('timestamp_jst')
-                if not evt_ts:
-                    evt_ts = datetime.fromtimestamp(event.get('timestamp', 0) / 1000).strftime('%H:%M:%S')
-                
-                context_text += f"[{evt_ts}] {event.get('message', '')}\n"
-            
-            # Truncate if too long (Slack block limit is 3000 chars)
-            if len(context_text) > 2900:
-                context_text = "... (truncated)\n" + context_text[-2900:]
+            # Truncated to the last 2900 chars (Slack block limit is 3000 chars)
+            context_text = render_context(data, 2900)
 
             blocks.append({
                 "type": "section",
@@ -1,8 +1,8 @@
 import json
 import logging
-from datetime import datetime
-from typing import Dict, Any, Optional
-from src.notifications import NotificationProvider
+from typing import Dict, Any, Optional, Union
+from src.notifications import NotificationProvider, render_context
+from src.models import NotificationData
 from src.aws_client import AWSClient
 
 logger = logging.getLogger()
@@ -11,7 +11,7 @@ class SNSProvider(NotificationProvider):
     def __init__(self, aws_client: Optional[AWSClient] = None) -> None:
         self.aws_client = aws_client or AWSClient()
 
-    def send_notification(self, target_arn: str, data: Dict[str, Any]) -> None:
+    def send_notification(self, target_arn: str, data: Union[NotificationData, Dict[str, Any]]) -> None:
         """
         Sends an AWS Chatbot compatible message to SNS.
         Raises ClientError on failure.
@@ -21,22 +21,31 @@ class SNSProvider(NotificationProvider):
             raise ValueError("No SNS Topic ARN provided")
 
         message = self._build_chatbot_payload(data)
-        self.aws_client.publish_sns_message(target_arn, json.dumps(message))
+        self.send_payload(target_arn, message)
 
-    def _build_chatbot_payload(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def render(self, data: Union[NotificationData, Dict[str, Any]]) -> Dict[str, Any]:
+        """Renders the Chatbot payload without publishing it."""
+        return self._build_chatbot_payload(data)
+
+    def send_payload(self, target_arn: str, payload: Dict[str, Any]) -> None:
+        """
+        Publishes an already rendered payload to SNS.
+        Raises ClientError on failure.
+        """
+        self.aws_client.publish_sns_message(target_arn, json.dumps(payload))
+
+    def _build_chatbot_payload(self, data: Union[NotificationData, Dict[str, Any]]) -> Dict[str, Any]:
         """Builds the AWS Chatbot Custom Notification payload."""
-        log_group = data.get('log_group')
-        log_stream = data.get('log_stream')
-        stream_type = data.get('log_stream_type')
-        matched_event = data.get('matched_event', {})
-        context_events = data.get('context_events', [])
-        aws_region = data.get('aws_region', 'us-east-1')
+        data = NotificationData.coerce(data)
+        log_group = data.log_group
+        log_stream = data.log_stream
+        stream_type = data.log_stream_type
+        matched_event = data.matched_event
+        context_events = data.context_events
+        aws_region = data.aws_region
 
-        # Use JST timestamp if available, otherwise fallback (though JST should be there)
-        time_str = matched_event.get('timestamp_jst')
-        if not time_str:
-            ts = matched_event.get('timestamp', 0) / 1000
-            time_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S UTC')
+        # JST timestamps are formatted lazily by the event record
+        time_str = matched_event.timestamp_jst
 
         # Generate CloudWatch Logs URL (compact format)
         import urllib.parse
@@ -54,33 +63,21 @@ class SNSProvider(NotificationProvider):
         
         # Add severity emoji to title mapping (handled in _map_severity_emoji called later or here?)
         # Let's use the severity for the title emoji
-        emoji = self._map_severity_emoji(data.get('severity'))
+        emoji = self._map_severity_emoji(data.severity)
         
-        mention = data.get('mention')
+        mention = data.mention
         description = ""
         if mention:
              description += f"{mention}\n\n"
 
         description += f"*Log Group:* {log_group}\n*Log Stream:* {log_stream}\n*Time:* {time_str} (JST)\n\n"
+        if data.summary:
+            description += f"*{data.summary}*\n\n"
         description += f"[🔍 View in CloudWatch Logs]({cloudwatch_url})\n\n"
-        description += f"*Matched Event:*\n```\n{matched_event.get('message', '')}\n```\n\n"
+        description += f"*Matched Event:*\n```\n{data.redact(matched_event.message)}\n```\n\n"
 
         if context_events:
-            context_text = ""
-            for event in context_events:
-                evt_ts = event.get('timestamp_jst')
-                if not evt_ts:
-                     evt_ts = datetime.fromtimestamp(event.get('timestamp', 0) / 1000).strftime('%H:%M:%S')
-                else:
-                    # Extract time part only for context to keep it compact, or use full?
-                    # Let's use full to be safe and explicit about JST
-                    pass
-
-                context_text += f"[{evt_ts}] {event.get('message', '')}\n"
-            
-            if len(context_text) > 2000:
-                context_text = "... (truncated)\n" + context_text[-2000:]
-            
+            context_text = render_context(data, 2000)
             description += f"*Context:*\n```\n{context_text}\n```"
 
         return {
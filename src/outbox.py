@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.aws_client import AWSClient
+
+logger = logging.getLogger()
+
+# (channel, target, payload) -> delivered?
+DeliverFunc = Callable[[str, str, Dict[str, Any]], bool]
+
+
+def make_entry(channel: str, target: str, payload: Dict[str, Any], attempts: int = 0) -> Dict[str, Any]:
+    """Builds an outbox entry for a rendered notification."""
+    return {
+        'channel': channel,
+        'target': target,
+        'payload': payload,
+        'attempts': attempts
+    }
+
+
+class NotificationOutbox(ABC):
+    """
+    Durable store for rendered notifications whose delivery failed.
+    Entries are redelivered later by drain_outbox instead of retrying the whole log batch.
+    """
+
+    @abstractmethod
+    def put(self, entry: Dict[str, Any], delay_seconds: int = 0) -> None:
+        """Stores an entry, hidden from receive() for delay_seconds."""
+        pass
+
+    @abstractmethod
+    def receive(self, max_entries: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns up to max_entries (handle, entry) pairs that are due for delivery."""
+        pass
+
+    @abstractmethod
+    def ack(self, handles: List[str]) -> List[str]:
+        """Removes the entries identified by handles. Returns the handles that could not be removed."""
+        pass
+
+
+class SQSOutbox(NotificationOutbox):
+    # SQS caps DelaySeconds at 15 minutes
+    MAX_DELAY_SECONDS = 900
+
+    def __init__(self, queue_url: str, aws_client: Optional[AWSClient] = None) -> None:
+        self.queue_url = queue_url
+        self.aws_client = aws_client or AWSClient()
+
+    def put(self, entry: Dict[str, Any], delay_seconds: int = 0) -> None:
+        delay = max(0, min(int(delay_seconds), self.MAX_DELAY_SECONDS))
+        self.aws_client.send_sqs_message(self.queue_url, json.dumps(entry), delay)
+
+    def receive(self, max_entries: int) -> List[Tuple[str, Dict[str, Any]]]:
+        received = []
+        for message in self.aws_client.receive_sqs_messages(self.queue_url, max_entries):
+            try:
+                entry = json.loads(message['Body'])
+            except (KeyError, json.JSONDecodeError) as e:
+                logger.error(f"Dropping malformed outbox message {message.get('MessageId')}: {e}")
+                self.aws_client.delete_sqs_messages(self.queue_url, [message['ReceiptHandle']])
+                continue
+            received.append((message['ReceiptHandle'], entry))
+        return received
+
+    def ack(self, handles: List[str]) -> List[str]:
+        if not handles:
+            return []
+        return self.aws_client.delete_sqs_messages(self.queue_url, handles)
+
+
+class SQLiteOutbox(NotificationOutbox):
+    """
+    Local stand-in for the SQS outbox, backed by a single SQLite file.
+    Received entries are leased for lease_seconds so a crashed drain does not lose them.
+    """
+
+    def __init__(self, path: str, lease_seconds: int = 300) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id TEXT PRIMARY KEY, "
+            "available_at REAL NOT NULL, "
+            "body TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def put(self, entry: Dict[str, Any], delay_seconds: int = 0) -> None:
+        self._conn.execute(
+            "INSERT INTO outbox (id, available_at, body) VALUES (?, ?, ?)",
+            (uuid.uuid4().hex, time.time() + max(0, delay_seconds), json.dumps(entry))
+        )
+        self._conn.commit()
+
+    def receive(self, max_entries: int) -> List[Tuple[str, Dict[str, Any]]]:
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT id, body FROM outbox WHERE available_at <= ? ORDER BY available_at LIMIT ?",
+            (now, max_entries)
+        ).fetchall()
+        if not rows:
+            return []
+
+        self._conn.executemany(
+            "UPDATE outbox SET available_at = ? WHERE id = ?",
+            [(now + self.lease_seconds, row[0]) for row in rows]
+        )
+        self._conn.commit()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def ack(self, handles: List[str]) -> List[str]:
+        if not handles:
+            return []
+        self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(h,) for h in handles])
+        self._conn.commit()
+        return []
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+
+def create_outbox(aws_client: Optional[AWSClient] = None) -> Optional[NotificationOutbox]:
+    """Creates the outbox configured via OUTBOX_TYPE (SQS, SQLITE or NONE)."""
+    outbox_type = os.environ.get('OUTBOX_TYPE', 'NONE').upper()
+
+    if outbox_type == 'SQS':
+        queue_url = os.environ.get('OUTBOX_QUEUE_URL')
+        if not queue_url:
+            raise ValueError("OUTBOX_QUEUE_URL environment variable is required for SQS outbox")
+        return SQSOutbox(queue_url, aws_client)
+
+    if outbox_type == 'SQLITE':
+        return SQLiteOutbox(os.environ.get('OUTBOX_PATH', '/tmp/notification_outbox.db'))
+
+    return None
+
+
+def backoff_delay(attempts: int, base_delay_seconds: int, max_delay_seconds: int) -> int:
+    """Exponential backoff delay for the given number of failed attempts."""
+    return min(base_delay_seconds * (2 ** max(0, attempts - 1)), max_delay_seconds)
+
+
+def drain_outbox(outbox: NotificationOutbox,
+                 deliver: DeliverFunc,
+                 batch_size: int = 10,
+                 max_batches: int = 50,
+                 max_attempts: int = 5,
+                 base_delay_seconds: int = 30,
+                 max_delay_seconds: int = 900,
+                 should_continue: Callable[[], bool] = lambda: True) -> Dict[str, int]:
+    """
+    Redelivers stored notifications in batches.
+    Failed entries are stored again with an exponential backoff delay and dropped
+    after max_attempts. Each entry is acked as soon as it is delivered or stored
+    again, so an interrupted drain neither resends delivered entries nor leaves a
+    failed entry behind next to its re-queued copy. No entry is started once
+    should_continue() returns False; entries received but not started reappear
+    after the visibility timeout with their attempts unchanged.
+    Returns counters for delivered, retried, dropped and unacked entries.
+    """
+    stats = {'delivered': 0, 'retried': 0, 'dropped': 0, 'unacked': 0}
+    unacked: List[str] = []
+
+    for _ in range(max_batches):
+        if not should_continue():
+            break
+        batch = outbox.receive(batch_size)
+        if not batch:
+            break
+
+        for handle, entry in batch:
+            if not should_continue():
+                logger.warning("Stopping outbox drain before the invocation times out")
+                break
+            channel = entry.get('channel', '')
+            target = entry.get('target', '')
+            if deliver(channel, target, entry.get('payload', {})):
+                stats['delivered'] += 1
+            else:
+                attempts = int(entry.get('attempts', 0)) + 1
+                if attempts >= max_attempts:
+                    logger.error(f"Dropping notification to {channel} after {attempts} failed attempts")
+                    stats['dropped'] += 1
+                else:
+                    delay = backoff_delay(attempts, base_delay_seconds, max_delay_seconds)
+                    outbox.put(make_entry(channel, target, entry.get('payload', {}), attempts), delay)
+                    stats['retried'] += 1
+            unacked.extend(outbox.ack([handle]))
+
+    if unacked:
+        # One more try; entries still not removed will be received (and delivered) again
+        unacked = outbox.ack(unacked)
+        stats['unacked'] = len(unacked)
+        if unacked:
+            logger.error(f"{len(unacked)} outbox entries could not be removed and will be processed again")
+
+    logger.info(f"Outbox drain finished: {stats}")
+    return stats
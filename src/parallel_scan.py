@@ -0,0 +1,167 @@
+import os
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from src.config import env_int
+from src.models import LogEvent, Match
+from src.regex_engine import PatternKey
+
+logger = logging.getLogger()
+
+# (events of a chunk) -> matches, evaluated in the calling process
+LocalMatcher = Callable[[List[LogEvent]], List[Match]]
+
+
+def _worker_main(conn: Connection, inherited: List[Connection]) -> None:
+    """
+    Worker loop. Keeps the stream types of the current config and its compiled rules
+    (in its own LogProcessor caches) across scans; only messages travel per call.
+    Replies to each chunk with its (event index, stream type index) pairs and the
+    (pattern, flags) of the regexes this worker has disabled for exceeding their budget.
+    """
+    from src.log_processor import LogProcessor
+
+    # Parent-side ends copied by fork; holding them would hide EOF from other workers
+    for other in inherited:
+        other.close()
+
+    processor = LogProcessor()
+    processor.rule_stats = None
+    processor.parallel_scanner = None
+    stream_types: List[Dict[str, Any]] = []
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        kind = message[0]
+        if kind == 'config':
+            stream_types = message[1]
+        elif kind == 'scan':
+            _, st_indices, messages = message
+            configs = [stream_types[i] for i in st_indices]
+            prepared = processor._prepare_configs(configs)
+            has_field_rules = any(p['field_rules'] for p in prepared)
+            events = [LogEvent(None, 0, m) for m in messages]
+            event_index = {id(e): i for i, e in enumerate(events)}
+            config_index = {id(c): i for c, i in zip(configs, st_indices)}
+            matches = processor._match_events(events, prepared, has_field_rules)
+            conn.send(([(event_index[id(m.event)], config_index[id(m.config)]) for m in matches],
+                       processor.regex_engine.disabled_keys()))
+        else:
+            return
+
+
+class ParallelScanner:
+    """
+    Matches large batches on a warm pool of forked worker processes.
+    Workers talk over Pipes (Lambda has no /dev/shm, so multiprocessing.Pool and
+    Queue are not available). The config is sent to a worker once per config
+    object; each scan ships only the messages of one chunk. The calling process
+    matches the last chunk itself and results are merged in event order.
+    Regexes a worker disabled are passed to on_disabled, so the calling process
+    stops evaluating them too.
+    """
+
+    def __init__(self, workers: int, min_events: int) -> None:
+        self.workers = workers
+        self.min_events = min_events
+        self._conns: List[Connection] = []
+        self._processes: List[Any] = []
+        self._stream_types: Optional[List[Dict[str, Any]]] = None
+        self._index_of: Dict[int, int] = {}
+
+    def should_scan(self, event_count: int) -> bool:
+        return self.workers > 0 and event_count >= self.min_events
+
+    def scan(self, events: List[LogEvent], stream_types: List[Dict[str, Any]],
+             matching_configs: Sequence[Dict[str, Any]], match_local: LocalMatcher,
+             on_disabled: Optional[Callable[[List[PatternKey]], None]] = None) -> Optional[List[Match]]:
+        """Returns the matches in event order, or None if the pool is unavailable."""
+        if not self._ensure_started():
+            return None
+        try:
+            if stream_types is not self._stream_types:
+                for conn in self._conns:
+                    conn.send(('config', stream_types))
+                self._stream_types = stream_types
+                self._index_of = {id(st): i for i, st in enumerate(stream_types)}
+            st_indices = [self._index_of[id(c)] for c in matching_configs]
+
+            parts = min(len(self._conns) + 1, len(events))
+            size = -(-len(events) // parts)
+            offsets = list(range(0, len(events), size))
+            remote = list(zip(self._conns, offsets[:-1]))
+            for conn, offset in remote:
+                conn.send(('scan', st_indices, [e.message for e in events[offset:offset + size]]))
+
+            local_matches = match_local(events[offsets[-1]:])
+
+            matches: List[Match] = []
+            disabled: List[PatternKey] = []
+            for conn, offset in remote:
+                pairs, worker_disabled = conn.recv()
+                for event_idx, st_idx in pairs:
+                    matches.append(Match(events[offset + event_idx], stream_types[st_idx]))
+                disabled.extend(worker_disabled)
+            matches.extend(local_matches)
+            if disabled and on_disabled is not None:
+                on_disabled(disabled)
+            return matches
+        except (EOFError, OSError) as e:
+            logger.error(f"Parallel scan failed, falling back to serial matching: {e}")
+            self.close()
+            return None
+        except BaseException:
+            # Replies may still be in flight; start over with fresh workers next time
+            self.close()
+            raise
+
+    def _ensure_started(self) -> bool:
+        if self._conns and all(p.is_alive() for p in self._processes):
+            return True
+        self.close()
+        try:
+            ctx = multiprocessing.get_context('fork')
+            for _ in range(self.workers):
+                parent_conn, child_conn = ctx.Pipe()
+                process = ctx.Process(target=_worker_main, args=(child_conn, self._conns + [parent_conn]), daemon=True)
+                process.start()
+                child_conn.close()
+                self._conns.append(parent_conn)
+                self._processes.append(process)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not start parallel scan workers: {e}")
+            self.close()
+            self.workers = 0
+            return False
+        return True
+
+    def close(self) -> None:
+        for conn in self._conns:
+            try:
+                conn.close()
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self._conns = []
+        self._processes = []
+        self._stream_types = None
+
+
+def create_parallel_scanner() -> Optional[ParallelScanner]:
+    """
+    Creates the scanner if PARALLEL_SCAN_MIN_EVENTS is set. PARALLEL_SCAN_WORKERS
+    defaults to one less than the number of CPUs (the caller scans a chunk too).
+    """
+    min_events = env_int('PARALLEL_SCAN_MIN_EVENTS', 0)
+    if min_events <= 0:
+        return None
+    workers = env_int('PARALLEL_SCAN_WORKERS', max(0, (os.cpu_count() or 1) - 1))
+    if workers <= 0:
+        return None
+    return ParallelScanner(workers, min_events)
@@ -0,0 +1,35 @@
+import re
+import zlib
+import json
+from typing import Optional, Tuple
+
+# Decompressed bytes inspected to find the log group and stream
+PEEK_BYTES = 4096
+# CloudWatch Logs puts logGroup and logStream before logEvents
+_SOURCE_RE = re.compile(rb'"(logGroup|logStream)"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def peek_log_source(compressed: bytes, peek_bytes: int = PEEK_BYTES) -> Optional[Tuple[str, str]]:
+    """
+    Reads (logGroup, logStream) from the start of a gzipped subscription payload
+    without decompressing or parsing the log events.
+    Returns None if they are not found before logEvents in the first peek_bytes.
+    """
+    try:
+        head = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(compressed, peek_bytes)
+    except zlib.error:
+        return None
+
+    events_at = head.find(b'"logEvents"')
+    if events_at >= 0:
+        head = head[:events_at]
+
+    found = {}
+    for match in _SOURCE_RE.finditer(head):
+        found.setdefault(match.group(1), match.group(2))
+    if b'logGroup' not in found or b'logStream' not in found:
+        return None
+    try:
+        return json.loads(found[b'logGroup']), json.loads(found[b'logStream'])
+    except ValueError:
+        return None
@@ -0,0 +1,128 @@
+import os
+import json
+import random
+import logging
+import cProfile
+import pstats
+import functools
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from src.aws_client import AWSClient
+from src.config import env_float, env_int
+
+logger = logging.getLogger()
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+
+def sampled_profiling(aws_client: Optional[AWSClient] = None) -> Callable[[Handler], Handler]:
+    """
+    Decorator that profiles a sampled fraction of invocations with cProfile and tracemalloc.
+
+    PROFILE_SAMPLE_RATE  fraction of invocations to profile (0 disables, default)
+    PROFILE_TOP_N        number of hotspots / allocation sites to log (default 15)
+    PROFILE_DUMP_PATH    optional directory (e.g. /tmp/profiles) or s3://bucket/prefix
+                         for the full pstats file
+
+    With sampling disabled the handler is returned unwrapped.
+    """
+    def decorator(handler: Handler) -> Handler:
+        rate = env_float('PROFILE_SAMPLE_RATE', 0)
+        if rate <= 0:
+            return handler
+
+        top_n = env_int('PROFILE_TOP_N', 15)
+        dump_path = os.environ.get('PROFILE_DUMP_PATH')
+
+        @functools.wraps(handler)
+        def wrapper(event: Dict[str, Any], context: Any) -> Any:
+            if random.random() >= rate:
+                return handler(event, context)
+            return _profile_invocation(handler, event, context, top_n, dump_path, aws_client)
+
+        return wrapper
+
+    return decorator
+
+
+def _profile_invocation(handler: Handler, event: Dict[str, Any], context: Any, top_n: int,
+                        dump_path: Optional[str], aws_client: Optional[AWSClient]) -> Any:
+    request_id = getattr(context, 'aws_request_id', None) or 'local'
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+
+    profiler.enable()
+    try:
+        return handler(event, context)
+    finally:
+        profiler.disable()
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            summary = {
+                'profile': request_id,
+                'peak_traced_kib': peak // 1024,
+                'hotspots': summarize_hotspots(profiler, top_n),
+                'allocations': summarize_allocations(snapshot, top_n)
+            }
+            if dump_path:
+                summary['pstats'] = _dump_stats(profiler, dump_path, request_id, aws_client)
+            logger.info(json.dumps(summary))
+        except Exception as e:
+            # Profiling must never fail the invocation
+            logger.error(f"Failed to write profile summary: {e}")
+
+
+def summarize_hotspots(profiler: cProfile.Profile, top_n: int) -> List[Dict[str, Any]]:
+    """Top functions by cumulative time."""
+    stats = pstats.Stats(profiler).stats  # type: ignore[attr-defined]
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+    hotspots = []
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in ranked:
+        hotspots.append({
+            'function': f"{os.path.basename(filename)}:{line}({func})",
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3)
+        })
+    return hotspots
+
+
+def summarize_allocations(snapshot: tracemalloc.Snapshot, top_n: int) -> List[Dict[str, Any]]:
+    """Top allocation sites by size still held at the end of the invocation."""
+    allocations = []
+    for stat in snapshot.statistics('lineno')[:top_n]:
+        frame = stat.traceback[0]
+        allocations.append({
+            'site': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            'size_kib': round(stat.size / 1024, 1),
+            'count': stat.count
+        })
+    return allocations
+
+
+def _dump_stats(profiler: cProfile.Profile, dump_path: str, request_id: str,
+                aws_client: Optional[AWSClient]) -> str:
+    """Writes the full pstats file to a local directory or S3 and returns its location."""
+    filename = f"{request_id}.pstats"
+    if not dump_path.startswith('s3://'):
+        os.makedirs(dump_path, exist_ok=True)
+        path = os.path.join(dump_path, filename)
+        profiler.dump_stats(path)
+        return path
+
+    local_path = os.path.join('/tmp', filename)
+    profiler.dump_stats(local_path)
+    bucket, _, prefix = dump_path[len('s3://'):].partition('/')
+    key = f"{prefix.rstrip('/')}/{filename}" if prefix else filename
+    try:
+        with open(local_path, 'rb') as f:
+            (aws_client or AWSClient()).put_s3_object(bucket, key, f.read())
+    finally:
+        os.remove(local_path)
+    return f"s3://{bucket}/{key}"
@@ -0,0 +1,112 @@
+import time
+import threading
+from typing import Callable, Optional
+from src.metrics import emit_emf
+
+METRIC_NAMESPACE = 'CloudWatchLogMonitor/LogsApi'
+
+THROTTLING_ERROR_CODES = frozenset({'ThrottlingException', 'TooManyRequestsException', 'RequestLimitExceeded'})
+
+
+def is_throttling_error(error: Exception) -> bool:
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in THROTTLING_ERROR_CODES
+
+
+class RateGovernor:
+    """
+    Client-side token bucket for CloudWatch Logs API calls, shared by all callers of
+    one AWSClient. The refill rate adapts to throttle feedback (AIMD): every throttled
+    call halves it, every successful call raises it by a twentieth of max_rate.
+    While the rate is below max_rate, context fetches ask for proportionally fewer events.
+    """
+
+    def __init__(self, max_rate: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep) -> None:
+        self.max_rate = max_rate
+        self.min_rate = max_rate / 20
+        self.rate = max_rate
+        self.burst = max(1.0, burst if burst is not None else max_rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated_at = clock()
+        self.throttles = 0
+        self.reduced_contexts = 0
+        self.skipped_contexts = 0
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, max_wait_seconds: Optional[float] = None) -> bool:
+        """
+        Takes a token, waiting for the refill if needed. Returns False without taking
+        one if that would take longer than max_wait_seconds (None waits as long as needed).
+        """
+        with self._lock:
+            self._refill()
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if max_wait_seconds is not None and wait > max_wait_seconds:
+                return False
+            # Reserve the token now so concurrent callers queue up behind it
+            self.tokens -= 1
+        if wait > 0:
+            self.sleep(wait)
+        return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Drop the saved-up burst as well, the service is already over its quota
+            self.tokens = min(self.tokens, 0.0)
+
+    def context_limit(self, requested: int) -> int:
+        """Number of context events to fetch under the current pressure."""
+        limit = max(1, int(requested * self.rate / self.max_rate))
+        if limit < requested:
+            with self._lock:
+                self.reduced_contexts += 1
+            return limit
+        return requested
+
+    def record_skipped_context(self) -> None:
+        with self._lock:
+            self.skipped_contexts += 1
+
+    def flush(self) -> None:
+        """Emits and resets the counters if anything was throttled or reduced."""
+        with self._lock:
+            throttles, reduced, skipped = self.throttles, self.reduced_contexts, self.skipped_contexts
+            self.throttles = self.reduced_contexts = self.skipped_contexts = 0
+            rate = self.rate
+        if not (throttles or reduced or skipped):
+            return
+        emit_emf(METRIC_NAMESPACE, {'Api': 'Logs'}, {
+            'ThrottledCalls': (throttles, 'Count'),
+            'ReducedContexts': (reduced, 'Count'),
+            'SkippedContexts': (skipped, 'Count'),
+            'AllowedRate': (round(rate, 2), 'Count/Second'),
+        })
+
+
+def create_logs_governor() -> Optional[RateGovernor]:
+    """
+    Creates the governor if LOGS_API_RATE (calls per second, 0 disables it) is set.
+    LOGS_API_BURST is the number of calls that may be made at once (default: the rate).
+    """
+    # src.config imports the AWS client, which imports this module
+    from src.config import env_float
+
+    rate = env_float('LOGS_API_RATE', 0)
+    if rate <= 0:
+        return None
+    burst = env_float('LOGS_API_BURST', 0)
+    return RateGovernor(rate, burst or None)
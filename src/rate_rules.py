@@ -0,0 +1,226 @@
+import os
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.aws_client import AWSClient
+from src.models import Match
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, bucketing falls back to pure Python
+    np = None  # type: ignore
+
+logger = logging.getLogger()
+
+DEFAULT_BUCKETS = 60
+# Counters kept per warm container; stream names rotate, so the least recently used are evicted
+DEFAULT_MAX_COUNTERS = 10000
+# Below this many timestamps NumPy's call overhead outweighs the vectorized bucketing
+NUMPY_MIN_TIMESTAMPS = 512
+
+
+def bucket_counts(timestamps: Sequence[int], bucket_ms: int) -> List[Tuple[int, int]]:
+    """Groups timestamps into (bucket id, count) pairs, in bucket order."""
+    if np is not None and len(timestamps) >= NUMPY_MIN_TIMESTAMPS:
+        buckets, counts = np.unique(np.asarray(timestamps, dtype=np.int64) // bucket_ms, return_counts=True)
+        return list(zip(buckets.tolist(), counts.tolist()))
+    return [(bucket, len(list(group))) for bucket, group in groupby(sorted(ts // bucket_ms for ts in timestamps))]
+
+
+class SlidingWindowCounter:
+    """
+    Counts events over a sliding time window using a ring of fixed-size buckets.
+    A counter fires once when the window total reaches the threshold and re-arms
+    after the total drops back below it.
+    """
+    __slots__ = ('bucket_ms', 'counts', 'stamps', 'armed')
+
+    def __init__(self, window_ms: int, buckets: int = DEFAULT_BUCKETS) -> None:
+        self.bucket_ms = max(1, window_ms // buckets)
+        self.counts = [0] * buckets
+        # Bucket id currently held by each slot of the ring
+        self.stamps = [-1] * buckets
+        self.armed = True
+
+    def total(self, now_bucket: int) -> int:
+        """Number of events in the window ending at now_bucket."""
+        oldest = now_bucket - len(self.counts)
+        return sum(c for c, stamp in zip(self.counts, self.stamps) if oldest < stamp <= now_bucket)
+
+    def add_batch(self, timestamps: Sequence[int], threshold: int) -> Optional[Tuple[int, int, int]]:
+        """
+        Adds a batch of event timestamps (epoch ms).
+        Returns (bucket id, position of the crossing event within that bucket's events
+        of this batch (1-based), window total) for the first threshold crossing, or None.
+        """
+        size = len(self.counts)
+        crossing: Optional[Tuple[int, int, int]] = None
+
+        for bucket, count in bucket_counts(timestamps, self.bucket_ms):
+            slot = bucket % size
+            if self.stamps[slot] > bucket:
+                # Older than anything the ring still holds
+                continue
+            if self.stamps[slot] != bucket:
+                self.stamps[slot] = bucket
+                self.counts[slot] = 0
+
+            before = self.total(bucket)
+            if before < threshold:
+                self.armed = True
+            self.counts[slot] += count
+            if self.armed and before + count >= threshold and crossing is None:
+                crossing = (bucket, threshold - before, before + count)
+                self.armed = False
+
+        return crossing
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'bucket_ms': self.bucket_ms, 'counts': self.counts, 'stamps': self.stamps, 'armed': self.armed}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], window_ms: int, buckets: int = DEFAULT_BUCKETS) -> 'SlidingWindowCounter':
+        counter = cls(window_ms, buckets)
+        if state.get('bucket_ms') == counter.bucket_ms and len(state.get('counts', [])) == buckets:
+            counter.counts = list(state['counts'])
+            counter.stamps = list(state['stamps'])
+            counter.armed = bool(state.get('armed', True))
+        return counter
+
+
+class CounterStore(ABC):
+    """Persists counter state so windows survive cold starts and span containers."""
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        pass
+
+
+class DynamoDBCounterStore(CounterStore):
+    """
+    Stores counter state as JSON in a DynamoDB table keyed on 'counter_key'.
+    Concurrent containers are last-writer-wins.
+    """
+
+    def __init__(self, table_name: str, aws_client: Optional[AWSClient] = None) -> None:
+        self.table_name = table_name
+        self.aws_client = aws_client or AWSClient()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self.aws_client.get_dynamodb_item(self.table_name, {'counter_key': {'S': key}})
+        if not item or 'state' not in item:
+            return None
+        return json.loads(item['state']['S'])
+
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        self.aws_client.put_dynamodb_item(
+            self.table_name,
+            {'counter_key': {'S': key}, 'state': {'S': json.dumps(state)}}
+        )
+
+
+class ThresholdEvaluator:
+    """
+    Applies 'threshold' stream_type rules, e.g. {"count": 20, "window_minutes": 5}.
+    Matches of such stream types are counted per (stream type, log group, log stream)
+    and only the match that crosses the threshold is passed on.
+    Counters live in memory (warm container, at most max_counters, least recently
+    used evicted first) and optionally in a CounterStore.
+    """
+
+    def __init__(self, store: Optional[CounterStore] = None, buckets: int = DEFAULT_BUCKETS,
+                 max_counters: int = DEFAULT_MAX_COUNTERS) -> None:
+        self.store = store
+        self.buckets = buckets
+        self.max_counters = max_counters
+        self._counters: 'OrderedDict[str, SlidingWindowCounter]' = OrderedDict()
+
+    def evaluate(self, log_group: str, log_stream: str, matches: List[Match]) -> Tuple[List[Match], List[Match]]:
+        """Returns (matches to notify, matches absorbed by threshold counters), in event order."""
+        grouped: Dict[int, List[Match]] = {}
+        for match in matches:
+            if match.config.get('threshold'):
+                grouped.setdefault(id(match.config), []).append(match)
+        if not grouped:
+            return matches, []
+
+        crossings = set()
+        for rule_matches in grouped.values():
+            crossing = self._evaluate_rule(log_group, log_stream, rule_matches)
+            if crossing is not None:
+                crossings.add(id(crossing))
+
+        notify = []
+        absorbed = []
+        for match in matches:
+            if not match.config.get('threshold') or id(match) in crossings:
+                notify.append(match)
+            else:
+                absorbed.append(match)
+        return notify, absorbed
+
+    def _evaluate_rule(self, log_group: str, log_stream: str, rule_matches: List[Match]) -> Optional[Match]:
+        config = rule_matches[0].config
+        threshold = config['threshold']
+        try:
+            count = int(threshold['count'])
+            window_minutes = float(threshold['window_minutes'])
+        except (KeyError, TypeError, ValueError):
+            logger.error(f"Invalid threshold for stream type {config.get('type')}: {threshold}")
+            return None
+        window_ms = int(window_minutes * 60000)
+
+        key = f"{config.get('type')}|{log_group}|{log_stream}"
+        counter = self._load_counter(key, window_ms)
+        ordered = sorted(rule_matches, key=lambda m: m.event.timestamp)
+        crossing = counter.add_batch([m.event.timestamp for m in ordered], count)
+        self._save_counter(key, counter)
+        if crossing is None:
+            return None
+
+        bucket, position, total = crossing
+        bucket_matches = [m for m in ordered if m.event.timestamp // counter.bucket_ms == bucket]
+        crossing_match = bucket_matches[position - 1]
+        crossing_match.occurrences = total
+        crossing_match.summary = f"Threshold reached: {total} matches within {window_minutes:g} minutes"
+        return crossing_match
+
+    def _load_counter(self, key: str, window_ms: int) -> SlidingWindowCounter:
+        counter = self._counters.get(key)
+        if self.store:
+            try:
+                state = self.store.load(key)
+                if state:
+                    counter = SlidingWindowCounter.from_state(state, window_ms, self.buckets)
+            except Exception as e:
+                logger.error(f"Failed to load threshold counter {key}, using local state: {e}")
+        if counter is None or counter.bucket_ms != max(1, window_ms // self.buckets):
+            counter = SlidingWindowCounter(window_ms, self.buckets)
+        counters = self._counters
+        counters[key] = counter
+        counters.move_to_end(key)
+        while len(counters) > self.max_counters:
+            counters.popitem(last=False)
+        return counter
+
+    def _save_counter(self, key: str, counter: SlidingWindowCounter) -> None:
+        if not self.store:
+            return
+        try:
+            self.store.save(key, counter.to_state())
+        except Exception as e:
+            logger.error(f"Failed to save threshold counter {key}: {e}")
+
+
+def create_threshold_evaluator(aws_client: Optional[AWSClient] = None) -> ThresholdEvaluator:
+    """Creates the evaluator, persisting counters in THRESHOLD_TABLE_NAME if set."""
+    table_name = os.environ.get('THRESHOLD_TABLE_NAME')
+    store = DynamoDBCounterStore(table_name, aws_client) if table_name else None
+    return ThresholdEvaluator(store)
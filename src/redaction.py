@@ -0,0 +1,149 @@
+import re
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger()
+
+# Named built-in rules for the stream_type 'redact' list
+BUILTIN_PATTERNS: Dict[str, str] = {
+    'email': r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}',
+    'card': r'\b\d(?:[ -]?\d){12,18}\b',
+    'aws_access_key': r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b',
+    'jwt': r'\beyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+',
+    'bearer': r'(?i:bearer)\s+[A-Za-z0-9._~+/-]+=*',
+    'secret': r'(?i:password|passwd|secret|token|api[_-]?key)["\']?\s*[:=]\s*["\']?[^\s"\',;]+',
+}
+# Lowercase literals one of which every match of a built-in rule contains. Rules whose
+# literals are absent from a text are left out of its regex; 'card' always runs.
+BUILTIN_HINTS: Dict[str, Tuple[str, ...]] = {
+    'email': ('@',),
+    'aws_access_key': ('akia', 'asia'),
+    'jwt': ('eyj',),
+    'bearer': ('bearer',),
+    'secret': ('password', 'passwd', 'secret', 'token', 'api_key', 'api-key', 'apikey'),
+}
+
+# (name, pattern, replacement, hints)
+Rule = Tuple[str, str, str, Tuple[str, ...]]
+
+# Text sent in place of a line that could not be redacted
+REDACTION_FAILED = '[REDACTED: redaction failed]'
+
+# \1..\9 not preceded by an escaped backslash; the numbers shift once patterns are combined
+_NUMBERED_BACKREF = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]')
+
+
+def luhn_valid(digits: str) -> bool:
+    """Luhn checksum, so order numbers and timestamps are not taken for card numbers."""
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        n = ord(ch) - 48
+        if i % 2:
+            n = n * 2 - 9 if n > 4 else n * 2
+        total += n
+    return total % 10 == 0
+
+
+class Redactor:
+    """
+    Rewrites every rule match of a text in a single pass: the rules are compiled into
+    one alternation of named groups (r0, r1, ...) and the group that matched selects
+    the replacement. Rules with literal hints only join the alternation for texts
+    containing one of them; the regex for each combination is compiled once.
+    """
+    __slots__ = ('_rules', '_always', '_hinted', '_regexes', '_replacements', '_card_groups')
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self._rules = list(rules)
+        self._always = 0
+        self._hinted: List[Tuple[int, Tuple[str, ...]]] = []
+        for i, (_, _, _, hints) in enumerate(self._rules):
+            if hints:
+                self._hinted.append((1 << i, hints))
+            else:
+                self._always |= 1 << i
+        self._regexes: Dict[int, 're.Pattern[str]'] = {}
+        self._replacements = {f'r{i}': replacement for i, (_, _, replacement, _) in enumerate(self._rules)}
+        self._card_groups = {f'r{i}' for i, (name, _, _, _) in enumerate(self._rules) if name == 'card'}
+
+    def _regex(self, mask: int) -> 're.Pattern[str]':
+        regex = self._regexes.get(mask)
+        if regex is None:
+            regex = self._regexes[mask] = re.compile('|'.join(
+                f'(?P<r{i}>{pattern})' for i, (_, pattern, _, _) in enumerate(self._rules) if mask & (1 << i)))
+        return regex
+
+    def _replace(self, match: 're.Match[str]') -> str:
+        group = match.lastgroup
+        if group in self._card_groups and not luhn_valid(re.sub(r'[ -]', '', match.group())):
+            return match.group()
+        return self._replacements[group]  # type: ignore[index]
+
+    def redact(self, text: str) -> str:
+        mask = self._always
+        if self._hinted:
+            lowered = text.lower()
+            for bit, hints in self._hinted:
+                for hint in hints:
+                    if hint in lowered:
+                        mask |= bit
+                        break
+        if not mask:
+            return text
+        try:
+            return self._regex(mask).sub(self._replace, text)
+        except re.error as e:
+            # Never send a line unredacted because its rules could not be combined
+            logger.error(f"Redaction failed, withholding the text: {e}")
+            return REDACTION_FAILED
+
+
+def _parse_rule(rule: Any) -> Rule:
+    """Turns a built-in name or a {name, pattern, replacement} object into a rule."""
+    if isinstance(rule, str):
+        if rule not in BUILTIN_PATTERNS:
+            raise ValueError(f"unknown built-in redaction rule {rule!r}")
+        return rule, BUILTIN_PATTERNS[rule], f'[REDACTED:{rule}]', BUILTIN_HINTS.get(rule, ())
+    if isinstance(rule, dict) and rule.get('pattern'):
+        name = str(rule.get('name', 'custom'))
+        pattern = str(rule['pattern'])
+        if re.compile(pattern).groupindex:
+            raise ValueError(f"redaction pattern {pattern!r} must not use named groups")
+        if _NUMBERED_BACKREF.search(pattern):
+            raise ValueError(f"redaction pattern {pattern!r} must not use numbered backreferences")
+        # Patterns run wrapped in a named group of one alternation, where e.g. global
+        # inline flags like (?i) are rejected; scoped flags (?i:...) work
+        try:
+            re.compile(f'(?P<r0>{pattern})|(?P<r1>x)')
+        except re.error as e:
+            raise ValueError(f"redaction pattern {pattern!r} cannot be combined with other rules: {e}")
+        return name, pattern, str(rule.get('replacement', f'[REDACTED:{name}]')), ()
+    raise ValueError(f"invalid redaction rule {rule!r}")
+
+
+def parse_redact_rules(rules: Any) -> List[Rule]:
+    """Rules of a 'redact' setting; raises ValueError (or re.error) on invalid rules."""
+    if not isinstance(rules, list):
+        raise ValueError("'redact' must be a list")
+    return [_parse_rule(rule) for rule in rules]
+
+
+@lru_cache(maxsize=256)
+def _compile(rules_key: str) -> Optional[Redactor]:
+    rules = []
+    for rule in json.loads(rules_key):
+        try:
+            rules.append(_parse_rule(rule))
+        except (ValueError, re.error) as e:
+            logger.error(f"Skipping redaction rule: {e}")
+    return Redactor(rules) if rules else None
+
+
+def redactor_for(st_config: Dict[str, Any]) -> Optional[Redactor]:
+    """The compiled redactor of a stream type, or None if it has no 'redact' rules."""
+    rules = st_config.get('redact')
+    if not rules or not isinstance(rules, list):
+        return None
+    return _compile(json.dumps(rules, sort_keys=True))
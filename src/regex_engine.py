@@ -0,0 +1,230 @@
+import os
+import re
+import signal
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from src.config import env_float
+from src.metrics import emit_emf
+
+try:
+    import re2  # google-re2: linear-time matching
+except ImportError:  # re2 is optional, patterns fall back to the stdlib engine
+    re2 = None  # type: ignore
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse  # type: ignore
+
+logger = logging.getLogger()
+
+METRIC_NAMESPACE = 'CloudWatchLogMonitor/Regex'
+_REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT}
+_GROUPS = {sre_parse.SUBPATTERN, getattr(sre_parse, 'ATOMIC_GROUP', None)}
+_INLINE_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'))
+
+# (pattern, flags) as passed to RegexEngine.compile
+PatternKey = Tuple[str, int]
+
+
+class RegexBudgetExceeded(Exception):
+    pass
+
+
+def complexity_issue(pattern: str, flags: int = 0) -> Optional[str]:
+    """
+    Static check for patterns that can backtrack catastrophically in `re`:
+    quantifiers nested inside an unbounded quantifier (e.g. (a+)+), unbounded
+    quantifiers inside a bounded repeat (e.g. (.*a){20}, polynomial in the repeat
+    count) and unbounded repetition of alternatives that can start with the same
+    character (e.g. (a|ab)*).
+    Returns a description of the problem, or None.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+    return _check(list(parsed), inside_unbounded=False, inside_repeat=False)
+
+
+def _check(items: List[Tuple[Any, Any]], inside_unbounded: bool, inside_repeat: bool) -> Optional[str]:
+    for op, av in items:
+        if op in _REPEATS:
+            low, high, body = av
+            unbounded = high == sre_parse.MAXREPEAT
+            repeats = unbounded or high > 1
+            if (inside_unbounded and repeats) or (inside_repeat and unbounded):
+                return "nested quantifier"
+            if unbounded and _has_ambiguous_branch(list(body)):
+                return "quantified overlapping alternation"
+            issue = _check(list(body), inside_unbounded or unbounded, inside_repeat or repeats)
+            if issue:
+                return issue
+        elif op in _GROUPS and op is not None:
+            issue = _check(list(av[-1]), inside_unbounded, inside_repeat)
+            if issue:
+                return issue
+        elif op == sre_parse.BRANCH:
+            for branch in av[1]:
+                issue = _check(list(branch), inside_unbounded, inside_repeat)
+                if issue:
+                    return issue
+    return None
+
+
+def _first_token(items: List[Tuple[Any, Any]]) -> Any:
+    """The literal a sequence must start with, or 'any' when it is not a single literal."""
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            return av
+        if op in _GROUPS and op is not None:
+            return _first_token(list(av[-1]))
+        return 'any'
+    return 'empty'
+
+
+def _has_ambiguous_branch(items: List[Tuple[Any, Any]]) -> bool:
+    for op, av in items:
+        if op in _GROUPS and op is not None:
+            if _has_ambiguous_branch(list(av[-1])):
+                return True
+        elif op == sre_parse.BRANCH:
+            firsts = [_first_token(list(branch)) for branch in av[1]]
+            literals = [f for f in firsts if f not in ('any', 'empty')]
+            if len(firsts) - len(literals) > 1 or len(set(literals)) != len(literals) or \
+                    (len(literals) < len(firsts) and literals):
+                return True
+    return False
+
+
+class GuardedPattern:
+    """
+    Wraps a `re` pattern flagged by the static check. Each search runs under a
+    SIGALRM time budget; a pattern that exceeds it is disabled for the life of the
+    container and never matches again. The alarm can only interrupt the main thread,
+    so on other threads the pattern is not run at all and never matches.
+    """
+    __slots__ = ('compiled', 'pattern', 'flags', 'budget_seconds', 'disabled', 'issue', 'skipped_off_main')
+
+    def __init__(self, compiled: 're.Pattern[str]', budget_seconds: float, issue: str) -> None:
+        self.compiled = compiled
+        self.pattern = compiled.pattern
+        self.flags = compiled.flags
+        self.budget_seconds = budget_seconds
+        self.disabled = False
+        self.issue = issue
+        self.skipped_off_main = 0
+
+    def search(self, string: str, *args: Any) -> Optional['re.Match[str]']:
+        return self._run(self.compiled.search, string, *args)
+
+    def match(self, string: str, *args: Any) -> Optional['re.Match[str]']:
+        return self._run(self.compiled.match, string, *args)
+
+    def _run(self, method: Callable[..., Optional['re.Match[str]']], string: str,
+             *args: Any) -> Optional['re.Match[str]']:
+        if self.disabled:
+            return None
+        if threading.current_thread() is not threading.main_thread():
+            # Nothing could stop a runaway search here
+            if not self.skipped_off_main:
+                logger.warning(f"Regex '{self.pattern}' ({self.issue}) is not evaluated outside the main thread")
+            self.skipped_off_main += 1
+            return None
+
+        previous = signal.signal(signal.SIGALRM, _raise_budget_exceeded)
+        signal.setitimer(signal.ITIMER_REAL, self.budget_seconds)
+        try:
+            return method(string, *args)
+        except RegexBudgetExceeded:
+            self._disable(len(string))
+            return None
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    def _disable(self, length: int) -> None:
+        self.disabled = True
+        logger.error(f"Regex '{self.pattern}' ({self.issue}) exceeded its {self.budget_seconds * 1000:g} ms "
+                     f"budget on a {length} character input and has been disabled")
+        emit_emf(METRIC_NAMESPACE, {'Pattern': self.pattern[:250]}, {'DisabledPatterns': (1, 'Count')})
+
+
+class Re2Pattern:
+    """re2 pattern with the pattern/flags attributes of a `re` pattern."""
+    __slots__ = ('compiled', 'pattern', 'flags')
+
+    def __init__(self, pattern: str, flags: int) -> None:
+        inline = ''.join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+        self.compiled = re2.compile(f'(?{inline}){pattern}' if inline else pattern)
+        self.pattern = pattern
+        self.flags = flags | re.UNICODE
+
+    def search(self, string: str, *args: Any) -> Any:
+        return self.compiled.search(string, *args)
+
+    def match(self, string: str, *args: Any) -> Any:
+        return self.compiled.match(string, *args)
+
+
+def _raise_budget_exceeded(signum: int, frame: Any) -> None:
+    raise RegexBudgetExceeded()
+
+
+class RegexEngine:
+    """
+    Compiles user-supplied regexes.
+    engine 'auto' uses re2 when it is installed and falls back to `re` for patterns
+    re2 does not support; 're2' and 're' force one engine ('re2' still falls back).
+    `re` patterns flagged by complexity_issue() are wrapped in a GuardedPattern.
+    """
+
+    def __init__(self, engine: Optional[str] = None, budget_ms: Optional[float] = None) -> None:
+        engine = (engine or os.environ.get('REGEX_ENGINE', 'auto')).lower()
+        if budget_ms is None:
+            budget_ms = env_float('REGEX_BUDGET_MS', 50)
+        self.use_re2 = engine != 're' and re2 is not None
+        if engine == 're2' and re2 is None:
+            logger.warning("REGEX_ENGINE=re2 but the re2 module is not installed, using re")
+        self.budget_seconds = budget_ms / 1000
+        self.guarded: Dict[PatternKey, GuardedPattern] = {}
+        # Disabled by another process (a parallel scan worker) before compiled here
+        self._disabled_elsewhere: Set[PatternKey] = set()
+
+    def compile(self, pattern: str, flags: int = 0) -> Any:
+        """Returns an object with search()/match()/pattern/flags. Raises re.error for invalid patterns."""
+        if self.use_re2:
+            try:
+                return Re2Pattern(pattern, flags)
+            except Exception:
+                # Backreferences, lookarounds etc. are not supported by re2
+                pass
+
+        compiled = re.compile(pattern, flags)
+        issue = complexity_issue(pattern, flags)
+        if issue is None:
+            return compiled
+        logger.warning(f"Regex '{pattern}' may backtrack catastrophically ({issue}); "
+                       f"running it with a {self.budget_seconds * 1000:g} ms budget")
+        guarded = GuardedPattern(compiled, self.budget_seconds, issue)
+        guarded.disabled = (pattern, flags) in self._disabled_elsewhere
+        self.guarded[(pattern, flags)] = guarded
+        return guarded
+
+    def disabled_patterns(self) -> List[str]:
+        return [g.pattern for g in self.guarded.values() if g.disabled]
+
+    def disabled_keys(self) -> List[PatternKey]:
+        return [key for key, g in self.guarded.items() if g.disabled]
+
+    def mark_disabled(self, keys: List[PatternKey]) -> None:
+        """Disables patterns that exceeded their budget in another process, which already reported them."""
+        for key in keys:
+            key = (key[0], key[1])
+            guarded = self.guarded.get(key)
+            if guarded is None:
+                self._disabled_elsewhere.add(key)
+            elif not guarded.disabled:
+                guarded.disabled = True
+                logger.warning(f"Regex '{guarded.pattern}' was disabled by a parallel scan worker")
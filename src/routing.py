@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Set, Tuple
+
+# Characters that can appear unescaped in a literal regex prefix
+_LITERAL_CHARS = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_/:@%=,;\'"<>!~` ')
+# Escaped characters that stand for themselves
+_ESCAPABLE = set('.-/_:@#%=,;+*?()[]{}|^$\\ ')
+_QUANTIFIERS = set('*+?{')
+# Patterns referring to group numbers or names cannot be merged into one alternation
+_GROUP_REFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+# (pattern string) -> compiled pattern, or None if it is invalid
+CompileFunc = Callable[[str], Optional[Pattern]]
+# Precomputed classify_pattern() results per rule: [group, stream], None where a pattern is absent
+Classification = Sequence[Optional[Sequence[str]]]
+
+
+def classify_pattern(pattern: str) -> Tuple[str, str]:
+    """
+    Classifies a routing regex (used with re.search) as:
+      ('exact', name)    -- ^literal$
+      ('prefix', prefix) -- ^literal followed by anything; the rest still has to be verified
+                            unless the pattern is exactly ^literal or ^literal.*
+      ('regex', '')      -- anything else
+    """
+    if not pattern.startswith('^') or '|' in pattern:
+        return ('regex', '')
+
+    literal: List[str] = []
+    i = 1
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\' and i + 1 < len(pattern) and pattern[i + 1] in _ESCAPABLE:
+            literal.append(pattern[i + 1])
+            i += 2
+        elif ch in _LITERAL_CHARS:
+            literal.append(ch)
+            i += 1
+        else:
+            break
+
+    rest = pattern[i:]
+    if rest and rest[0] in _QUANTIFIERS and literal:
+        # The last literal character is optional/repeated, so it is not part of the prefix
+        literal.pop()
+    if rest == '$':
+        return ('exact', ''.join(literal))
+    if not literal:
+        return ('regex', '')
+    return ('prefix', ''.join(literal))
+
+
+class _PatternIndex:
+    """Index over one dimension (log group or log stream) of the routing rules."""
+
+    def __init__(self) -> None:
+        self.wildcard: List[int] = []
+        self.exact: Dict[str, List[int]] = {}
+        # Prefix trie: char -> child node; '' key holds (rule id, pattern to verify or None)
+        self.trie: Dict[str, Any] = {}
+        self.regexes: List[Tuple[int, Pattern]] = []
+        self.prefilter: Optional[Pattern] = None
+        # Regexes that cannot be part of the prefilter and are always evaluated
+        self.unfiltered: List[Tuple[int, Pattern]] = []
+
+    def add(self, rule_id: int, pattern: Optional[str], compiled: Optional[Pattern],
+            classified: Optional[Sequence[str]] = None) -> None:
+        if pattern is None or compiled is None:
+            self.wildcard.append(rule_id)
+            return
+
+        if compiled.flags & ~re.UNICODE:
+            # Compiled with extra flags (e.g. IGNORECASE), the pattern string alone is not enough
+            self.unfiltered.append((rule_id, compiled))
+            return
+
+        kind, literal = classified if classified else classify_pattern(pattern)
+        if kind == 'exact':
+            self.exact.setdefault(literal, []).append(rule_id)
+        elif kind == 'prefix':
+            node = self.trie
+            for ch in literal:
+                node = node.setdefault(ch, {})
+            needs_check = pattern not in ('^' + re.escape(literal), '^' + literal, '^' + literal + '.*')
+            node.setdefault('', []).append((rule_id, compiled if needs_check else None))
+        else:
+            self.regexes.append((rule_id, compiled))
+
+    def finalize(self) -> None:
+        """Builds the combined prefilter regex for the leftover patterns."""
+        # Only plain `re` patterns are merged; re2 or budget-guarded patterns keep their own engine
+        mergeable = [(rid, p) for rid, p in self.regexes
+                     if isinstance(p, re.Pattern) and not _GROUP_REFERENCE_RE.search(p.pattern)]
+        merged_ids = {rid for rid, _ in mergeable}
+        self.unfiltered.extend((rid, p) for rid, p in self.regexes if rid not in merged_ids)
+        self.regexes = mergeable
+        if not mergeable:
+            return
+        try:
+            self.prefilter = re.compile('|'.join(f'(?:{p.pattern})' for _, p in mergeable))
+        except re.error:
+            # e.g. duplicate group names across patterns; evaluate them one by one
+            self.unfiltered.extend(mergeable)
+            self.regexes = []
+
+    def lookup(self, name: str) -> Set[int]:
+        found = set(self.wildcard)
+        found.update(self.exact.get(name, ()))
+
+        node = self.trie
+        for ch in name:
+            entries = node.get('')
+            if entries:
+                found.update(rid for rid, check in entries if check is None or check.search(name))
+            node = node.get(ch)
+            if node is None:
+                break
+        else:
+            entries = node.get('')
+            if entries:
+                found.update(rid for rid, check in entries if check is None or check.search(name))
+
+        if self.prefilter is not None and self.prefilter.search(name):
+            found.update(rid for rid, p in self.regexes if p.search(name))
+        found.update(rid for rid, p in self.unfiltered if p.search(name))
+        return found
+
+
+class RoutingIndex:
+    """
+    Finds the stream_types whose log_group_pattern / pattern match a log group and stream.
+    Exact names are hash lookups, anchored literal prefixes go through a trie, and the
+    remaining regexes are guarded by one combined prefilter regex. Results keep config
+    order and are memoized per (log_group, log_stream).
+    classifications (from a compiled config artifact) skip classifying the patterns again.
+    """
+
+    def __init__(self, stream_types: List[Dict[str, Any]], compile_pattern: CompileFunc, cache_size: int = 4096,
+                 classifications: Optional[List[Classification]] = None) -> None:
+        if classifications is not None and len(classifications) != len(stream_types):
+            classifications = None
+        self.stream_types = stream_types
+        self._groups = _PatternIndex()
+        self._streams = _PatternIndex()
+
+        for rule_id, st_config in enumerate(stream_types):
+            group_pattern = st_config.get('log_group_pattern')
+            stream_pattern = st_config.get('pattern')
+            if not group_pattern and not stream_pattern:
+                # Avoid matching everything by accident
+                continue
+
+            compiled_group = compile_pattern(group_pattern) if group_pattern else None
+            compiled_stream = compile_pattern(stream_pattern) if stream_pattern else None
+            if (group_pattern and compiled_group is None) or (stream_pattern and compiled_stream is None):
+                # Invalid regex, the stream type is skipped
+                continue
+
+            classified = classifications[rule_id] if classifications else (None, None)
+            self._groups.add(rule_id, group_pattern or None, compiled_group, classified[0])
+            self._streams.add(rule_id, stream_pattern or None, compiled_stream, classified[1])
+
+        self._groups.finalize()
+        self._streams.finalize()
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def match(self, log_group: str, log_stream: str) -> List[Dict[str, Any]]:
+        """Returns the matching stream_types in config order."""
+        return list(self.lookup(log_group, log_stream))
+
+    def _lookup(self, log_group: str, log_stream: str) -> Tuple[Dict[str, Any], ...]:
+        ids = self._groups.lookup(log_group)
+        if ids:
+            ids &= self._streams.lookup(log_stream)
+        return tuple(self.stream_types[i] for i in sorted(ids))
+
+
+class NegativeRoutingCache:
+    """
+    Remembers (log_group, log_stream) pairs that no stream type routes, for one
+    config version. A different version clears it.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self._unrouted: Set[Tuple[str, str]] = set()
+
+    def contains(self, version: str, log_group: str, log_stream: str) -> bool:
+        return version == self.version and (log_group, log_stream) in self._unrouted
+
+    def add(self, version: str, log_group: str, log_stream: str) -> None:
+        if version != self.version or len(self._unrouted) >= self.max_entries:
+            self.version = version
+            self._unrouted = set()
+        self._unrouted.add((log_group, log_stream))
@@ -0,0 +1,199 @@
+"""
+Rule cost and hit-rate statistics for stream_types filters, field filters and whitelists.
+
+LogProcessor samples one in RULE_STATS_SAMPLE_EVERY events and evaluates every rule of
+the matching stream types on it, one by one and without short-circuiting, recording
+evaluations, hits and time per rule. Totals are flushed as EMF metrics every
+RULE_STATS_FLUSH_SECONDS, with StreamType and RuleKind as dimensions; the rule itself
+is a property of the document (free text would make one metric per rule).
+
+Report from a replay of sample events or from collected EMF log lines:
+
+    python -m src.rule_stats --config config.yaml --events events.jsonl \\
+        --log-group /aws/lambda/app --log-stream prod-1
+    python -m src.rule_stats --emf-log exported_logs.jsonl
+"""
+import sys
+import json
+import time
+import hashlib
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from src.json_rules import LazyJson
+from src.metrics import emit_emf
+
+METRIC_NAMESPACE = 'CloudWatchLogMonitor/Rules'
+
+# (stream type, rule kind, rule) -> [evaluations, hits, seconds]
+StatsKey = Tuple[str, str, str]
+
+
+class RuleStats:
+    """Sampled per-rule evaluation counters."""
+
+    def __init__(self, sample_every: int, flush_seconds: float = 300) -> None:
+        self.sample_every = max(1, sample_every)
+        self.flush_seconds = flush_seconds
+        self.stats: Dict[StatsKey, List[float]] = {}
+        self._position = 0
+        self._last_flush = time.monotonic()
+
+    def observe(self, events: Sequence[Any], prepared_configs: List[Dict[str, Any]]) -> None:
+        """Evaluates every rule on each sampled event of a batch; other events cost nothing."""
+        every = self.sample_every
+        first = (-self._position) % every
+        self._position += len(events)
+        for index in range(first, len(events), every):
+            event = events[index]
+            message = event['message'] if isinstance(event, dict) else event.message
+            self._evaluate(message, prepared_configs)
+
+    def _evaluate(self, message: str, prepared_configs: List[Dict[str, Any]]) -> None:
+        clock = time.perf_counter
+        message_lower = message.lower()
+        doc = LazyJson(message)
+        for prepared in prepared_configs:
+            stream_type = str(prepared['config'].get('type', 'Unknown'))
+            for keyword in prepared['filters']:
+                start = clock()
+                hit = keyword.lower() in message_lower
+                self._record((stream_type, 'filter', keyword), hit, clock() - start)
+            for rule in prepared['field_rules']:
+                start = clock()
+                hit = rule.matches(message, doc)
+                self._record((stream_type, 'field_filter', f"{rule.field} {rule.op} {rule.value}"), hit, clock() - start)
+            for pattern in prepared['whitelist_patterns']:
+                start = clock()
+                hit = pattern.search(message) is not None
+                self._record((stream_type, 'whitelist', pattern.pattern), hit, clock() - start)
+
+    def _record(self, key: StatsKey, hit: bool, seconds: float) -> None:
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = [0, 0, 0.0]
+        entry[0] += 1
+        entry[1] += hit
+        entry[2] += seconds
+
+    def maybe_flush(self, now: Optional[float] = None) -> bool:
+        """Emits and resets the counters once flush_seconds have passed."""
+        now = time.monotonic() if now is None else now
+        if now - self._last_flush < self.flush_seconds:
+            return False
+        self.flush()
+        self._last_flush = now
+        return True
+
+    def flush(self) -> None:
+        for (stream_type, kind, rule), (evaluations, hits, seconds) in self.stats.items():
+            emit_emf(
+                METRIC_NAMESPACE,
+                {'StreamType': stream_type, 'RuleKind': kind},
+                {
+                    'Evaluations': (evaluations, 'Count'),
+                    'Hits': (hits, 'Count'),
+                    'EvaluationTime': (round(seconds * 1e6, 1), 'Microseconds')
+                },
+                {'Rule': rule, 'RuleId': rule_id(rule), 'SampleEvery': self.sample_every}
+            )
+        self.stats = {}
+
+
+def rule_id(rule: str) -> str:
+    """Short stable id of a rule, for grouping its EMF documents in Logs Insights."""
+    return hashlib.blake2b(rule.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def aggregate_emf_lines(lines: Iterable[str]) -> Dict[StatsKey, List[float]]:
+    """Sums RuleStats EMF documents found in log lines (other lines are ignored)."""
+    totals: Dict[StatsKey, List[float]] = {}
+    for line in lines:
+        start = line.find('{')
+        if start < 0 or METRIC_NAMESPACE not in line:
+            continue
+        try:
+            doc = json.loads(line[start:])
+            if 'message' in doc and isinstance(doc['message'], str):
+                # Exported with filter-log-events: the EMF document is the message
+                doc = json.loads(doc['message'])
+            key = (doc['StreamType'], doc['RuleKind'], doc['Rule'])
+            entry = totals.setdefault(key, [0, 0, 0.0])
+            entry[0] += doc['Evaluations']
+            entry[1] += doc['Hits']
+            entry[2] += doc['EvaluationTime'] / 1e6
+        except (ValueError, KeyError, TypeError):
+            continue
+    return totals
+
+
+def format_report(stats: Dict[StatsKey, List[float]]) -> str:
+    """Rules by cumulative time; rules that never hit are marked for pruning."""
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+    lines = [f"{'stream type':<20} {'kind':<12} {'evals':>9} {'hits':>9} {'hit %':>7} {'total ms':>10} {'us/eval':>8}  rule"]
+    for (stream_type, kind, rule), (evaluations, hits, seconds) in rows:
+        hit_rate = 100.0 * hits / evaluations if evaluations else 0.0
+        per_eval = seconds * 1e6 / evaluations if evaluations else 0.0
+        flag = '  [never hit]' if not hits else ''
+        lines.append(f"{stream_type[:20]:<20} {kind:<12} {int(evaluations):>9} {int(hits):>9} {hit_rate:>6.1f}% "
+                     f"{seconds * 1000:>10.3f} {per_eval:>8.2f}  {rule}{flag}")
+    return '\n'.join(lines)
+
+
+def _replay(config_paths: List[str], events_path: str, log_group: str, log_stream: str) -> Dict[StatsKey, List[float]]:
+    from src.config import merge_config_fragments, unwrap_config_artifact, is_config_artifact, parse_config_content
+    from src.log_processor import LogProcessor
+    from src.models import LogEvent
+
+    contents = []
+    for path in config_paths:
+        with open(path, encoding='utf-8') as f:
+            contents.append(f.read())
+    parsed = parse_config_content(contents[0]) if len(contents) == 1 else None
+    if is_config_artifact(parsed):
+        config = unwrap_config_artifact(parsed) or {}  # type: ignore[arg-type]
+    else:
+        config = merge_config_fragments(contents)
+
+    events = []
+    with open(events_path, encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            line = line.rstrip('\n')
+            try:
+                raw = json.loads(line)
+                message = raw['message'] if isinstance(raw, dict) else line
+            except (ValueError, KeyError):
+                message = line
+            events.append(LogEvent(str(i), i, message))
+
+    processor = LogProcessor(batch_scan_min_events=0, rule_stats=RuleStats(1, flush_seconds=float('inf')))
+    processor.process_log_batch(log_group, log_stream, events, config)
+    assert processor.rule_stats is not None
+    return processor.rule_stats.stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report rule cost and hit rates")
+    parser.add_argument('--emf-log', help="Log export containing RuleStats EMF lines")
+    parser.add_argument('--config', nargs='+', help="Config files (or a compiled artifact) to replay")
+    parser.add_argument('--events', help="Sample events: JSON lines with a 'message' field, or plain text lines")
+    parser.add_argument('--log-group', default='', help="Log group used to route the replayed events")
+    parser.add_argument('--log-stream', default='', help="Log stream used to route the replayed events")
+    args = parser.parse_args(argv)
+
+    if args.emf_log:
+        with open(args.emf_log, encoding='utf-8') as f:
+            stats = aggregate_emf_lines(f)
+    elif args.config and args.events:
+        stats = _replay(args.config, args.events, args.log_group, args.log_stream)
+    else:
+        parser.error("give --emf-log, or --config and --events")
+
+    if not stats:
+        print("No rule statistics found.", file=sys.stderr)
+        return 1
+    print(format_report(stats))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import re
+import random
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from src.config import env_int
+from src.models import Match
+
+logger = logging.getLogger()
+
+# Only the start of the first line is fingerprinted; storms repeat the same prefix
+FINGERPRINT_CHARS = 200
+# Variable parts of a message: UUIDs, hex ids, numbers
+_VARIABLE_RE = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|0x[0-9a-fA-F]+|\b[0-9a-fA-F]{16,}\b|\d+'
+)
+
+
+def fingerprint(message: str) -> str:
+    """Identifies messages that differ only in ids, numbers and timestamps."""
+    first_line = message.split('\n', 1)[0][:FINGERPRINT_CHARS]
+    normalized = _VARIABLE_RE.sub('#', first_line).strip().lower()
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ReservoirSampler:
+    """
+    Bounds the matches of one invocation that go on to context fetching and notification.
+    Matches are grouped by stream type and message fingerprint; each group keeps a
+    uniform random reservoir of sample_size matches (stream_type 'sample_size' overrides
+    the default) and the kept samples carry the exact group total.
+    A sample size of 0 disables sampling.
+    """
+
+    def __init__(self, default_size: int = 0, rng: Optional[random.Random] = None) -> None:
+        self.default_size = default_size
+        self.rng = rng or random.Random()
+
+    def sample(self, matches: List[Match]) -> Tuple[List[Match], List[Match]]:
+        """Returns (samples to notify, matches dropped), samples in event order."""
+        reservoirs: Dict[Tuple[int, str], List[int]] = {}
+        totals: Dict[Tuple[int, str], int] = {}
+        sizes: Dict[int, int] = {}
+        unsampled = []
+
+        for index, match in enumerate(matches):
+            size = sizes.get(id(match.config))
+            if size is None:
+                size = sizes[id(match.config)] = self._sample_size(match.config)
+            if size <= 0 or match.summary:
+                # Not sampled, or already an aggregate (e.g. a threshold crossing)
+                unsampled.append(index)
+                continue
+            key = (id(match.config), fingerprint(match.event.message))
+            seen = totals.get(key, 0) + 1
+            totals[key] = seen
+            reservoir = reservoirs.setdefault(key, [])
+            if len(reservoir) < size:
+                reservoir.append(index)
+            else:
+                # Algorithm R: keep the new match with probability size / seen
+                slot = self.rng.randrange(seen)
+                if slot < size:
+                    reservoir[slot] = index
+
+        if not reservoirs:
+            return matches, []
+
+        kept = set(unsampled)
+        for key, reservoir in reservoirs.items():
+            kept.update(reservoir)
+            total = totals[key]
+            if total > len(reservoir):
+                for index in reservoir:
+                    matches[index].occurrences = total
+                    matches[index].summary = f"Sampled {len(reservoir)} of {total} similar matches in this batch"
+
+        notify = [m for i, m in enumerate(matches) if i in kept]
+        dropped = [m for i, m in enumerate(matches) if i not in kept]
+        if dropped:
+            logger.info(f"Sampling kept {len(notify)} of {len(matches)} matches")
+        return notify, dropped
+
+    def _sample_size(self, config: Dict) -> int:
+        value = config.get('sample_size', self.default_size)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            logger.error(f"Invalid sample_size {value!r} for stream type {config.get('type')}, "
+                         f"using {self.default_size}")
+            return self.default_size
+
+
+def create_sampler() -> ReservoirSampler:
+    """Creates the sampler with the MATCH_SAMPLE_SIZE default reservoir size."""
+    return ReservoirSampler(env_int('MATCH_SAMPLE_SIZE', 0))
@@ -0,0 +1,283 @@
+"""
+Generates CloudWatch Logs subscription filter patterns from stream_types, so events
+that cannot match are dropped by CloudWatch before the function is invoked.
+
+Each pattern is a superset of what LogProcessor accepts for the log group: the
+filter keywords of every stream type that can route the group, as one
+case-insensitive regex. Where no safe pattern exists (field filters, multiline
+records, unsupported characters, limits) the pattern is "" and every event is
+delivered as before.
+
+    python -m src.subscription_filters --config config.yaml --log-group /aws/lambda/api
+    python -m src.subscription_filters --config config.yaml --log-group /aws/lambda/api \\
+        --check sample_messages.jsonl --template subscriptions.yaml
+"""
+import re
+import sys
+import json
+import random
+import argparse
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from src.config import is_config_artifact, merge_config_fragments, parse_config_content, unwrap_config_artifact
+
+# Filter pattern that matches every event
+MATCH_ALL = ''
+# CloudWatch Logs limits: filter pattern length and length of one %regex%
+FILTER_PATTERN_MAX_LENGTH = 1024
+REGEX_MAX_LENGTH = 250
+# Keyword characters that can be expressed in a CloudWatch filter regex
+_PLAIN_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789 _,;:=!@#&<>\'"~`')
+_ESCAPED_CHARS = frozenset('.-/\\^$*+?()[]{}|')
+
+
+@lru_cache(maxsize=None)
+def _lower_preimages() -> Dict[str, FrozenSet[str]]:
+    """For each ASCII character, every code point whose str.lower() is exactly that character."""
+    table: Dict[str, set] = {}
+    for code in range(sys.maxunicode + 1):
+        ch = chr(code)
+        lowered = ch.lower()
+        if len(lowered) == 1 and ord(lowered) < 128:
+            table.setdefault(lowered, set()).add(ch)
+    return {k: frozenset(v) for k, v in table.items()}
+
+
+def _char_regex(ch: str, last: bool) -> Optional[str]:
+    """Regex for one lowercased keyword character, matching everything that lowercases to it."""
+    if ch in _ESCAPED_CHARS:
+        return '\\' + ch
+    if ch not in _PLAIN_CHARS:
+        return None
+    preimages = set(_lower_preimages().get(ch, {ch}))
+    if last and ch == 'i':
+        # 'İ'.lower() is 'i' + U+0307, which ends a keyword match on its 'i'
+        preimages.add('İ')
+    if len(preimages) == 1:
+        return ch
+    return '[' + ''.join(sorted(preimages)) + ']'
+
+
+def keyword_regex(keyword: str) -> Optional[str]:
+    """Case-insensitive CloudWatch regex for a filter keyword, or None if it cannot be expressed."""
+    lowered = keyword.lower()
+    if not lowered or lowered.strip() != lowered:
+        # Leading/trailing spaces are not reliably kept in filter patterns
+        return None
+    parts = []
+    for i, ch in enumerate(lowered):
+        part = _char_regex(ch, i == len(lowered) - 1)
+        if part is None:
+            return None
+        parts.append(part)
+    return ''.join(parts)
+
+
+def minimal_keywords(keywords: Iterable[str]) -> List[str]:
+    """Drops keywords containing another keyword; they can only match where it does."""
+    lowered = sorted({k.lower() for k in keywords}, key=lambda k: (len(k), k))
+    kept: List[str] = []
+    for keyword in lowered:
+        if not any(shorter in keyword for shorter in kept):
+            kept.append(keyword)
+    return kept
+
+
+def stream_types_for_group(config: Dict[str, Any], log_group: str) -> List[Dict[str, Any]]:
+    """Stream types that can route events of the log group, whatever the stream name."""
+    selected = []
+    for st_config in config.get('stream_types', []):
+        group_pattern = st_config.get('log_group_pattern')
+        if not group_pattern and not st_config.get('pattern'):
+            continue
+        if group_pattern:
+            try:
+                if not re.search(group_pattern, log_group):
+                    continue
+            except re.error:
+                continue
+        selected.append(st_config)
+    return selected
+
+
+def build_filter_pattern(config: Dict[str, Any], log_group: str) -> Tuple[str, str]:
+    """Returns (filter pattern, reason) for a log group."""
+    stream_types = stream_types_for_group(config, log_group)
+    if not stream_types:
+        return MATCH_ALL, "no stream type routes this log group"
+
+    keywords: List[str] = []
+    for st_config in stream_types:
+        if st_config.get('field_filters'):
+            return MATCH_ALL, f"stream type {st_config.get('type')} uses field_filters"
+        if st_config.get('multiline'):
+            return MATCH_ALL, f"stream type {st_config.get('type')} coalesces multiline records"
+        keywords.extend(st_config.get('filters', []))
+
+    if not keywords:
+        # Nothing can match; the group does not need a subscription at all
+        return MATCH_ALL, "no filter keywords"
+
+    alternatives = []
+    for keyword in minimal_keywords(keywords):
+        regex = keyword_regex(keyword)
+        if regex is None:
+            return MATCH_ALL, f"keyword {keyword!r} cannot be expressed as a filter regex"
+        alternatives.append(regex)
+
+    regex = '|'.join(alternatives)
+    pattern = f'%{regex}%'
+    if len(regex) > REGEX_MAX_LENGTH or len(pattern) > FILTER_PATTERN_MAX_LENGTH:
+        return MATCH_ALL, f"filter regex too long ({len(regex)} chars)"
+    return pattern, f"{len(alternatives)} keywords"
+
+
+def filter_pattern_matches(pattern: str, message: str) -> bool:
+    """Local evaluator for the patterns generated here ("" or a single %regex%)."""
+    if pattern == MATCH_ALL:
+        return True
+    if not (pattern.startswith('%') and pattern.endswith('%')):
+        raise ValueError(f"Unsupported filter pattern: {pattern}")
+    return re.search(pattern[1:-1], message) is not None
+
+
+def _variants(keyword: str, rng: random.Random) -> List[str]:
+    """Messages that contain the keyword in ways LogProcessor matches."""
+    variants = [keyword, keyword.upper(), keyword.lower(), f"prefix {keyword.swapcase()} suffix"]
+    variants.append(''.join(c.upper() if rng.random() < 0.5 else c.lower() for c in keyword))
+    variants.append(keyword.lower().replace('k', '\u212a'))
+    if keyword.lower().endswith('i'):
+        variants.append(keyword[:-1] + 'İ tail')
+    return variants
+
+
+def check_superset(config: Dict[str, Any], log_group: str, pattern: str, messages: Sequence[str],
+                   seed: int = 0) -> List[str]:
+    """
+    Returns messages LogProcessor would match for the log group but the filter pattern
+    would drop (empty list if none). Besides the given messages, every keyword is
+    checked in mixed case, embedded in text and with the non-ASCII characters that
+    lowercase to ASCII letters.
+    """
+    from src.log_processor import LogProcessor
+
+    processor = LogProcessor(batch_scan_min_events=0)
+    prepared = processor._prepare_configs(stream_types_for_group(config, log_group))
+    rng = random.Random(seed)
+    corpus = list(messages)
+    for item in prepared:
+        for keyword in item['filters']:
+            corpus.extend(_variants(keyword, rng))
+
+    lost = []
+    for message in corpus:
+        accepted = any(processor._is_match(message, item['filters'], item['whitelist_patterns'], item['field_rules'])
+                       for item in prepared)
+        if accepted and not filter_pattern_matches(pattern, message):
+            lost.append(message)
+    return lost
+
+
+def _logical_id(log_group: str, used: set) -> str:
+    base = 'Subscription' + ''.join(part.capitalize() for part in re.split(r'[^A-Za-z0-9]+', log_group) if part)
+    logical_id, n = base[:200], 2
+    while logical_id in used:
+        logical_id, n = f"{base[:200]}{n}", n + 1
+    used.add(logical_id)
+    return logical_id
+
+
+def render_template(patterns: Dict[str, str]) -> str:
+    """CloudFormation template subscribing each log group to the deployed function."""
+    lines = [
+        "AWSTemplateFormatVersion: '2010-09-09'",
+        "Description: Subscription filters generated from stream_types by src/subscription_filters.py",
+        "",
+        "Parameters:",
+        "  LogMonitorFunctionArn:",
+        "    Type: String",
+        "    Description: ARN of the LogMonitorFunction",
+        "",
+        "Resources:",
+        "  LogsInvokePermission:",
+        "    Type: AWS::Lambda::Permission",
+        "    Properties:",
+        "      Action: lambda:InvokeFunction",
+        "      FunctionName: !Ref LogMonitorFunctionArn",
+        "      Principal: logs.amazonaws.com",
+        "      SourceAccount: !Ref AWS::AccountId",
+    ]
+    used: set = set()
+    for log_group, pattern in patterns.items():
+        lines += [
+            "",
+            f"  {_logical_id(log_group, used)}:",
+            "    Type: AWS::Logs::SubscriptionFilter",
+            "    DependsOn: LogsInvokePermission",
+            "    Properties:",
+            # JSON strings are valid YAML double-quoted scalars
+            f"      LogGroupName: {json.dumps(log_group)}",
+            f"      FilterPattern: {json.dumps(pattern)}",
+            "      DestinationArn: !Ref LogMonitorFunctionArn",
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def _load_config(paths: List[str]) -> Dict[str, Any]:
+    contents = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            contents.append(f.read())
+    parsed = parse_config_content(contents[0]) if len(contents) == 1 else None
+    if is_config_artifact(parsed):
+        return unwrap_config_artifact(parsed) or {}  # type: ignore[arg-type]
+    return merge_config_fragments(contents)
+
+
+def _read_messages(path: str) -> List[str]:
+    messages = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            try:
+                raw = json.loads(line)
+                messages.append(raw['message'] if isinstance(raw, dict) else line)
+            except (ValueError, KeyError):
+                messages.append(line)
+    return messages
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate CloudWatch subscription filter patterns from stream_types")
+    parser.add_argument('--config', nargs='+', required=True, help="Config files (or a compiled artifact)")
+    parser.add_argument('--log-group', action='append', required=True, help="Subscribed log group (repeatable)")
+    parser.add_argument('--check', help="Sample messages (JSON lines with 'message', or plain text) to verify against")
+    parser.add_argument('--template', help="Write a CloudFormation template with the subscription filters")
+    args = parser.parse_args(argv)
+
+    config = _load_config(args.config)
+    messages = _read_messages(args.check) if args.check else []
+    patterns: Dict[str, str] = {}
+    failed = False
+    for log_group in args.log_group:
+        pattern, reason = build_filter_pattern(config, log_group)
+        patterns[log_group] = pattern
+        print(f"{log_group}\t{json.dumps(pattern)}\t({reason})")
+        lost = check_superset(config, log_group, pattern, messages)
+        if lost:
+            failed = True
+            for message in lost[:10]:
+                print(f"  LOST: {message!r}", file=sys.stderr)
+
+    if failed:
+        print("Filter patterns would drop matching events; template not written.", file=sys.stderr)
+        return 1
+    if args.template:
+        with open(args.template, 'w', encoding='utf-8') as f:
+            f.write(render_template(patterns))
+        print(f"Wrote {args.template}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
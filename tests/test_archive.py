@@ -0,0 +1,96 @@
+import os
+import gzip
+import json
+import base64
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.archive import LocalArchiveBackend, MatchArchive, S3ArchiveBackend, MIN_PART_SIZE
+from src.models import LogEvent, Match
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+class TestMatchArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = MatchArchive(LocalArchiveBackend(self.tmpdir.name))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_flush_writes_one_ndjson_object(self):
+        config = {'type': 'api', 'severity': 'ERROR'}
+        matches = [Match(LogEvent(str(i), 1700000000000 + i, f'ERROR {i}'), config) for i in range(100)]
+        self.archive.add(matches, '/aws/lambda/app', 'stream-1')
+
+        keys = self.archive.flush('req-1', now=1700000000)
+
+        self.assertEqual(keys, ['matches/dt=2023-11-14/log_group=%2Faws%2Flambda%2Fapp/221320-req-1.ndjson.gz'])
+        files = [os.path.join(d, f) for d, _, fs in os.walk(self.tmpdir.name) for f in fs]
+        self.assertEqual(len(files), 1)
+        with gzip.open(files[0], 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 100)
+        self.assertEqual(records[0], {
+            'log_group': '/aws/lambda/app', 'log_stream': 'stream-1', 'stream_type': 'api', 'severity': 'ERROR',
+            'event_ids': ['0'], 'timestamp': 1700000000000, 'message': 'ERROR 0'
+        })
+        # The buffer is cleared
+        self.assertEqual(self.archive.flush('req-2'), [])
+
+    def test_partitioned_by_event_date_and_log_group(self):
+        config = {'type': 'api'}
+        day = 86400 * 1000
+        self.archive.add([Match(LogEvent('1', 1700000000000, 'a'), config),
+                          Match(LogEvent('2', 1700000000000 - day, 'b'), config)], 'group-a', 's')
+        self.archive.add([Match(LogEvent('3', 1700000000000, 'c'), config)], 'group-b', 's')
+
+        keys = self.archive.flush('req-1', now=1800000000)
+
+        self.assertEqual(keys, ['matches/dt=2023-11-13/log_group=group-a/080000-req-1.ndjson.gz',
+                                'matches/dt=2023-11-14/log_group=group-a/080000-req-1.ndjson.gz',
+                                'matches/dt=2023-11-14/log_group=group-b/080000-req-1.ndjson.gz'])
+
+    def test_failed_partition_does_not_block_others(self):
+        backend = MagicMock()
+        backend.write.side_effect = [Exception('AccessDenied'), None]
+        archive = MatchArchive(backend)
+        archive.add([Match(LogEvent('1', 1700000000000, 'a'), {})], 'group-a', 's')
+        archive.add([Match(LogEvent('2', 1700000000000, 'b'), {})], 'group-b', 's')
+        with self.assertRaises(Exception):
+            archive.flush('req-1')
+        self.assertEqual(backend.write.call_count, 2)
+        self.assertEqual(len(archive), 0)
+
+class TestS3ArchiveBackend(unittest.TestCase):
+    def test_small_body_single_put(self):
+        client = MagicMock()
+        S3ArchiveBackend('bucket', client).write('k', b'x' * 100)
+        client.put_s3_object.assert_called_once_with('bucket', 'k', b'x' * 100, 'application/gzip')
+        client.put_s3_object_multipart.assert_not_called()
+
+    def test_large_body_multipart(self):
+        client = MagicMock()
+        S3ArchiveBackend('bucket', client, multipart_threshold=10, part_size=1).write('k', b'x' * 11)
+        client.put_s3_object_multipart.assert_called_once_with('bucket', 'k', b'x' * 11, MIN_PART_SIZE,
+                                                               'application/gzip')
+
+class TestHandlerArchive(unittest.TestCase):
+    def test_one_write_per_invocation(self):
+        from src import lambda_function
+        backend = MagicMock()
+        config = {"stream_types": [{"type": "api", "pattern": "^api-", "filters": ["ERROR"]}]}
+        data = {"logGroup": "g", "logStream": "api-1",
+                "logEvents": [{"id": f"arch-{i}", "timestamp": i, "message": "ERROR x"} for i in range(50)]}
+        event = {'awslogs': {'data': base64.b64encode(gzip.compress(json.dumps(data).encode())).decode()}}
+        with patch.object(lambda_function, 'archive', MatchArchive(backend)), \
+             patch.object(lambda_function.config_loader, 'load_config', return_value=config), \
+             patch.object(lambda_function, '_handle_matches'):
+            lambda_function.lambda_handler(event, MagicMock(aws_request_id='req'))
+        self.assertEqual(backend.write.call_count, 1)
+        body = backend.write.call_args[0][1]
+        self.assertEqual(len(gzip.decompress(body).splitlines()), 50)
+
+if __name__ == '__main__':
+    unittest.main()
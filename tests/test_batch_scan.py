@@ -0,0 +1,64 @@
+import json
+import random
+import unittest
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+
+class TestBatchScan(unittest.TestCase):
+    def setUp(self):
+        self.serial = LogProcessor(batch_scan_min_events=0)
+        self.batch = LogProcessor(batch_scan_min_events=1)
+        self.config = {
+            "stream_types": [
+                {
+                    "type": "api-critical",
+                    "pattern": "api-.*",
+                    "filters": ["CRITICAL"],
+                    "whitelist": ["drill"]
+                },
+                {
+                    "type": "api-error",
+                    "pattern": "api-.*",
+                    "filters": ["ERROR", "Exception"],
+                    "field_filters": ["status >= 500"],
+                    "whitelist": ["HealthCheck"]
+                }
+            ]
+        }
+
+    def _scan(self, processor, messages):
+        events = [LogEvent(str(i), i, m) for i, m in enumerate(messages)]
+        return [(m.event.id, m.config['type']) for m in processor.process_log_batch('g', 'api-1', events, self.config)]
+
+    def test_same_results_as_per_event_path(self):
+        rng = random.Random(42)
+        words = ['ok', 'error', 'ERROR', 'Critical', 'drill', 'HealthCheck', 'exception', 'info',
+                 '{"status": 503}', '{"status": 200}', 'errors', 'crit', '']
+        messages = [' '.join(rng.choice(words) for _ in range(rng.randint(0, 4))) for _ in range(500)]
+
+        self.assertEqual(self._scan(self.batch, messages), self._scan(self.serial, messages))
+
+    def test_whitelisted_event_falls_through_to_next_config(self):
+        messages = ['CRITICAL drill ERROR', 'all good', 'CRITICAL outage']
+        self.assertEqual(self._scan(self.batch, messages), [('0', 'api-error'), ('2', 'api-critical')])
+
+    def test_hit_in_last_event(self):
+        self.assertEqual(self._scan(self.batch, ['a', 'b', 'Exception']), [('2', 'api-error')])
+
+    def test_field_rules_in_batch_mode(self):
+        messages = [json.dumps({'status': 502}), json.dumps({'status': 200}), 'status 500']
+        self.assertEqual(self._scan(self.batch, messages), [('0', 'api-error')])
+
+    def test_length_changing_lowercase_falls_back(self):
+        # 'İ'.lower() is two characters long, so offsets would not line up
+        messages = ['İstanbul ok', 'ERROR İ', 'fine']
+        self.assertEqual(self._scan(self.batch, messages), self._scan(self.serial, messages))
+        self.assertEqual(self._scan(self.batch, messages), [('1', 'api-error')])
+
+    def test_many_keywords_use_regex_pass(self):
+        self.config['stream_types'][1]['filters'] = [f'code{i}' for i in range(20)] + ['ERROR']
+        messages = ['code7 failed', 'an error', 'code77', 'fine']
+        self.assertEqual(self._scan(self.batch, messages), self._scan(self.serial, messages))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from src.aws_client import AWSClient
+from src.catch_up import CatchUpScanner, CheckpointStore, STREAM_LOOKBACK_MS, catch_up, parse_time
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+class FakeLogs:
+    """In-memory stand-in for the CloudWatch Logs describe/filter APIs."""
+
+    def __init__(self, streams, page_size=2, stream_page_size=2):
+        # {group: {stream: [(timestamp, message)]}}
+        self.streams = streams
+        self.page_size = page_size
+        self.stream_page_size = stream_page_size
+        self.filter_calls = 0
+        self.fail_stream = None
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def describe_log_streams(self, logGroupName, orderBy, descending, nextToken=None):
+        streams = []
+        for name, events in self.streams[logGroupName].items():
+            entry = {'logStreamName': name}
+            if events:
+                entry['firstEventTimestamp'] = events[0][0]
+                entry['lastEventTimestamp'] = events[-1][0]
+            streams.append(entry)
+        streams.sort(key=lambda s: s.get('lastEventTimestamp', -1), reverse=True)
+        start = int(nextToken or 0)
+        page = {'logStreams': streams[start:start + self.stream_page_size]}
+        if start + self.stream_page_size < len(streams):
+            page['nextToken'] = str(start + self.stream_page_size)
+        return page
+
+    def filter_log_events(self, logGroupName, logStreamNames, startTime, endTime, nextToken=None):
+        with self.lock:
+            self.filter_calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            stream = logStreamNames[0]
+            if stream == self.fail_stream:
+                raise RuntimeError('ThrottlingException')
+            events = [(i, ts, msg) for i, (ts, msg) in enumerate(self.streams[logGroupName][stream])
+                      if startTime <= ts <= endTime]
+            start = int(nextToken or 0)
+            page = {'events': [{'eventId': f'{stream}-{i}', 'timestamp': ts, 'message': msg, 'logStreamName': stream}
+                               for i, ts, msg in events[start:start + self.page_size]]}
+            if start + self.page_size < len(events):
+                page['nextToken'] = str(start + self.page_size)
+            return page
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def fake_client(logs):
+    client = AWSClient()
+    client.logs = logs
+    return client
+
+HOUR = 3600 * 1000
+
+class TestCatchUpScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoints = CheckpointStore(os.path.join(self.tmpdir.name, 'checkpoint.json'))
+        self.start, self.end = 10 * HOUR, 12 * HOUR
+        self.logs = FakeLogs({'g': {
+            'api-1': [(self.start + i, f'ERROR {i}') for i in range(5)],
+            'api-2': [(self.start + 100 + i, f'INFO {i}') for i in range(3)],
+            'old': [(self.start - STREAM_LOOKBACK_MS - 1, 'ERROR old')],
+            'empty': []
+        }})
+        self.received = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def process(self, log_group, log_stream, events):
+        self.received.extend((log_stream, e.id, e.message) for e in events)
+        return sum('ERROR' in e.message for e in events)
+
+    def scanner(self, workers=2):
+        return CatchUpScanner(fake_client(self.logs), self.process, self.checkpoints, workers)
+
+    def test_scans_all_pages_of_streams_in_range(self):
+        stats = self.scanner().run(['g'], self.start, self.end)
+
+        self.assertTrue(stats['complete'])
+        self.assertEqual(stats['events'], 8)
+        self.assertEqual(stats['matches'], 5)
+        self.assertEqual(sorted(e[1] for e in self.received),
+                         sorted([f'api-1-{i}' for i in range(5)] + [f'api-2-{i}' for i in range(3)]))
+        self.assertLessEqual(self.logs.max_active, 2)
+
+    def test_resumes_from_checkpoint(self):
+        calls = []
+
+        def stop_after_two_pages():
+            calls.append(1)
+            return len(self.received) < 4
+
+        first = self.scanner(workers=1).run(['g'], self.start, self.end, stop_after_two_pages)
+        self.assertFalse(first['complete'])
+        seen = len(self.received)
+
+        second = self.scanner(workers=1).run(['g'], self.start, self.end)
+        self.assertTrue(second['complete'])
+        # Nothing is fetched twice
+        self.assertEqual(len(self.received), 8)
+        self.assertEqual(second['events'], 8 - seen)
+
+        # A finished range is not scanned again
+        calls_before = self.logs.filter_calls
+        self.scanner().run(['g'], self.start, self.end)
+        self.assertEqual(self.logs.filter_calls, calls_before)
+
+    def test_failed_stream_is_retried_on_rerun(self):
+        self.logs.fail_stream = 'api-2'
+        stats = self.scanner().run(['g'], self.start, self.end)
+        self.assertEqual(stats['failed'], 1)
+        self.assertFalse(stats['complete'])
+
+        self.logs.fail_stream = None
+        stats = self.scanner().run(['g'], self.start, self.end)
+        self.assertTrue(stats['complete'])
+        self.assertEqual(stats['events'], 3)
+
+    def test_new_range_starts_over(self):
+        self.scanner().run(['g'], self.start, self.end)
+        self.received = []
+        self.scanner().run(['g'], self.start, self.start + 2)
+        self.assertEqual(len(self.received), 3)
+
+class TestCatchUpPipeline(unittest.TestCase):
+    def test_events_go_through_notification_pipeline_with_dedup(self):
+        from src import lambda_function
+        logs = FakeLogs({'g': {'api-1': [(HOUR + i, 'ERROR boom' if i % 2 else 'INFO ok') for i in range(6)],
+                               'worker-1': [(HOUR, 'ERROR unrouted')]}})
+        config = {"stream_types": [{"type": "api", "pattern": "^api-", "filters": ["ERROR"]}]}
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(lambda_function, 'aws_client', fake_client(logs)), \
+             patch.object(lambda_function.config_loader, 'load_config', return_value=config), \
+             patch.object(lambda_function, '_handle_matches') as mock_handle:
+            lambda_function.ledger.mark_processed(['api-1-1'])
+            stats = catch_up(['g'], HOUR, 2 * HOUR, os.path.join(tmpdir, 'cp.json'))
+
+        self.assertTrue(stats['complete'])
+        handled = [m.event.id for call in mock_handle.call_args_list for m in call[0][0]]
+        # api-1-1 was already alerted on by the push path
+        self.assertEqual(handled, ['api-1-3', 'api-1-5'])
+
+    def test_archive_keys_per_log_group_and_day(self):
+        from src import lambda_function
+        from src.archive import LocalArchiveBackend, MatchArchive
+        day = 24 * HOUR
+        logs = FakeLogs({'g1': {'api-1': [(HOUR, 'ERROR one'), (day + HOUR, 'ERROR two')]},
+                         'g2': {'api-2': [(day + HOUR, 'ERROR three')]}})
+        config = {"stream_types": [{"type": "api", "pattern": "^api-", "filters": ["ERROR"]}]}
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch.object(lambda_function, 'aws_client', fake_client(logs)), \
+             patch.object(lambda_function, 'archive', MatchArchive(LocalArchiveBackend(tmpdir))), \
+             patch.object(lambda_function.config_loader, 'load_config', return_value=config), \
+             patch.object(lambda_function, '_handle_matches'):
+            catch_up(['g1', 'g2'], 0, 2 * day, os.path.join(tmpdir, 'cp.json'))
+            partitions = sorted(os.path.relpath(d, tmpdir) for d, _, files in os.walk(tmpdir)
+                                if any(f.endswith('.ndjson.gz') for f in files))
+
+        self.assertEqual(partitions, ['matches/dt=1970-01-01/log_group=g1',
+                                      'matches/dt=1970-01-02/log_group=g1',
+                                      'matches/dt=1970-01-02/log_group=g2'])
+
+    def test_handler_requires_s3_checkpoint(self):
+        from src import lambda_function
+        event = {'log_groups': ['g'], 'start_time': 0, 'end_time': 1}
+        for value in ('', '/tmp/cp.json'):
+            with patch.dict('os.environ', {'CATCH_UP_CHECKPOINT': value}):
+                with self.assertRaises(ValueError):
+                    lambda_function.catch_up_handler(event, None)
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time('1700000000000'), 1700000000000)
+        self.assertEqual(parse_time('2023-11-14T22:13:20Z'), 1700000000000)
+        self.assertEqual(parse_time('2023-11-15T07:13:20+09:00'), 1700000000000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, describe_target
+from src.models import LogEvent, Match
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('sns:arn', failure_threshold=3, cooldown_seconds=30, clock=self.clock)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record(False)
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.breaker.record(True)
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        with redirect_stdout(io.StringIO()) as out:
+            self.fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertIn('"CircuitOpened": 1', out.getvalue())
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_probe(self):
+        with redirect_stdout(io.StringIO()):
+            self.fail(3)
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        with redirect_stdout(io.StringIO()):
+            self.fail(3)
+            self.clock.now += 31
+            self.fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.clock.now += 29
+        self.assertFalse(self.breaker.allow())
+
+    def test_breakers_per_target(self):
+        breakers = CircuitBreakers(1, 60)
+        self.assertIs(breakers.get('slack', 'https://a'), breakers.get('slack', 'https://a'))
+        self.assertIsNot(breakers.get('slack', 'https://a'), breakers.get('slack', 'https://b'))
+        self.assertNotIn('https', describe_target('slack', 'https://hooks.slack.com/services/secret'))
+
+class TestHandlerWithBreakers(unittest.TestCase):
+    def setUp(self):
+        from src import lambda_function
+        self.lf = lambda_function
+        self.clock = FakeClock()
+        self.lf.circuit_breakers = CircuitBreakers(2, 60, clock=self.clock)
+        self.sns = MagicMock()
+        self.slack = MagicMock()
+        self.slack.render.return_value = {'blocks': []}
+        self.sns.render.return_value = {'content': {}}
+        self.sns.send_payload.side_effect = Exception('AuthorizationError')
+
+    def tearDown(self):
+        self.lf.circuit_breakers = None
+
+    def handle(self, config, count):
+        matches = [Match(LogEvent(str(i), i, 'ERROR'), config) for i in range(count)]
+        with patch.dict(self.lf.providers, {'sns': self.sns, 'slack': self.slack}), \
+             patch.object(self.lf.aws_client, 'get_context_logs', return_value=[]), \
+             patch.object(self.lf, '_enqueue_failed') as enqueue, \
+             redirect_stdout(io.StringIO()):
+            self.lf._handle_matches(matches, 'g', 's', [])
+        return enqueue
+
+    def test_open_circuit_fails_fast_to_outbox(self):
+        enqueue = self.handle({'type': 'api', 'sns_topic_arn': 'arn:topic'}, 5)
+        # Two real attempts open the circuit; the remaining sends are refused without a call
+        self.assertEqual(self.sns.send_payload.call_count, 2)
+        self.assertEqual(enqueue.call_count, 5)
+
+    def test_fallback_target(self):
+        config = {'type': 'api', 'sns_topic_arn': 'arn:topic', 'fallback_slack_webhook_url': 'https://hooks/x'}
+        enqueue = self.handle(config, 4)
+        self.assertEqual(self.sns.send_payload.call_count, 2)
+        self.assertEqual(self.slack.send_payload.call_count, 4)
+        enqueue.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.config import ConfigLoader, ARTIFACT_FORMAT
+from src.config_compiler import ConfigValidationError, compile_config, main, serialize_artifact, validate_config
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+
+YAML_SOURCE = """
+stream_types:
+  - type: api
+    log_group_pattern: ^/aws/lambda/api$
+    pattern: ^prod-
+    filters: [ERROR, Timeout]
+    whitelist: []
+"""
+
+class TestConfigCompiler(unittest.TestCase):
+    def setUp(self):
+        ConfigLoader._config_cache = None
+        ConfigLoader._cache_timestamp = 0
+
+    def tearDown(self):
+        ConfigLoader._config_cache = None
+        ConfigLoader._cache_timestamp = 0
+
+    def test_validation_collects_all_errors(self):
+        errors = validate_config({'stream_types': [
+            {'type': 'a', 'pattern': '(unclosed'},
+            {'type': 'b'},
+            {'type': 'c', 'pattern': 'x', 'whitelist': ['[bad'], 'field_filters': ['level ~ x']},
+            {'type': 'd', 'pattern': 'x', 'threshold': {'count': 0, 'window_minutes': 5}},
+            {'type': 'e', 'pattern': 'x', 'redact': ['email', 'phone']}
+        ]})
+        self.assertEqual(len(errors), 6)
+        with self.assertRaises(ConfigValidationError) as cm:
+            compile_config({'stream_types': [{'type': 'b'}]})
+        self.assertEqual(len(cm.exception.errors), 1)
+
+    def test_artifact_normalizes_and_indexes(self):
+        artifact = compile_config({'stream_types': [
+            {'type': 'api', 'log_group_pattern': '^/aws/lambda/api$', 'pattern': '^prod-', 'filters': ['ERROR'], 'whitelist': []}
+        ]})
+        self.assertEqual(artifact['format'], ARTIFACT_FORMAT)
+        st = artifact['stream_types'][0]
+        self.assertEqual(st['filters'], ['error'])
+        self.assertNotIn('whitelist', st)
+        self.assertEqual(artifact['index']['routing'], [[['exact', '/aws/lambda/api'], ['prefix', 'prod-']]])
+        # Same content, same hash
+        self.assertEqual(artifact['config_hash'], compile_config({'stream_types': [dict(st)]})['config_hash'])
+
+    def test_loader_reads_artifact_and_processor_uses_index(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, 'streams.yaml')
+            output = os.path.join(tmpdir, 'config.compiled.json')
+            with open(source, 'w') as f:
+                f.write(YAML_SOURCE)
+            with patch('sys.stderr'):
+                self.assertEqual(main([source, '-o', output, '--no-timing']), 0)
+
+            with patch.dict(os.environ, {'CONFIG_SOURCE': 'FILE', 'CONFIG_FILE_PATH': output}):
+                config = ConfigLoader(aws_client=MagicMock()).load_config()
+
+        self.assertEqual(config['stream_types'][0]['type'], 'api')
+        self.assertIn('routing', config['_index'])
+        processor = LogProcessor(batch_scan_min_events=0)
+        with patch('src.routing.classify_pattern', side_effect=AssertionError("classified at runtime")):
+            matches = processor.process_log_batch('/aws/lambda/api', 'prod-1', [LogEvent('1', 0, 'request Timeout')], config)
+        self.assertEqual(len(matches), 1)
+
+    def test_loader_unwraps_artifact_from_s3(self):
+        artifact = serialize_artifact(compile_config({'stream_types': [{'type': 'db', 'pattern': 'db'}]}))
+        mock_aws = MagicMock()
+        mock_aws.get_s3_object.return_value = artifact
+        with patch.dict(os.environ, {'CONFIG_SOURCE': 'S3', 'S3_BUCKET': 'b', 'S3_KEY': 'k'}):
+            config = ConfigLoader(aws_client=mock_aws).load_config()
+        self.assertEqual([st['type'] for st in config['stream_types']], ['db'])
+
+    def test_loader_rejects_unknown_artifact_version(self):
+        artifact = compile_config({'stream_types': [{'type': 'db', 'pattern': 'db'}]})
+        artifact['version'] = 99
+        with patch.dict(os.environ, {'CONFIG_SOURCE': 'ENV', 'STREAM_CONFIG': json.dumps(artifact)}):
+            self.assertEqual(ConfigLoader(aws_client=MagicMock()).load_config(), {})
+
+    def test_cli_reports_errors(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'stream_types': [{'type': 'x', 'pattern': '('}]}, f)
+        try:
+            with patch('sys.stderr'):
+                self.assertEqual(main([f.name, '-o', '-', '--no-timing']), 1)
+        finally:
+            os.remove(f.name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+from src.config import ConfigLoader, config_change_source, env_float, env_int, is_control_event
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+S3_ENV = {'CONFIG_SOURCE': 'S3', 'S3_BUCKET': 'cfg-bucket', 'S3_KEY': 'monitor/config file.yaml'}
+
+def s3_notification(bucket, key):
+    return {'Records': [{'eventSource': 'aws:s3', 'eventName': 'ObjectCreated:Put',
+                         's3': {'bucket': {'name': bucket}, 'object': {'key': key}}}]}
+
+class TestConfigChangeSource(unittest.TestCase):
+    def test_s3_notification(self):
+        with patch.dict(os.environ, S3_ENV):
+            self.assertEqual(config_change_source(s3_notification('cfg-bucket', 'monitor/config+file.yaml')),
+                             's3://cfg-bucket/monitor/config file.yaml')
+            self.assertIsNone(config_change_source(s3_notification('cfg-bucket', 'monitor/other.yaml')))
+
+    def test_eventbridge_s3(self):
+        event = {'source': 'aws.s3', 'detail-type': 'Object Created',
+                 'detail': {'bucket': {'name': 'cfg-bucket'}, 'object': {'key': 'monitor/config file.yaml'}}}
+        with patch.dict(os.environ, S3_ENV):
+            self.assertTrue(is_control_event(event))
+            self.assertIsNotNone(config_change_source(event))
+
+    def test_ssm_change(self):
+        event = {'source': 'aws.ssm', 'detail-type': 'Parameter Store Change',
+                 'detail': {'name': '/monitor/api', 'operation': 'Update'}}
+        with patch.dict(os.environ, {'CONFIG_SOURCE': 'SSM', 'SSM_PARAMETER_NAME': '/monitor/'}):
+            self.assertEqual(config_change_source(event), 'ssm:/monitor/api')
+        with patch.dict(os.environ, {'CONFIG_SOURCE': 'SSM', 'SSM_PARAMETER_NAME': '/monitor/other'}):
+            self.assertIsNone(config_change_source(event))
+
+    def test_log_data_is_not_a_control_event(self):
+        self.assertFalse(is_control_event({'awslogs': {'data': ''}}))
+        self.assertTrue(is_control_event(s3_notification('b', 'k')))
+
+    def test_malformed_ttl_falls_back_to_default(self):
+        with patch.dict(os.environ, {'CONFIG_CACHE_TTL_SECONDS': '5m'}):
+            self.assertEqual(env_int('CONFIG_CACHE_TTL_SECONDS', 300), 300)
+        with patch.dict(os.environ, {'CONFIG_CACHE_TTL_SECONDS': '3600'}):
+            self.assertEqual(env_int('CONFIG_CACHE_TTL_SECONDS', 300), 3600)
+
+    def test_env_float(self):
+        with patch.dict(os.environ, {'LOGS_API_RATE': '2.5', 'MEMORY_BUDGET_MB': '128MB'}):
+            self.assertEqual(env_float('LOGS_API_RATE', 0), 2.5)
+            self.assertEqual(env_float('MEMORY_BUDGET_MB', 0), 0)
+            self.assertEqual(env_float('REGEX_BUDGET_MS', 50), 50)
+
+class TestHandlerReload(unittest.TestCase):
+    def setUp(self):
+        from src import lambda_function
+        self.lf = lambda_function
+        ConfigLoader._config_cache = None
+
+    def tearDown(self):
+        ConfigLoader.invalidate()
+
+    def test_change_event_reloads_config_and_rules(self):
+        old = {'stream_types': [{'type': 'old', 'pattern': '^api-', 'filters': ['ERROR']}]}
+        new = '{"stream_types": [{"type": "new", "pattern": "^api-", "filters": ["FATAL"]}]}'
+        ConfigLoader._config_cache = old
+        ConfigLoader._cache_timestamp = 1e12
+        self.lf.log_processor.routes('g', 'api-1', old)
+        with patch.dict(os.environ, S3_ENV), \
+             patch.object(self.lf.config_loader.aws_client, 'get_s3_object', return_value=new) as mock_get:
+            self.lf.lambda_handler(s3_notification('cfg-bucket', 'monitor/config+file.yaml'), None)
+        mock_get.assert_called_once_with('cfg-bucket', 'monitor/config file.yaml')
+        self.assertEqual(ConfigLoader._config_cache['stream_types'][0]['type'], 'new')
+        self.assertIsNone(self.lf.log_processor._routing_index)
+
+    def test_unrelated_event_keeps_cache(self):
+        cached = {'stream_types': []}
+        ConfigLoader._config_cache = cached
+        with patch.dict(os.environ, S3_ENV):
+            self.lf.lambda_handler(s3_notification('other-bucket', 'x'), None)
+        self.assertIs(ConfigLoader._config_cache, cached)
+
+    def test_recycles_other_containers(self):
+        aws_client = MagicMock()
+        env = dict(S3_ENV, CONFIG_RELOAD_ALL_CONTAINERS='true', AWS_LAMBDA_FUNCTION_NAME='monitor')
+        with patch.dict(os.environ, env), patch.object(self.lf, 'aws_client', aws_client), \
+             patch.object(self.lf.config_loader, 'load_config'):
+            self.lf.lambda_handler(s3_notification('cfg-bucket', 'monitor/config+file.yaml'), None)
+        args = aws_client.set_function_environment_variable.call_args[0]
+        self.assertEqual(args[:2], ('monitor', 'CONFIG_GENERATION'))
+
+if __name__ == '__main__':
+    unittest.main()
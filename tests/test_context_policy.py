@@ -0,0 +1,80 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.circuit_breaker import CircuitBreakers
+from src.config_compiler import validate_config
+from src.context_policy import ContextPolicy, context_policy_for
+from src.log_processor import Match
+from src.models import LogEvent
+
+class TestContextPolicy(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(ContextPolicy.from_config(None).events, 10)
+        self.assertFalse(ContextPolicy.from_config('none').enabled)
+        self.assertEqual(ContextPolicy.from_config({'events': 3}).events, 3)
+        window = ContextPolicy.from_config({'window_seconds': 30})
+        self.assertEqual((window.events, window.window_ms), (100, 30000))
+        for invalid in ('all', {'events': -1}, {'events': 'x'}, {'window_seconds': 0}):
+            with self.assertRaises(ValueError):
+                ContextPolicy.from_config(invalid)
+
+    def test_invalid_setting_falls_back_to_default(self):
+        self.assertEqual(context_policy_for({'type': 'api', 'context': 'all'}).events, 10)
+
+    def test_fetch(self):
+        aws_client = MagicMock()
+        aws_client.get_context_logs.return_value = [{'eventId': '1', 'timestamp': 95000, 'message': 'before'}]
+        events = ContextPolicy.from_config({'window_seconds': 10, 'events': 20}).fetch(aws_client, 'g', 's', 100000)
+        aws_client.get_context_logs.assert_called_once_with('g', 's', 100000, 20, 90000)
+        self.assertEqual([e.message for e in events], ['before'])
+
+        aws_client.reset_mock()
+        self.assertEqual(ContextPolicy.from_config('none').fetch(aws_client, 'g', 's', 100000), [])
+        aws_client.get_context_logs.assert_not_called()
+
+    def test_validated_by_compiler(self):
+        config = {'stream_types': [{'type': 'api', 'pattern': 'x', 'context': {'window_seconds': -5}}]}
+        self.assertTrue(any('window_seconds' in error for error in validate_config(config)))
+
+class TestLazyContextFetch(unittest.TestCase):
+    def setUp(self):
+        from src import lambda_function
+        self.lf = lambda_function
+        self.sns = MagicMock()
+        self.sns.render.return_value = {'content': {}}
+
+    def tearDown(self):
+        self.lf.circuit_breakers = None
+
+    def handle(self, config, count=1):
+        matches = [Match(LogEvent(str(i), 100000 + i, 'ERROR'), config) for i in range(count)]
+        with patch.dict(self.lf.providers, {'sns': self.sns}), \
+             patch.object(self.lf.aws_client, 'get_context_logs', return_value=[]) as fetch, \
+             patch.object(self.lf, '_enqueue_failed'), \
+             redirect_stdout(io.StringIO()):
+            self.lf._handle_matches(matches, 'g', 's', [])
+        return fetch
+
+    def test_policy_applied(self):
+        fetch = self.handle({'type': 'api', 'sns_topic_arn': 'arn:topic', 'context': {'events': 3}})
+        fetch.assert_called_once_with('g', 's', 100000, 3, None)
+
+    def test_no_fetch_without_target_or_context(self):
+        self.handle({'type': 'api'}).assert_not_called()
+        self.handle({'type': 'api', 'sns_topic_arn': 'arn:topic', 'context': 'none'}).assert_not_called()
+
+    def test_no_fetch_while_circuit_open_without_fallback(self):
+        self.lf.circuit_breakers = CircuitBreakers(1, 60)
+        self.sns.send_payload.side_effect = Exception('AuthorizationError')
+        fetch = self.handle({'type': 'api', 'sns_topic_arn': 'arn:topic'}, 3)
+        # Only the send that opened the circuit had its context fetched
+        self.assertEqual(fetch.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import base64
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+from src.config import ConfigLoader
+from src.payload import peek_log_source
+from src.routing import NegativeRoutingCache
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+def compress(data):
+    return gzip.compress(json.dumps(data).encode('utf-8'))
+
+def payload(log_group, log_stream, count=3):
+    return {
+        "messageType": "DATA_MESSAGE",
+        "owner": "123456789012",
+        "logGroup": log_group,
+        "logStream": log_stream,
+        "subscriptionFilters": ["filter"],
+        "logEvents": [{"id": str(i), "timestamp": i, "message": f"[ERROR] event {i}"} for i in range(count)]
+    }
+
+class TestPeekLogSource(unittest.TestCase):
+    def test_reads_group_and_stream(self):
+        data = payload('/aws/lambda/app', 'api-"quoted"/1', count=5000)
+        self.assertEqual(peek_log_source(compress(data)), ('/aws/lambda/app', 'api-"quoted"/1'))
+
+    def test_ignores_keys_inside_events(self):
+        data = {"logEvents": [{"message": '{"logGroup": "fake", "logStream": "fake"}'}],
+                "logGroup": "real", "logStream": "real"}
+        self.assertIsNone(peek_log_source(compress(data)))
+
+    def test_invalid_or_truncated_input(self):
+        self.assertIsNone(peek_log_source(b'not gzip'))
+        self.assertIsNone(peek_log_source(compress(payload('g' * 5000, 's'))))
+
+class TestNegativeRoutingCache(unittest.TestCase):
+    def test_version_change_clears(self):
+        cache = NegativeRoutingCache()
+        cache.add('v1', 'g', 's')
+        self.assertTrue(cache.contains('v1', 'g', 's'))
+        self.assertFalse(cache.contains('v2', 'g', 's'))
+        cache.add('v2', 'g', 'other')
+        self.assertFalse(cache.contains('v2', 'g', 's'))
+
+class TestHandlerShortCircuit(unittest.TestCase):
+    def setUp(self):
+        from src import lambda_function
+        self.lf = lambda_function
+        self.lf.unrouted_streams = NegativeRoutingCache()
+        self.config = {"stream_types": [{"type": "api", "pattern": "^api-", "filters": ["ERROR"]}]}
+
+    def invoke(self, log_stream):
+        data = base64.b64encode(compress(payload('/aws/lambda/app', log_stream))).decode('utf-8')
+        self.lf.lambda_handler({'awslogs': {'data': data}}, None)
+
+    def test_unmonitored_stream_is_not_parsed(self):
+        with patch.object(self.lf.config_loader, 'load_config', return_value=self.config), \
+             patch.object(self.lf.gzip, 'decompress', wraps=gzip.decompress) as mock_decompress, \
+             patch.object(self.lf.log_processor, 'routes', wraps=self.lf.log_processor.routes) as mock_routes:
+            self.invoke('worker-1')
+            self.invoke('worker-1')
+        mock_decompress.assert_not_called()
+        # The second invocation is answered by the negative cache
+        self.assertEqual(mock_routes.call_count, 1)
+
+    def test_config_reload_invalidates_cache(self):
+        with patch.object(self.lf.config_loader, 'load_config', return_value=self.config):
+            self.invoke('worker-1')
+        ConfigLoader._load_count += 1
+        routed = {"stream_types": [{"type": "worker", "pattern": "^worker-", "filters": ["ERROR"]}]}
+        with patch.object(self.lf.config_loader, 'load_config', return_value=routed), \
+             patch.object(self.lf.aws_client, 'get_context_logs', return_value=[]), \
+             patch.object(self.lf, '_handle_matches') as mock_handle:
+            self.invoke('worker-1')
+        mock_handle.assert_called_once()
+
+    def test_monitored_stream_is_processed(self):
+        with patch.object(self.lf.config_loader, 'load_config', return_value=self.config), \
+             patch.object(self.lf, '_handle_matches') as mock_handle:
+            self.invoke('api-1')
+        self.assertEqual(len(mock_handle.call_args[0][0]), 3)
+
+if __name__ == '__main__':
+    unittest.main()
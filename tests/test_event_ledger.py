@@ -0,0 +1,143 @@
+import os
+import json
+import gzip
+import base64
+import unittest
+from unittest.mock import MagicMock, patch
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.event_ledger import ProcessedEventLedger, DynamoDBLedgerStore
+from src.models import LogEvent, Match
+
+class TestProcessedEventLedger(unittest.TestCase):
+    def test_filter_unprocessed(self):
+        ledger = ProcessedEventLedger(max_entries=10)
+        ledger.mark_processed(['e1'])
+
+        events = [LogEvent('e1', 0, 'a'), LogEvent('e2', 0, 'b'), LogEvent(None, 0, 'no id')]
+        remaining = ledger.filter_unprocessed(events)
+
+        self.assertEqual([e.id for e in remaining], ['e2', None])
+
+    def test_bounded_lru(self):
+        ledger = ProcessedEventLedger(max_entries=2)
+        ledger.mark_processed(['e1', 'e2'])
+        # Touch e1 so e2 becomes the oldest entry
+        ledger.filter_unprocessed([LogEvent('e1', 0, '')])
+        ledger.mark_processed(['e3'])
+
+        self.assertEqual(len(ledger), 2)
+        self.assertIn('e1', ledger)
+        self.assertNotIn('e2', ledger)
+        self.assertIn('e3', ledger)
+
+    def test_shared_store(self):
+        store = MagicMock()
+        store.contains_many.return_value = {'e2'}
+        ledger = ProcessedEventLedger(store=store)
+
+        # Plain events never go to the store
+        remaining = ledger.filter_unprocessed([LogEvent('e1', 0, ''), LogEvent('e2', 0, '')])
+        self.assertEqual(len(remaining), 2)
+        store.contains_many.assert_not_called()
+
+        matches = ledger.filter_matches([Match(LogEvent('e1', 0, ''), {}), Match(LogEvent('e2', 0, ''), {})])
+        store.contains_many.assert_called_once_with(['e1', 'e2'])
+        self.assertEqual([m.event.id for m in matches], ['e1'])
+        self.assertIn('e2', ledger)
+
+        ledger.mark_processed(['e1'])
+        store.add_many.assert_called_with(['e1'])
+
+    def test_store_failure_does_not_block_processing(self):
+        store = MagicMock()
+        store.contains_many.side_effect = Exception("throttled")
+        ledger = ProcessedEventLedger(store=store)
+
+        remaining = ledger.filter_matches([Match(LogEvent('e1', 0, ''), {})])
+        self.assertEqual(len(remaining), 1)
+
+    def test_dynamodb_store(self):
+        mock_aws = MagicMock()
+        store = DynamoDBLedgerStore('ledger', mock_aws, ttl_seconds=60)
+        store.add_many(['e1'])
+
+        table, items = mock_aws.batch_put_dynamodb_items.call_args[0]
+        self.assertEqual(table, 'ledger')
+        self.assertEqual(items[0]['event_id'], {'S': 'e1'})
+        self.assertIn('expires_at', items[0])
+
+    @patch('src.aws_client.time.sleep')
+    def test_unprocessed_items_back_off_and_give_up(self, sleep):
+        from src.aws_client import DYNAMODB_BATCH_MAX_ATTEMPTS, AWSClient
+        client = AWSClient.__new__(AWSClient)
+        client.dynamodb = MagicMock()
+        unprocessed = {'ledger': [{'PutRequest': {'Item': {'event_id': {'S': 'e1'}}}}]}
+        client.dynamodb.batch_write_item.return_value = {'UnprocessedItems': unprocessed}
+        client.batch_put_dynamodb_items('ledger', [{'event_id': {'S': 'e1'}}])
+        self.assertEqual(client.dynamodb.batch_write_item.call_count, DYNAMODB_BATCH_MAX_ATTEMPTS)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(delays, sorted(delays))
+        self.assertEqual(len(delays), DYNAMODB_BATCH_MAX_ATTEMPTS - 1)
+
+        client.dynamodb.batch_get_item.side_effect = [
+            {'Responses': {'ledger': [{'event_id': {'S': 'e1'}}]},
+             'UnprocessedKeys': {'ledger': {'Keys': [{'event_id': {'S': 'e2'}}]}}},
+            {'Responses': {'ledger': [{'event_id': {'S': 'e2'}}]}},
+        ]
+        self.assertEqual(client.batch_get_dynamodb_keys('ledger', 'event_id', ['e1', 'e2']), {'e1', 'e2'})
+
+class TestHandlerIdempotency(unittest.TestCase):
+    def setUp(self):
+        from src import lambda_function
+        self.lf = lambda_function
+        self.lf.ledger = ProcessedEventLedger()
+        self.config = {
+            "stream_types": [{
+                "type": "api",
+                "pattern": "api-.*",
+                "filters": ["ERROR"],
+                "sns_topic_arn": "arn:aws:sns:us-east-1:123456789012:topic"
+            }]
+        }
+
+    def _event(self):
+        data = {
+            "logGroup": "/aws/lambda/app",
+            "logStream": "api-1",
+            "logEvents": [
+                {"id": "e1", "timestamp": 1600000000000, "message": "[ERROR] boom"},
+                {"id": "e2", "timestamp": 1600000001000, "message": "[INFO] ok"}
+            ]
+        }
+        payload = base64.b64encode(gzip.compress(json.dumps(data).encode('utf-8'))).decode('utf-8')
+        return {'awslogs': {'data': payload}}
+
+    def test_retry_does_not_realert(self):
+        with patch.object(self.lf.config_loader, 'load_config', return_value=self.config), \
+             patch.object(self.lf.aws_client, 'get_context_logs', return_value=[]) as mock_context, \
+             patch.object(self.lf.sns_provider, 'send_payload') as mock_send:
+            self.lf.lambda_handler(self._event(), None)
+            self.lf.lambda_handler(self._event(), None)
+
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(mock_context.call_count, 1)
+
+    def test_coalesced_record_marks_every_line(self):
+        self.config['stream_types'][0]['multiline'] = {'start_pattern': r'\['}
+        with patch.object(self.lf.config_loader, 'load_config', return_value=self.config), \
+             patch.object(self.lf.aws_client, 'get_context_logs', return_value=[]), \
+             patch.object(self.lf.sns_provider, 'send_payload'):
+            event = self._event()
+            data = json.loads(gzip.decompress(base64.b64decode(event['awslogs']['data'])))
+            data['logEvents'][1]['message'] = '  at handler'
+            payload = base64.b64encode(gzip.compress(json.dumps(data).encode('utf-8'))).decode('utf-8')
+            self.lf.lambda_handler({'awslogs': {'data': payload}}, None)
+
+        self.assertIn('e1', self.lf.ledger)
+        self.assertIn('e2', self.lf.ledger)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from unittest.mock import patch
+from src.json_rules import LazyJson, compile_field_rule
+from src.log_processor import LogProcessor
+
+class TestFieldRules(unittest.TestCase):
+    def test_in_rule(self):
+        rule = compile_field_rule('level in [ERROR, FATAL]')
+        self.assertTrue(rule.matches('{"level": "ERROR", "msg": "x"}'))
+        self.assertTrue(rule.matches('{"level": "fatal"}'))
+        self.assertFalse(rule.matches('{"level": "INFO"}'))
+
+    def test_numeric_rule(self):
+        rule = compile_field_rule('status >= 500')
+        self.assertTrue(rule.matches('{"status": 503}'))
+        self.assertTrue(rule.matches('{"status": "500"}'))
+        self.assertFalse(rule.matches('{"status": 404}'))
+        self.assertFalse(rule.matches('{"status": "n/a"}'))
+
+    def test_nested_field_and_dict_form(self):
+        rule = compile_field_rule({'field': 'http.status', 'op': '==', 'value': 502})
+        self.assertTrue(rule.matches('{"http": {"status": 502}}'))
+        self.assertFalse(rule.matches('{"status": 502}'))
+
+    def test_precheck_skips_parsing(self):
+        rule = compile_field_rule('level == ERROR')
+        with patch('src.json_rules.json.loads') as mock_loads:
+            self.assertFalse(rule.matches('plain ERROR line'))
+            self.assertFalse(rule.matches('{"severity": "ERROR"}'))
+            mock_loads.assert_not_called()
+
+    def test_invalid_rules(self):
+        for rule in ['level', 'status >= high', 'level in ERROR', {'field': 'x'}]:
+            with self.assertRaises(ValueError):
+                compile_field_rule(rule)
+
+class TestProcessorFieldFilters(unittest.TestCase):
+    def setUp(self):
+        self.processor = LogProcessor()
+        self.config = {
+            "stream_types": [
+                {
+                    "type": "api-5xx",
+                    "pattern": "api-.*",
+                    "field_filters": ["status >= 500"],
+                    "whitelist": ["HealthCheck"]
+                },
+                {
+                    "type": "api-error",
+                    "pattern": "api-.*",
+                    "field_filters": ["level in [ERROR, FATAL]"]
+                }
+            ]
+        }
+
+    def test_field_filters_route_to_first_matching_config(self):
+        events = [
+            {'message': json.dumps({'level': 'INFO', 'status': 503})},
+            {'message': json.dumps({'level': 'ERROR', 'status': 200})},
+            {'message': json.dumps({'level': 'INFO', 'msg': 'an ERROR string'})},
+            {'message': json.dumps({'status': 500, 'path': '/HealthCheck'})}
+        ]
+        matches = self.processor.process_log_batch('group', 'api-1', events, self.config)
+        self.assertEqual([m.config['type'] for m in matches], ['api-5xx', 'api-error'])
+
+    def test_message_parsed_at_most_once(self):
+        events = [{'message': json.dumps({'level': 'INFO', 'status': 200})}]
+        real_loads = json.loads
+        with patch('src.json_rules.json.loads', side_effect=real_loads) as mock_loads:
+            matches = self.processor.process_log_batch('group', 'api-1', events, self.config)
+        self.assertEqual(matches, [])
+        self.assertEqual(mock_loads.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import io
+import os
+import json
+import random
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+from src.latency import (DELIVERY_LAG, HANDLER_START_LAG, INGESTION_LAG, LatencyHistogram, LatencyRecorder,
+                         bucket_index, bucket_upper_bound)
+from src.models import LogEvent, Match
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_buckets_are_contiguous_with_bounded_error(self):
+        previous = -1
+        for value in list(range(0, 5000)) + [10 ** 6, 10 ** 9]:
+            index = bucket_index(value)
+            self.assertGreaterEqual(index, previous)
+            previous = index
+            upper = bucket_upper_bound(index)
+            self.assertGreaterEqual(upper, value)
+            self.assertLessEqual(upper - value, max(1, value) / 32)
+
+    def test_percentiles(self):
+        rng = random.Random(7)
+        values = [rng.randint(0, 60000) for _ in range(10000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        values.sort()
+        for p in (50, 95, 99):
+            exact = values[int(len(values) * p / 100) - 1]
+            self.assertAlmostEqual(histogram.percentile(p), exact, delta=exact / 32 + 1)
+        self.assertEqual(histogram.percentile(100), values[-1])
+
+    def test_small_samples_exact(self):
+        histogram = LatencyHistogram()
+        for value in (5, 1, 3):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 3)
+        self.assertEqual(histogram.percentile(99), 5)
+        histogram.record(-20)  # clock skew
+        self.assertEqual(histogram.percentile(1), 0)
+
+class TestLatencyRecorder(unittest.TestCase):
+    def test_flush_emits_percentiles_per_target_and_severity(self):
+        recorder = LatencyRecorder()
+        for lag in range(1, 101):
+            recorder.record_delivery('sns:arn', 'error', 0, 10, handler_started_ms=lag * 10, delivered_ms=lag * 10 + 5)
+        recorder.record_delivery('slack:ab12', None, 0, None, handler_started_ms=100, delivered_ms=200)
+
+        with redirect_stdout(io.StringIO()) as out:
+            recorder.flush()
+        documents = {(d['Target'], d['Severity']): d for d in map(json.loads, out.getvalue().splitlines())}
+
+        sns = documents[('sns:arn', 'ERROR')]
+        self.assertEqual(sns['DeliveredNotifications'], 100)
+        self.assertEqual(sns[f'{INGESTION_LAG}P99'], 10)
+        self.assertAlmostEqual(sns[f'{HANDLER_START_LAG}P50'], 500, delta=500 / 32)
+        self.assertAlmostEqual(sns[f'{DELIVERY_LAG}P95'], 955, delta=955 / 32)
+        self.assertEqual(sns['ProcessingTimeP99'], 5)
+        self.assertEqual(sns['_aws']['CloudWatchMetrics'][0]['Namespace'], 'CloudWatchLogMonitor/Latency')
+
+        slack = documents[('slack:ab12', 'CRITICAL')]
+        self.assertNotIn(f'{INGESTION_LAG}P50', slack)
+        self.assertEqual(recorder.histograms, {})
+
+class TestHandlerRecordsLatency(unittest.TestCase):
+    def test_delivered_notifications_are_recorded(self):
+        from src import lambda_function
+        recorder = LatencyRecorder()
+        provider = MagicMock()
+        provider.render.return_value = {}
+        config = {'type': 'api', 'severity': 'WARNING', 'sns_topic_arn': 'arn:topic'}
+        matches = [Match(LogEvent('1', 1000, 'ERROR', ingestion_time=1500), config)]
+        with patch.object(lambda_function, 'latency_recorder', recorder), \
+             patch.dict(lambda_function.providers, {'sns': provider}), \
+             patch.object(lambda_function.aws_client, 'get_context_logs', return_value=[]):
+            lambda_function._handle_matches(matches, 'g', 's', [], started_ms=3000)
+        self.assertEqual(recorder.histograms[('sns:arn:topic', 'WARNING', INGESTION_LAG)].max, 500)
+        self.assertEqual(recorder.histograms[('sns:arn:topic', 'WARNING', HANDLER_START_LAG)].max, 2000)
+        self.assertEqual(recorder.histograms[('sns:arn:topic', 'WARNING', DELIVERY_LAG)].count, 1)
+
+    def test_backfilled_notifications_are_kept_apart(self):
+        from src import lambda_function
+        live, backfill = LatencyRecorder(), LatencyRecorder({'Source': 'CatchUp'})
+        provider = MagicMock()
+        provider.render.return_value = {}
+        config = {'type': 'api', 'sns_topic_arn': 'arn:topic'}
+        matches = [Match(LogEvent('1', 1000, 'ERROR', ingestion_time=1500), config)]
+        with patch.object(lambda_function, 'latency_recorder', live), \
+             patch.object(lambda_function, 'catch_up_latency_recorder', backfill), \
+             patch.dict(lambda_function.providers, {'sns': provider}), \
+             patch.object(lambda_function.aws_client, 'get_context_logs', return_value=[]):
+            lambda_function._handle_matches(matches, 'g', 's', [], started_ms=3000, backfill=True)
+        self.assertEqual(live.histograms, {})
+        out = io.StringIO()
+        with redirect_stdout(out):
+            backfill.flush()
+        document = json.loads(out.getvalue())
+        self.assertEqual(document['Source'], 'CatchUp')
+        self.assertEqual(document['_aws']['CloudWatchMetrics'][0]['Dimensions'], [['Target', 'Severity', 'Source']])
+
+if __name__ == '__main__':
+    unittest.main()
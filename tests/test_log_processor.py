@@ -25,7 +25,7 @@ class TestLogProcessor(unittest.TestCase):
         events = [{'message': 'Something went wrong ERROR'}]
         matches = self.processor.process_log_batch('group', 'api-1', events, self.config)
         self.assertEqual(len(matches), 1)
-        self.assertEqual(matches[0]['config']['type'], 'api')
+        self.assertEqual(matches[0].config['type'], 'api')
 
     def test_whitelist(self):
         events = [{'message': 'This is an ERROR but it is a HealthCheck failure'}]
@@ -0,0 +1,119 @@
+import io
+import os
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+from src.memory_governor import (DIGEST, DROP_CONTEXT, NORMAL, TRUNCATE, MemoryGovernor, create_memory_governor,
+                                 read_rss_bytes, truncate_message)
+from src.models import LogEvent, Match
+
+# lambda_function creates boto3 clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+MiB = 2 ** 20
+
+class FakeRss:
+    def __init__(self, mib):
+        self.bytes = mib * MiB
+
+    def __call__(self):
+        return self.bytes
+
+class TestMemoryGovernor(unittest.TestCase):
+    def test_levels_from_rss_and_buffered_bytes(self):
+        rss = FakeRss(60)
+        governor = MemoryGovernor(100 * MiB, rss_reader=rss)
+        self.assertEqual(governor.level(), NORMAL)
+        self.assertEqual(governor.level(15 * MiB), DROP_CONTEXT)
+        rss.bytes = 85 * MiB
+        self.assertEqual(governor.level(), TRUNCATE)
+        self.assertEqual(governor.level(5 * MiB), DIGEST)
+
+    def test_level_only_rises_within_invocation(self):
+        rss = FakeRss(85)
+        governor = MemoryGovernor(100 * MiB, rss_reader=rss)
+        self.assertEqual(governor.level(), TRUNCATE)
+        rss.bytes = 10 * MiB
+        self.assertEqual(governor.level(), TRUNCATE)
+        governor.flush()
+        self.assertEqual(governor.level(), NORMAL)
+
+    def test_flush_emits_only_after_degradation(self):
+        governor = MemoryGovernor(100 * MiB, rss_reader=FakeRss(95))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            governor.flush()
+            governor.level()
+            governor.record_degraded(TRUNCATE)
+            governor.record_degraded(DIGEST, 4)
+            governor.record_degraded(NORMAL)
+            governor.flush()
+        document = json.loads(out.getvalue())
+        self.assertEqual(document['Level'], 'Digest')
+        self.assertEqual(document['TruncateNotifications'], 1)
+        self.assertEqual(document['DigestNotifications'], 4)
+        self.assertEqual(document['PeakMemoryUsed'], 95 * MiB)
+
+    def test_helpers(self):
+        self.assertEqual(truncate_message('x' * 10, 4), 'xxxx... [6 characters truncated]')
+        self.assertEqual(truncate_message('short'), 'short')
+        rss = read_rss_bytes()
+        if rss is not None:
+            self.assertGreater(rss, MiB)
+        with patch.dict('os.environ', {}, clear=True):
+            self.assertIsNone(create_memory_governor())
+        with patch.dict('os.environ', {'MEMORY_BUDGET_MB': '128'}):
+            self.assertEqual(create_memory_governor().budget_bytes, 128 * MiB)
+        # A malformed budget is logged and leaves the governor off instead of failing the import
+        with patch.dict('os.environ', {'MEMORY_BUDGET_MB': '128MB'}), self.assertLogs(level='WARNING'):
+            self.assertIsNone(create_memory_governor())
+
+class TestDegradedNotifications(unittest.TestCase):
+    def setUp(self):
+        from src import lambda_function
+        self.lf = lambda_function
+        self.rss = FakeRss(0)
+        self.lf.memory_governor = MemoryGovernor(100 * MiB, rss_reader=self.rss)
+        self.sns = MagicMock()
+        self.sns.render.return_value = {'content': {}}
+        self.config = {'type': 'api', 'sns_topic_arn': 'arn:topic'}
+
+    def tearDown(self):
+        self.lf.memory_governor = None
+
+    def handle(self, matches):
+        handled = []
+        with patch.dict(self.lf.providers, {'sns': self.sns}), \
+             patch.object(self.lf.aws_client, 'get_context_logs', return_value=[]) as fetch, \
+             redirect_stdout(io.StringIO()):
+            self.lf._handle_matches(matches, 'g', 's', handled)
+        return fetch, handled
+
+    def rendered(self):
+        return [call.args[0] for call in self.sns.render.call_args_list]
+
+    def test_drop_context_then_truncate(self):
+        self.rss.bytes = 75 * MiB
+        fetch, _ = self.handle([Match(LogEvent('1', 1, 'E' * 1000), self.config)])
+        fetch.assert_not_called()
+        self.assertEqual(len(self.rendered()[0].matched_event.message), 1000)
+
+        self.rss.bytes = 85 * MiB
+        self.handle([Match(LogEvent('2', 2, 'E' * 1000), self.config)])
+        self.assertLess(len(self.rendered()[1].matched_event.message), 600)
+        self.assertEqual(self.lf.memory_governor.degraded, {DROP_CONTEXT: 1, TRUNCATE: 1})
+
+    def test_digest_covers_remaining_matches(self):
+        other = {'type': 'db', 'sns_topic_arn': 'arn:db'}
+        matches = [Match(LogEvent(str(i), i, 'ERROR'), self.config if i % 2 else other) for i in range(6)]
+        self.rss.bytes = 95 * MiB
+        _, handled = self.handle(matches)
+        data = self.rendered()
+        self.assertEqual(len(data), 2)
+        self.assertIn('3 matches', data[0].summary)
+        self.assertEqual(sorted(handled), [str(i) for i in range(6)])
+        self.assertEqual(self.lf.memory_governor.degraded, {DIGEST: 6})
+
+if __name__ == '__main__':
+    unittest.main()
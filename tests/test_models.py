@@ -0,0 +1,45 @@
+import json
+import unittest
+from unittest.mock import patch
+from src.models import LogEvent, Match, NotificationData, decode_log_object
+
+class TestModels(unittest.TestCase):
+    def test_timestamp_jst_is_lazy(self):
+        event = LogEvent('e1', 1600000000000, 'msg')
+        with patch('src.models.to_jst_str', return_value='2020-09-13 21:26:40') as mock_fmt:
+            self.assertEqual(event.timestamp_jst, '2020-09-13 21:26:40')
+            self.assertEqual(event.timestamp_jst, '2020-09-13 21:26:40')
+        mock_fmt.assert_called_once_with(1600000000000)
+
+    def test_timestamp_jst_value(self):
+        self.assertEqual(LogEvent(None, 1600000000000, '').timestamp_jst, '2020-09-13 21:26:40')
+
+    def test_records_have_no_dict(self):
+        event = LogEvent('e1', 0, 'msg')
+        self.assertFalse(hasattr(event, '__dict__'))
+        self.assertFalse(hasattr(Match(event, {}), '__dict__'))
+
+    def test_decode_log_object(self):
+        payload = json.loads(
+            '{"logGroup": "g", "logEvents": [{"id": "e1", "timestamp": 1, "message": "m"}]}',
+            object_hook=decode_log_object
+        )
+        self.assertIsInstance(payload, dict)
+        event = payload['logEvents'][0]
+        self.assertIsInstance(event, LogEvent)
+        self.assertEqual((event.id, event.timestamp, event.message), ('e1', 1, 'm'))
+
+    def test_notification_data_from_dict(self):
+        data = NotificationData.from_dict({
+            'log_group': 'g',
+            'log_stream': 's',
+            'matched_event': {'timestamp': 0, 'message': 'boom', 'timestamp_jst': 'preset'},
+            'context_events': [{'timestamp': 0, 'message': 'ctx'}]
+        })
+        self.assertEqual(data.log_stream_type, 'Unknown')
+        self.assertEqual(data.matched_event.timestamp_jst, 'preset')
+        self.assertEqual(data.context_events[0].message, 'ctx')
+        self.assertIs(NotificationData.coerce(data), data)
+
+if __name__ == '__main__':
+    unittest.main()
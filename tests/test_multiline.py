@@ -0,0 +1,86 @@
+import re
+import unittest
+from unittest.mock import patch
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+from src.multiline import DEFAULT_MAX_LINES, MultilineCoalescer, coalesce_events
+from src.regex_engine import GuardedPattern, RegexEngine
+
+TRACE = [
+    "2024-01-01 10:00:00 INFO request ok",
+    "2024-01-01 10:00:01 ERROR request failed",
+    "Traceback (most recent call last):",
+    '  File "app.py", line 10, in handler',
+    "ValueError: Exception in handler",
+    "2024-01-01 10:00:02 INFO next request",
+]
+
+def make_events(lines):
+    return [LogEvent(f"e{i}", 1000 + i, line) for i, line in enumerate(lines)]
+
+class TestCoalesceEvents(unittest.TestCase):
+    def setUp(self):
+        self.start = re.compile(r'\d{4}-\d{2}-\d{2} ')
+
+    def test_joins_continuation_lines(self):
+        records = coalesce_events(make_events(TRACE), self.start)
+        self.assertEqual(len(records), 3)
+        error = records[1]
+        self.assertEqual(error.id, 'e1')
+        self.assertEqual(error.timestamp, 1001)
+        self.assertEqual(error.extra_ids, ('e2', 'e3', 'e4'))
+        self.assertEqual(error.ids, ('e1', 'e2', 'e3', 'e4'))
+        self.assertEqual(error.message.splitlines(), TRACE[1:5])
+        # Single-line records are passed through unchanged
+        self.assertEqual(records[0].extra_ids, ())
+
+    def test_leading_continuation_lines_form_a_record(self):
+        records = coalesce_events(make_events(TRACE[3:]), self.start)
+        self.assertEqual([r.ids for r in records], [('e0', 'e1'), ('e2',)])
+
+    def test_max_lines(self):
+        lines = ["2024-01-01 10:00:00 ERROR"] + [f"  at line {i}" for i in range(5)]
+        records = coalesce_events(make_events(lines), self.start, max_lines=4)
+        self.assertEqual([len(r.ids) for r in records], [4, 2])
+
+class TestProcessorCoalescing(unittest.TestCase):
+    def config(self, **extra):
+        st = {'type': 'app', 'pattern': '.*', 'filters': ['ERROR', 'Exception']}
+        st.update(extra)
+        return {'stream_types': [st]}
+
+    def test_one_match_per_logical_error(self):
+        processor = LogProcessor(batch_scan_min_events=0)
+        events = make_events(TRACE)
+        self.assertEqual(len(processor.process_log_batch('g', 's', events, self.config())), 2)
+
+        config = self.config(multiline={'start_pattern': r'\d{4}-\d{2}-\d{2} '})
+        for min_events in (0, 1):
+            matches = LogProcessor(batch_scan_min_events=min_events).process_log_batch('g', 's', events, config)
+            self.assertEqual(len(matches), 1)
+            self.assertEqual(matches[0].event.ids, ('e1', 'e2', 'e3', 'e4'))
+
+    def test_invalid_start_pattern_leaves_events_alone(self):
+        processor = LogProcessor(batch_scan_min_events=0)
+        config = self.config(multiline={'start_pattern': '('})
+        self.assertEqual(len(processor.process_log_batch('g', 's', make_events(TRACE), config)), 2)
+
+    def test_invalid_max_lines_uses_default(self):
+        stream_types = [{'multiline': {'start_pattern': r'\d{4}-\d{2}-\d{2} ', 'max_lines': 'many'}}]
+        with self.assertLogs(level='ERROR'):
+            records = MultilineCoalescer().coalesce(make_events(TRACE), stream_types)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(MultilineCoalescer._max_lines({}), DEFAULT_MAX_LINES)
+
+    def test_start_pattern_runs_under_regex_budget(self):
+        engine = RegexEngine(engine='re', budget_ms=20)
+        coalescer = MultilineCoalescer(engine)
+        stream_types = [{'multiline': {'start_pattern': r'(\w+\s?)*$'}}]
+        events = make_events(['word ' * 30 + '!'] * 3)
+        with patch('src.regex_engine.emit_emf'):
+            coalescer.coalesce(events, stream_types)
+        self.assertIsInstance(coalescer._pattern_cache[r'(\w+\s?)*$'], GuardedPattern)
+        self.assertEqual(engine.disabled_patterns(), [r'(\w+\s?)*$'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.outbox import SQLiteOutbox, SQSOutbox, drain_outbox, make_entry, backoff_delay
+
+class TestSQLiteOutbox(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.outbox = SQLiteOutbox(os.path.join(self.tmpdir.name, 'outbox.db'))
+
+    def tearDown(self):
+        self.outbox._conn.close()
+        self.tmpdir.cleanup()
+
+    def test_put_receive_ack(self):
+        self.outbox.put(make_entry('slack', 'https://hooks.slack.com/x', {'blocks': []}))
+        received = self.outbox.receive(10)
+        self.assertEqual(len(received), 1)
+        handle, entry = received[0]
+        self.assertEqual(entry['channel'], 'slack')
+
+        # Leased entries are not handed out twice
+        self.assertEqual(self.outbox.receive(10), [])
+
+        self.outbox.ack([handle])
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_delayed_entry_not_received(self):
+        self.outbox.put(make_entry('sns', 'arn:topic', {}), delay_seconds=60)
+        self.assertEqual(self.outbox.receive(10), [])
+        self.assertEqual(len(self.outbox), 1)
+
+class TestDrainOutbox(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.outbox = SQLiteOutbox(os.path.join(self.tmpdir.name, 'outbox.db'))
+
+    def tearDown(self):
+        self.outbox._conn.close()
+        self.tmpdir.cleanup()
+
+    def test_drain_delivers_in_batches(self):
+        for i in range(5):
+            self.outbox.put(make_entry('slack', 'url', {'n': i}))
+        deliver = MagicMock(return_value=True)
+
+        stats = drain_outbox(self.outbox, deliver, batch_size=2)
+
+        self.assertEqual(stats['delivered'], 5)
+        self.assertEqual(deliver.call_count, 5)
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_failed_entry_requeued_with_backoff(self):
+        self.outbox.put(make_entry('sns', 'arn:topic', {'n': 1}))
+        stats = drain_outbox(self.outbox, MagicMock(return_value=False), base_delay_seconds=30)
+
+        self.assertEqual(stats['retried'], 1)
+        self.assertEqual(len(self.outbox), 1)
+        # Delayed, so not visible yet
+        self.assertEqual(self.outbox.receive(10), [])
+
+    def test_entry_dropped_after_max_attempts(self):
+        self.outbox.put(make_entry('sns', 'arn:topic', {}, attempts=4))
+        stats = drain_outbox(self.outbox, MagicMock(return_value=False), max_attempts=5)
+
+        self.assertEqual(stats['dropped'], 1)
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_stops_at_deadline_and_acks_each_entry(self):
+        for i in range(4):
+            self.outbox.put(make_entry('slack', 'url', {'n': i}))
+        deliver = MagicMock(return_value=True)
+        budget = iter([True, True, True, False])
+
+        stats = drain_outbox(self.outbox, deliver, batch_size=10, should_continue=lambda: next(budget, False))
+
+        # Two entries were started and acked right away; the other two stay for the next run
+        self.assertEqual(stats['delivered'], 2)
+        self.assertEqual(len(self.outbox), 2)
+
+    def test_failed_acks_are_retried_and_reported(self):
+        outbox = MagicMock()
+        outbox.receive.side_effect = [[('h1', make_entry('slack', 'url', {}))], []]
+        outbox.ack.side_effect = [['h1'], ['h1']]
+
+        stats = drain_outbox(outbox, MagicMock(return_value=True))
+
+        self.assertEqual(outbox.ack.call_args_list[-1][0][0], ['h1'])
+        self.assertEqual(stats['unacked'], 1)
+
+    def test_backoff_delay(self):
+        self.assertEqual(backoff_delay(1, 30, 900), 30)
+        self.assertEqual(backoff_delay(3, 30, 900), 120)
+        self.assertEqual(backoff_delay(10, 30, 900), 900)
+
+class TestSQSOutbox(unittest.TestCase):
+    def setUp(self):
+        self.mock_aws = MagicMock()
+        self.outbox = SQSOutbox('https://sqs/queue', self.mock_aws)
+
+    def test_put_caps_delay(self):
+        self.outbox.put(make_entry('sns', 'arn', {}), delay_seconds=5000)
+        args = self.mock_aws.send_sqs_message.call_args[0]
+        self.assertEqual(args[0], 'https://sqs/queue')
+        self.assertEqual(json.loads(args[1])['channel'], 'sns')
+        self.assertEqual(args[2], 900)
+
+    def test_receive_and_ack(self):
+        self.mock_aws.receive_sqs_messages.return_value = [
+            {'ReceiptHandle': 'h1', 'Body': json.dumps(make_entry('slack', 'url', {}))}
+        ]
+        received = self.outbox.receive(10)
+        self.assertEqual(received[0][0], 'h1')
+
+        self.outbox.ack(['h1'])
+        self.mock_aws.delete_sqs_messages.assert_called_with('https://sqs/queue', ['h1'])
+
+class TestDeleteSQSMessages(unittest.TestCase):
+    def test_failed_entries_are_retried_once_and_reported(self):
+        from src.aws_client import AWSClient
+        client = AWSClient.__new__(AWSClient)
+        client.sqs = MagicMock()
+        client.sqs.delete_message_batch.side_effect = [
+            {'Failed': [{'Id': '1', 'SenderFault': False}, {'Id': '2', 'SenderFault': True}]},
+            {'Failed': [{'Id': '0', 'SenderFault': False}]},
+        ]
+        failed = client.delete_sqs_messages('https://sqs/queue', ['h0', 'h1', 'h2'])
+        retried = client.sqs.delete_message_batch.call_args_list[1][1]['Entries']
+        self.assertEqual([e['ReceiptHandle'] for e in retried], ['h1'])
+        self.assertEqual(sorted(failed), ['h1', 'h2'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+from src.parallel_scan import ParallelScanner
+from src.regex_engine import RegexEngine
+
+CONFIG = {
+    "stream_types": [
+        {"type": "other", "pattern": "^worker-", "filters": ["ERROR"]},
+        {"type": "critical", "pattern": "^api-", "filters": ["FATAL"]},
+        {"type": "error", "pattern": "^api-", "filters": ["ERROR", "Exception"], "whitelist": ["HealthCheck"],
+         "field_filters": ["level == error"]}
+    ]
+}
+
+def make_events(count):
+    messages = ['INFO ok', 'ERROR boom', 'FATAL crash', 'ERROR HealthCheck', '{"level": "ERROR"}', 'Exception x']
+    return [LogEvent(str(i), i, messages[i % len(messages)]) for i in range(count)]
+
+class TestParallelScan(unittest.TestCase):
+    def setUp(self):
+        self.scanner = ParallelScanner(workers=2, min_events=10)
+        self.parallel = LogProcessor(batch_scan_min_events=0, parallel_scanner=self.scanner)
+        self.serial = LogProcessor(batch_scan_min_events=0)
+
+    def tearDown(self):
+        self.scanner.close()
+
+    def summary(self, matches):
+        return [(m.event.id, m.config['type']) for m in matches]
+
+    def test_matches_serial_results_in_order(self):
+        events = make_events(101)
+        expected = self.serial.process_log_batch('g', 'api-1', events, CONFIG)
+        with patch.object(self.parallel, '_match_events', wraps=self.parallel._match_events) as local:
+            actual = self.parallel.process_log_batch('g', 'api-1', events, CONFIG)
+        self.assertEqual(self.summary(actual), self.summary(expected))
+        # Matches refer to the caller's event and config objects
+        self.assertIs(actual[0].event, events[1])
+        self.assertIs(actual[0].config, CONFIG['stream_types'][2])
+        # The caller only matched its own chunk
+        self.assertLess(len(local.call_args[0][0]), len(events))
+
+    def test_small_batches_stay_serial(self):
+        with patch.object(self.scanner, 'scan') as mock_scan:
+            self.parallel.process_log_batch('g', 'api-1', make_events(5), CONFIG)
+        mock_scan.assert_not_called()
+
+    def test_new_config_is_sent_to_workers(self):
+        events = make_events(30)
+        self.parallel.process_log_batch('g', 'api-1', events, CONFIG)
+        changed = {"stream_types": [{"type": "info", "pattern": ".*", "filters": ["INFO"]}]}
+        matches = self.parallel.process_log_batch('g', 'api-1', events, changed)
+        self.assertEqual(len(matches), 5)
+        self.assertTrue(all(m.config['type'] == 'info' for m in matches))
+
+    def test_dead_worker_is_replaced(self):
+        events = make_events(30)
+        self.parallel.process_log_batch('g', 'api-1', events, CONFIG)
+        self.scanner._processes[0].terminate()
+        self.scanner._processes[0].join()
+        matches = self.parallel.process_log_batch('g', 'api-1', events, CONFIG)
+        self.assertEqual(self.summary(matches), self.summary(self.serial.process_log_batch('g', 'api-1', events, CONFIG)))
+
+    def test_patterns_disabled_in_workers_reach_the_caller(self):
+        evil = r'(\w+\s?)*$'
+        config = {"stream_types": [{"type": "api", "pattern": ".*", "filters": ["ERROR"], "whitelist": [evil]}]}
+        # Workers get the first two chunks, the caller the last
+        events = [LogEvent(str(i), i, 'ERROR ' + 'word ' * 30 + '!' if i < 20 else 'ERROR ok') for i in range(30)]
+        self.parallel.regex_engine = RegexEngine(engine='re', budget_ms=20)
+        with patch.dict('os.environ', {'REGEX_ENGINE': 're', 'REGEX_BUDGET_MS': '20'}), \
+             patch('src.regex_engine.emit_emf'):
+            self.parallel.process_log_batch('g', 's', events, config)
+        self.assertEqual(self.parallel.regex_engine.disabled_patterns(), [evil])
+        # The caller no longer lets the disabled whitelist suppress its own matches
+        matches = self.parallel.process_log_batch('g', 's', events[20:], config)
+        self.assertEqual(len(matches), 10)
+
+    def test_falls_back_to_serial_when_workers_cannot_start(self):
+        with patch('src.parallel_scan.multiprocessing.get_context', side_effect=OSError("no fork")):
+            matches = self.parallel.process_log_batch('g', 'api-1', make_events(30), CONFIG)
+        self.assertEqual(len(matches), 20)
+        self.assertEqual(self.scanner.workers, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.profiling import sampled_profiling
+
+def handler(event, context):
+    return sum(i * i for i in range(event.get('n', 1000)))
+
+class TestSampledProfiling(unittest.TestCase):
+    @patch.dict(os.environ, {'PROFILE_SAMPLE_RATE': '0'})
+    def test_disabled_returns_handler_unwrapped(self):
+        self.assertIs(sampled_profiling()(handler), handler)
+
+    @patch.dict(os.environ, {'PROFILE_SAMPLE_RATE': '0.5'})
+    @patch('src.profiling.random.random', return_value=0.9)
+    def test_unsampled_invocation_not_profiled(self, _):
+        wrapped = sampled_profiling()(handler)
+        with patch('src.profiling._profile_invocation') as mock_profile:
+            self.assertEqual(wrapped({'n': 3}, None), 5)
+        mock_profile.assert_not_called()
+
+    @patch.dict(os.environ, {'PROFILE_SAMPLE_RATE': '1', 'PROFILE_TOP_N': '5'})
+    def test_sampled_invocation_logs_summary(self):
+        wrapped = sampled_profiling()(handler)
+        context = MagicMock(aws_request_id='req-1')
+        with patch('src.profiling.logger') as mock_logger:
+            self.assertEqual(wrapped({'n': 3}, context), 5)
+
+        summary = json.loads(mock_logger.info.call_args[0][0])
+        self.assertEqual(summary['profile'], 'req-1')
+        self.assertLessEqual(len(summary['hotspots']), 5)
+        self.assertTrue(any('handler' in h['function'] for h in summary['hotspots']))
+        self.assertIn('allocations', summary)
+
+    def test_dump_to_directory_and_s3(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch.dict(os.environ, {'PROFILE_SAMPLE_RATE': '1', 'PROFILE_DUMP_PATH': tmpdir}):
+                sampled_profiling()(handler)({}, MagicMock(aws_request_id='req-2'))
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'req-2.pstats')))
+
+        mock_aws = MagicMock()
+        with patch.dict(os.environ, {'PROFILE_SAMPLE_RATE': '1', 'PROFILE_DUMP_PATH': 's3://bucket/profiles/'}):
+            sampled_profiling(mock_aws)(handler)({}, MagicMock(aws_request_id='req-3'))
+        bucket, key, _ = mock_aws.put_s3_object.call_args[0]
+        self.assertEqual((bucket, key), ('bucket', 'profiles/req-3.pstats'))
+
+    @patch.dict(os.environ, {'PROFILE_SAMPLE_RATE': '1'})
+    def test_handler_exception_propagates(self):
+        def failing(event, context):
+            raise RuntimeError("boom")
+        with self.assertRaises(RuntimeError):
+            sampled_profiling()(failing)({}, None)
+
+if __name__ == '__main__':
+    unittest.main()
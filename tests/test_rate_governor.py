@@ -0,0 +1,128 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from src.aws_client import AWSClient
+from src.rate_governor import RateGovernor, create_logs_governor
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class ThrottlingLogs:
+    """Logs client that throttles every call while `throttling` is set."""
+
+    def __init__(self):
+        self.throttling = False
+        self.calls = []
+
+    def get_log_events(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.throttling:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'GetLogEvents')
+        return {'events': [{'eventId': str(i), 'timestamp': i, 'message': 'ctx'} for i in range(kwargs['limit'])]}
+
+    def filter_log_events(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.throttling:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'FilterLogEvents')
+        return {'events': []}
+
+class TestRateGovernor(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.governor = RateGovernor(10, burst=2, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_token_bucket(self):
+        self.assertTrue(self.governor.acquire(0))
+        self.assertTrue(self.governor.acquire(0))
+        # Bucket empty: the next token is 0.1s away
+        self.assertFalse(self.governor.acquire(0.05))
+        self.assertTrue(self.governor.acquire())
+        self.assertAlmostEqual(self.clock.now, 1000.1)
+
+    def test_aimd(self):
+        self.governor.record_throttle()
+        self.governor.record_throttle()
+        self.assertEqual(self.governor.rate, 2.5)
+        for _ in range(3):
+            self.governor.record_success()
+        self.assertEqual(self.governor.rate, 4.0)
+        for _ in range(10):
+            self.governor.record_throttle()
+        self.assertEqual(self.governor.rate, 0.5)
+        for _ in range(100):
+            self.governor.record_success()
+        self.assertEqual(self.governor.rate, 10)
+
+    def test_context_limit_shrinks_under_pressure(self):
+        self.assertEqual(self.governor.context_limit(10), 10)
+        self.governor.record_throttle()
+        self.assertEqual(self.governor.context_limit(10), 5)
+        self.assertEqual(self.governor.reduced_contexts, 1)
+
+    def test_flush(self):
+        self.governor.record_throttle()
+        self.governor.context_limit(10)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.governor.flush()
+            self.governor.flush()
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"ThrottledCalls": 1', lines[0])
+        self.assertIn('"ReducedContexts": 1', lines[0])
+
+    def test_disabled_by_default(self):
+        with patch.dict('os.environ', {}, clear=True):
+            self.assertIsNone(create_logs_governor())
+        with patch.dict('os.environ', {'LOGS_API_RATE': '5'}):
+            self.assertEqual(create_logs_governor().burst, 5)
+
+class TestGovernedClient(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.governor = RateGovernor(10, burst=1, clock=self.clock, sleep=self.clock.sleep)
+        self.logs = ThrottlingLogs()
+        self.client = AWSClient.__new__(AWSClient)
+        self.client.logs = self.logs
+        self.client.logs_governor = self.governor
+
+    def test_throttled_context_fetches_get_smaller(self):
+        self.logs.throttling = True
+        self.assertEqual(self.client.get_context_logs('g', 's', 1000), [])
+        self.logs.throttling = False
+        self.clock.now += 10
+        events = self.client.get_context_logs('g', 's', 1000)
+        self.assertEqual([call['limit'] for call in self.logs.calls], [10, 5])
+        self.assertEqual(len(events), 5)
+        self.assertEqual(self.governor.throttles, 1)
+        self.assertEqual(self.governor.reduced_contexts, 1)
+
+    def test_context_skipped_when_no_token_in_time(self):
+        self.logs.throttling = True
+        for _ in range(5):
+            self.client.get_context_logs('g', 's', 1000)
+        # Rate is at its floor of 0.5/s: the next token is more than a second away
+        self.assertEqual(len(self.logs.calls), 3)
+        self.assertEqual(self.governor.skipped_contexts, 2)
+
+    def test_catch_up_calls_wait_and_propagate_throttling(self):
+        self.logs.throttling = True
+        with self.assertRaises(ClientError):
+            self.client.filter_log_events('g', 's', 0, 1)
+        self.logs.throttling = False
+        self.client.filter_log_events('g', 's', 0, 1)
+        # The second call waited for the halved rate's refill instead of failing
+        self.assertAlmostEqual(self.clock.now, 1000.2)
+        self.assertEqual(self.governor.throttles, 1)
+
+if __name__ == '__main__':
+    unittest.main()
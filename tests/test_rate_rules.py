@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from src import rate_rules
+from src.models import LogEvent, Match
+from src.rate_rules import SlidingWindowCounter, ThresholdEvaluator, bucket_counts
+
+MINUTE = 60000
+T0 = 1600000000000
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    def test_fires_once_on_crossing(self):
+        counter = SlidingWindowCounter(5 * MINUTE)
+        self.assertIsNone(counter.add_batch([T0, T0 + 1000], threshold=3))
+        crossing = counter.add_batch([T0 + 2000, T0 + 3000], threshold=3)
+        self.assertIsNotNone(crossing)
+        self.assertEqual(crossing[1:], (1, 4))
+        # Still above the threshold: no new alert
+        self.assertIsNone(counter.add_batch([T0 + 4000], threshold=3))
+
+    def test_window_expiry_rearms(self):
+        counter = SlidingWindowCounter(5 * MINUTE)
+        self.assertIsNotNone(counter.add_batch([T0, T0 + 1, T0 + 2], threshold=3))
+        # Ten minutes later the old events are outside the window
+        later = T0 + 10 * MINUTE
+        self.assertIsNone(counter.add_batch([later, later + 1], threshold=3))
+        self.assertIsNotNone(counter.add_batch([later + 2], threshold=3))
+
+    def test_state_round_trip(self):
+        counter = SlidingWindowCounter(MINUTE)
+        counter.add_batch([T0, T0 + 1], threshold=10)
+        restored = SlidingWindowCounter.from_state(counter.to_state(), MINUTE)
+        self.assertEqual(restored.total(T0 // restored.bucket_ms), 2)
+
+    def test_bucket_counts_pure_python(self):
+        with patch.object(rate_rules, 'np', None):
+            self.assertEqual(bucket_counts([5, 1, 12, 3], 4), [(0, 2), (1, 1), (3, 1)])
+
+    @unittest.skipIf(rate_rules.np is None, "NumPy not installed")
+    def test_bucket_counts_numpy(self):
+        timestamps = list(range(0, 4000, 3))
+        with patch.object(rate_rules, 'np', None):
+            expected = bucket_counts(timestamps, 100)
+        self.assertEqual(bucket_counts(timestamps, 100), expected)
+
+class TestThresholdEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.threshold_config = {'type': 'burst', 'threshold': {'count': 3, 'window_minutes': 5}}
+        self.plain_config = {'type': 'plain'}
+
+    def _matches(self, config, timestamps):
+        return [Match(LogEvent(f'e{ts}', ts, 'ERROR'), config) for ts in timestamps]
+
+    def test_only_crossing_match_notified(self):
+        evaluator = ThresholdEvaluator()
+        plain = self._matches(self.plain_config, [T0])
+        burst = self._matches(self.threshold_config, [T0 + 1, T0 + 2, T0 + 3, T0 + 4])
+
+        notify, absorbed = evaluator.evaluate('g', 's', plain + burst)
+
+        self.assertEqual([m.event.id for m in notify], [f'e{T0}', f'e{T0 + 3}'])
+        self.assertEqual(len(absorbed), 3)
+        # The summary reports everything counted in the window so far
+        self.assertIn('4 matches within 5 minutes', notify[1].summary)
+
+    def test_counts_are_per_stream(self):
+        evaluator = ThresholdEvaluator()
+        evaluator.evaluate('g', 's1', self._matches(self.threshold_config, [T0, T0 + 1]))
+        notify, _ = evaluator.evaluate('g', 's2', self._matches(self.threshold_config, [T0 + 2]))
+        self.assertEqual(notify, [])
+
+    def test_counters_bounded_lru(self):
+        evaluator = ThresholdEvaluator(max_counters=2)
+        evaluator.evaluate('g', 's1', self._matches(self.threshold_config, [T0]))
+        evaluator.evaluate('g', 's2', self._matches(self.threshold_config, [T0 + 1]))
+        evaluator.evaluate('g', 's1', self._matches(self.threshold_config, [T0 + 2]))
+        evaluator.evaluate('g', 's3', self._matches(self.threshold_config, [T0 + 3]))
+        # s2 was the least recently used
+        self.assertEqual(list(evaluator._counters), ['burst|g|s1', 'burst|g|s3'])
+
+    def test_persistent_store(self):
+        store = MagicMock()
+        store.load.return_value = None
+        evaluator = ThresholdEvaluator(store)
+        evaluator.evaluate('g', 's', self._matches(self.threshold_config, [T0]))
+
+        key, state = store.save.call_args[0]
+        self.assertEqual(key, 'burst|g|s')
+        store.load.return_value = state
+
+        # A fresh container picks up the stored window
+        notify, _ = ThresholdEvaluator(store).evaluate('g', 's', self._matches(self.threshold_config, [T0 + 1, T0 + 2]))
+        self.assertEqual(len(notify), 1)
+
+if __name__ == '__main__':
+    unittest.main()
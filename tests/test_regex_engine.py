@@ -0,0 +1,87 @@
+import re
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.log_processor import LogProcessor
+from src.models import LogEvent
+from src.regex_engine import GuardedPattern, RegexEngine, complexity_issue
+
+EVIL = r'(a+)+$'
+EVIL_INPUT = 'a' * 40 + 'b'
+
+class TestComplexityCheck(unittest.TestCase):
+    def test_flags_catastrophic_patterns(self):
+        for pattern in [EVIL, r'(\w+\s?)*$', r'(a|ab)*c', r'(.*a){3,}', r'(?:x+y?)+z']:
+            self.assertIsNotNone(complexity_issue(pattern), pattern)
+
+    def test_flags_unbounded_body_of_bounded_repeat(self):
+        for pattern in [r'(.*a){20}', r'(?:\w+,){2,5}x', r'((b|c)+d){4}']:
+            self.assertEqual(complexity_issue(pattern), "nested quantifier", pattern)
+        self.assertIsNone(complexity_issue(r'(ab{2}){3}'))
+
+    def test_accepts_common_patterns(self):
+        for pattern in [r'^/aws/lambda/.*', r'api-\d+', r'(foo|bar)+', r'Connection reset by peer',
+                        r'User \d+ failed auth', r'^prod-[a-z]+-\d{2}$', r'.*timeout.*']:
+            self.assertIsNone(complexity_issue(pattern), pattern)
+
+class TestRegexEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = RegexEngine(engine='re', budget_ms=20)
+
+    def test_safe_patterns_stay_plain_re(self):
+        self.assertIsInstance(self.engine.compile(r'api-\d+'), re.Pattern)
+        with self.assertRaises(re.error):
+            self.engine.compile('(unclosed')
+
+    def test_budget_disables_offending_pattern(self):
+        guarded = self.engine.compile(EVIL)
+        self.assertIsInstance(guarded, GuardedPattern)
+        self.assertTrue(guarded.search('aaa'))
+
+        start = time.perf_counter()
+        with patch('src.regex_engine.emit_emf') as mock_emf:
+            self.assertIsNone(guarded.search(EVIL_INPUT))
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertTrue(guarded.disabled)
+        mock_emf.assert_called_once()
+        self.assertEqual(self.engine.disabled_patterns(), [EVIL])
+        # Disabled patterns never match again
+        self.assertIsNone(guarded.search('aaa'))
+
+    def test_mark_disabled(self):
+        guarded = self.engine.compile(EVIL)
+        self.engine.mark_disabled([(EVIL, 0), (r'(\w+\s?)*$', re.IGNORECASE)])
+        self.assertTrue(guarded.disabled)
+        # Patterns compiled later come out disabled
+        self.assertTrue(self.engine.compile(r'(\w+\s?)*$', re.IGNORECASE).disabled)
+        self.assertFalse(self.engine.compile(r'(\w+\s?)*$').disabled)
+        self.assertEqual(self.engine.disabled_keys(), [(EVIL, 0), (r'(\w+\s?)*$', re.IGNORECASE)])
+
+    def test_not_evaluated_outside_main_thread(self):
+        guarded = self.engine.compile(EVIL)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(guarded.search('aaa')))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [None])
+        self.assertEqual(guarded.skipped_off_main, 1)
+        # The pattern still works where the budget can be enforced
+        self.assertFalse(guarded.disabled)
+        self.assertTrue(guarded.search('aaa'))
+
+    def test_whitelist_regex_does_not_stall_batch(self):
+        processor = LogProcessor(batch_scan_min_events=0)
+        processor.regex_engine = RegexEngine(engine='re', budget_ms=20)
+        config = {"stream_types": [{"type": "api", "pattern": ".*", "filters": ["ERROR"], "whitelist": [r'(\w+\s?)*$']}]}
+        events = [LogEvent(str(i), i, 'ERROR ' + 'word ' * 30 + '!') for i in range(50)]
+
+        start = time.perf_counter()
+        with patch('src.regex_engine.emit_emf'):
+            matches = processor.process_log_batch('g', 's', events, config)
+        self.assertLess(time.perf_counter() - start, 2)
+        # The disabled whitelist no longer suppresses alerts
+        self.assertEqual(len(matches), 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import re
+import random
+import unittest
+from src.routing import RoutingIndex, classify_pattern
+
+def naive_match(stream_types, log_group, log_stream):
+    """Reference implementation: the original linear scan."""
+    matches = []
+    for st in stream_types:
+        group_pattern = st.get('log_group_pattern')
+        stream_pattern = st.get('pattern')
+        if group_pattern and not re.search(group_pattern, log_group):
+            continue
+        if stream_pattern:
+            if not re.search(stream_pattern, log_stream):
+                continue
+        elif not group_pattern:
+            continue
+        matches.append(st)
+    return matches
+
+class TestClassifyPattern(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(classify_pattern('^/aws/lambda/app$'), ('exact', '/aws/lambda/app'))
+        self.assertEqual(classify_pattern('^/aws/lambda/app\\.v2$'), ('exact', '/aws/lambda/app.v2'))
+        self.assertEqual(classify_pattern('^api-.*'), ('prefix', 'api-'))
+        self.assertEqual(classify_pattern('^api-\\d+$'), ('prefix', 'api-'))
+        self.assertEqual(classify_pattern('^apis?-x'), ('prefix', 'api'))
+        self.assertEqual(classify_pattern('api-.*'), ('regex', ''))
+        self.assertEqual(classify_pattern('^api|^db'), ('regex', ''))
+        self.assertEqual(classify_pattern('^[ab]pi'), ('regex', ''))
+
+class TestRoutingIndex(unittest.TestCase):
+    def _index(self, stream_types):
+        return RoutingIndex(stream_types, lambda p: re.compile(p))
+
+    def test_config_order_preserved(self):
+        stream_types = [
+            {'type': 'regex', 'pattern': 'api-.*'},
+            {'type': 'exact', 'log_group_pattern': '^/aws/app$', 'pattern': '^api-1$'},
+            {'type': 'prefix', 'pattern': '^api-'},
+            {'type': 'none'}
+        ]
+        types = [st['type'] for st in self._index(stream_types).match('/aws/app', 'api-1')]
+        self.assertEqual(types, ['regex', 'exact', 'prefix'])
+
+    def test_invalid_pattern_skipped(self):
+        def compile_or_none(p):
+            try:
+                return re.compile(p)
+            except re.error:
+                return None
+        index = RoutingIndex([{'type': 'bad', 'pattern': '(unclosed'}, {'type': 'ok', 'pattern': 'x'}], compile_or_none)
+        self.assertEqual([st['type'] for st in index.match('g', 'x')], ['ok'])
+
+    def test_results_memoized(self):
+        index = self._index([{'type': 'a', 'pattern': '^api-'}])
+        index.match('g', 'api-1')
+        index.match('g', 'api-1')
+        self.assertEqual(index.lookup.cache_info().hits, 1)
+
+    def test_group_references_not_merged(self):
+        stream_types = [{'type': 'backref', 'pattern': '(a)\\1'}, {'type': 'plain', 'pattern': 'b+c'}]
+        index = self._index(stream_types)
+        self.assertEqual([st['type'] for st in index.match('g', 'xaax')], ['backref'])
+        self.assertEqual([st['type'] for st in index.match('g', 'bbc')], ['plain'])
+
+    def test_same_results_as_linear_scan(self):
+        rng = random.Random(7)
+        services = ['api', 'worker', 'db', 'auth', 'billing', 'search']
+        group_patterns = [None, '/aws/lambda/.*', '^/aws/lambda/{s}$', '^/aws/ecs/{s}', '{s}$', '^/aws/(lambda|ecs)/{s}']
+        stream_patterns = [None, '^{s}-', '^{s}-\\d+$', '{s}', '^{s}-[0-9]+-x', '.*']
+        stream_types = []
+        for i in range(300):
+            service = rng.choice(services)
+            group = rng.choice(group_patterns)
+            stream = rng.choice(stream_patterns)
+            stream_types.append({
+                'type': f't{i}',
+                'log_group_pattern': group.format(s=service) if group else None,
+                'pattern': stream.format(s=service) if stream else None
+            })
+
+        index = self._index(stream_types)
+        for _ in range(500):
+            service = rng.choice(services)
+            log_group = rng.choice(['/aws/lambda/', '/aws/ecs/', '/custom/']) + service
+            log_stream = f"{rng.choice(services)}-{rng.randint(0, 99)}{rng.choice(['', '-x', 'y'])}"
+            self.assertEqual(index.match(log_group, log_stream), naive_match(stream_types, log_group, log_stream))
+
+if __name__ == '__main__':
+    unittest.main()
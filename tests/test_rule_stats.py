@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.log_processor import LogProcessor
+from src.metrics import emf_document
+from src.models import LogEvent
+from src.rule_stats import RuleStats, aggregate_emf_lines, format_report, main
+
+CONFIG = {
+    "stream_types": [{
+        "type": "api",
+        "pattern": ".*",
+        "filters": ["ERROR", "NeverSeen"],
+        "field_filters": ["level == fatal"],
+        "whitelist": ["health"]
+    }]
+}
+
+def events(n):
+    return [LogEvent(str(i), i, "ERROR health check" if i % 2 else "ok") for i in range(n)]
+
+class TestRuleStats(unittest.TestCase):
+    def test_samples_every_nth_event_across_batches(self):
+        stats = RuleStats(4, flush_seconds=float('inf'))
+        processor = LogProcessor(batch_scan_min_events=0, rule_stats=stats)
+        matches = processor.process_log_batch('g', 's', events(6), CONFIG)
+        processor.process_log_batch('g', 's', events(6), CONFIG)
+
+        # Matching itself is unaffected
+        self.assertEqual(matches, [])
+        # Events 0, 4, 8 of the 12 are sampled
+        evaluations, hits, seconds = stats.stats[('api', 'filter', 'ERROR')]
+        self.assertEqual((evaluations, hits), (3, 0))
+        self.assertEqual(stats.stats[('api', 'whitelist', 'health')][0], 3)
+        self.assertEqual(stats.stats[('api', 'field_filter', 'level == fatal')][0], 3)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_every_rule_is_evaluated_without_short_circuit(self):
+        stats = RuleStats(1, flush_seconds=float('inf'))
+        LogProcessor(batch_scan_min_events=1, rule_stats=stats).process_log_batch('g', 's', events(2), CONFIG)
+        self.assertEqual(stats.stats[('api', 'filter', 'ERROR')][:2], [2, 1])
+        self.assertEqual(stats.stats[('api', 'filter', 'NeverSeen')][:2], [2, 0])
+        self.assertEqual(stats.stats[('api', 'whitelist', 'health')][:2], [2, 1])
+
+    def test_flush_emits_emf_and_report_round_trips(self):
+        stats = RuleStats(1, flush_seconds=60)
+        stats.observe(events(4), LogProcessor(batch_scan_min_events=0)._prepare_configs(CONFIG['stream_types']))
+        self.assertFalse(stats.maybe_flush(now=stats._last_flush + 1))
+
+        out = io.StringIO()
+        with patch('sys.stdout', out):
+            self.assertTrue(stats.maybe_flush(now=stats._last_flush + 61))
+        self.assertEqual(stats.stats, {})
+
+        lines = out.getvalue().splitlines()
+        doc = json.loads(lines[0])
+        self.assertEqual(doc['_aws']['CloudWatchMetrics'][0]['Namespace'], 'CloudWatchLogMonitor/Rules')
+        # Rules are properties, not dimensions
+        self.assertEqual(doc['_aws']['CloudWatchMetrics'][0]['Dimensions'], [['StreamType', 'RuleKind']])
+        self.assertEqual(len(doc['RuleId']), 12)
+        totals = aggregate_emf_lines(lines + ['unrelated log line'])
+        self.assertEqual(totals[('api', 'filter', 'ERROR')][:2], [4, 2])
+        self.assertIn('[never hit]', format_report(totals))
+
+    def test_emf_document(self):
+        doc = emf_document('NS', {'Rule': 'r'}, {'Hits': (2, 'Count')}, timestamp_ms=1)
+        self.assertEqual(doc['_aws']['CloudWatchMetrics'][0]['Dimensions'], [['Rule']])
+        self.assertEqual((doc['Rule'], doc['Hits']), ('r', 2))
+
+    def test_cli_replay(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, 'config.json')
+            events_path = os.path.join(tmpdir, 'events.jsonl')
+            with open(config_path, 'w') as f:
+                json.dump(CONFIG, f)
+            with open(events_path, 'w') as f:
+                f.write(json.dumps({'message': 'ERROR boom'}) + '\nplain ok line\n')
+            out = io.StringIO()
+            with patch('sys.stdout', out):
+                code = main(['--config', config_path, '--events', events_path, '--log-group', 'g', '--log-stream', 's'])
+        self.assertEqual(code, 0)
+        self.assertIn('NeverSeen', out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+from src.models import LogEvent, Match
+from src.sampling import ReservoirSampler, fingerprint
+
+class TestFingerprint(unittest.TestCase):
+    def test_ignores_variable_parts(self):
+        a = fingerprint("ERROR user 123 request 0x1f failed id=6f1c2e2a-1b2c-4d5e-8f90-123456789abc")
+        b = fingerprint("ERROR user 9 request 0xabc failed id=00000000-0000-0000-0000-000000000000")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, fingerprint("ERROR database unreachable"))
+
+    def test_uses_first_line_only(self):
+        self.assertEqual(fingerprint("ERROR boom\n  at a"), fingerprint("ERROR boom\n  at b"))
+
+class TestReservoirSampler(unittest.TestCase):
+    def setUp(self):
+        self.config = {'type': 'api', 'sample_size': 3}
+
+    def storm(self, n, config=None):
+        return [Match(LogEvent(f"e{i}", i, f"ERROR timeout after {i} ms"), config or self.config) for i in range(n)]
+
+    def test_storm_is_bounded_with_exact_count(self):
+        matches = self.storm(1000) + [Match(LogEvent('x', 2000, 'ERROR disk full'), self.config)]
+        notify, dropped = ReservoirSampler(rng=random.Random(1)).sample(matches)
+
+        self.assertEqual(len(notify), 4)
+        self.assertEqual(len(dropped), 997)
+        samples = [m for m in notify if m.event.id != 'x']
+        self.assertTrue(all(m.occurrences == 1000 for m in samples))
+        self.assertIn("3 of 1000", samples[0].summary)
+        # The rare error is untouched, and order is preserved
+        self.assertEqual(notify[-1].event.id, 'x')
+        self.assertIsNone(notify[-1].summary)
+        self.assertEqual([m.event.timestamp for m in notify], sorted(m.event.timestamp for m in notify))
+
+    def test_reservoir_is_uniform(self):
+        picks = [0] * 10
+        for seed in range(2000):
+            notify, _ = ReservoirSampler(rng=random.Random(seed)).sample(self.storm(10, {'type': 'a', 'sample_size': 1}))
+            picks[notify[0].event.timestamp] += 1
+        self.assertTrue(all(120 < count < 280 for count in picks), picks)
+
+    def test_disabled_by_default_and_skips_aggregates(self):
+        unsampled = self.storm(10, {'type': 'a'})
+        self.assertEqual(ReservoirSampler().sample(unsampled), (unsampled, []))
+
+        matches = self.storm(5)
+        matches[0].summary = "Threshold reached"
+        notify, dropped = ReservoirSampler(default_size=1).sample(matches)
+        self.assertIn(matches[0], notify)
+        self.assertEqual(len(notify), 4)
+
+    def test_invalid_sample_size_uses_default(self):
+        with self.assertLogs(level='ERROR') as logs:
+            notify, dropped = ReservoirSampler(default_size=2).sample(self.storm(10, {'type': 'a', 'sample_size': 'few'}))
+        self.assertEqual((len(notify), len(dropped)), (2, 8))
+        # Logged once per stream type, not per match
+        self.assertEqual(len(logs.output), 1)
+
+if __name__ == '__main__':
+    unittest.main()
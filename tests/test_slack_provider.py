@@ -36,6 +36,13 @@ class TestSlackWebhookProvider(unittest.TestCase):
         
         self.assertFalse(result)
 
+    @patch('src.notifications.slack_webhook_provider.requests.post')
+    def test_send_payload_raises_on_failure(self, mock_post):
+        from src.notifications import DeliveryError
+        mock_post.return_value = Mock(status_code=404, text='no_service')
+        with self.assertRaises(DeliveryError):
+            self.provider.send_payload('https://hooks.slack.com/test', {'blocks': []})
+
     def test_send_notification_no_url(self):
         result = self.provider.send_notification('', self.notification_data)
         self.assertFalse(result)
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import json
+import unittest
+from unittest.mock import patch
+from src.subscription_filters import (MATCH_ALL, build_filter_pattern, check_superset, filter_pattern_matches,
+                                      keyword_regex, main, minimal_keywords)
+
+CONFIG = {
+    "stream_types": [
+        {"type": "api", "log_group_pattern": "^/aws/lambda/api$", "pattern": ".*", "filters": ["ERROR", "Timeout", "database error"]},
+        {"type": "any", "pattern": "^prod-", "filters": ["Fatal.Task"], "whitelist": ["ignored"]},
+        {"type": "json", "log_group_pattern": "^/aws/lambda/json$", "pattern": ".*", "field_filters": ["level == error"]}
+    ]
+}
+
+class TestSubscriptionFilters(unittest.TestCase):
+    def test_keyword_regex_is_case_insensitive(self):
+        self.assertEqual(keyword_regex('Err'), '[Ee][Rr][Rr]')
+        self.assertEqual(keyword_regex('a.b-1'), '[Aa]\\.[Bb]\\-1')
+        self.assertIn('\u212a', keyword_regex('k'))
+        self.assertIsNone(keyword_regex('50%'))
+        self.assertIsNone(keyword_regex('café'))
+
+    def test_minimal_keywords(self):
+        self.assertEqual(minimal_keywords(['ERROR', 'database error', 'Timeout', 'timeout']), ['error', 'timeout'])
+
+    def test_pattern_per_log_group(self):
+        pattern, _ = build_filter_pattern(CONFIG, '/aws/lambda/api')
+        self.assertTrue(pattern.startswith('%') and pattern.endswith('%'))
+        self.assertTrue(filter_pattern_matches(pattern, 'db: Database ERROR'))
+        self.assertTrue(filter_pattern_matches(pattern, 'fatal.task exited'))
+        self.assertFalse(filter_pattern_matches(pattern, 'INFO all good'))
+        self.assertFalse(filter_pattern_matches(pattern, 'fatalXtask'))
+
+        # Only the group-independent stream type applies here
+        pattern, _ = build_filter_pattern(CONFIG, '/aws/lambda/other')
+        self.assertFalse(filter_pattern_matches(pattern, 'ERROR'))
+
+    def test_falls_back_to_match_all(self):
+        self.assertEqual(build_filter_pattern(CONFIG, '/aws/lambda/json')[0], MATCH_ALL)
+        many = {"stream_types": [{"type": "x", "pattern": ".*", "filters": [f"keyword{i}x" for i in range(40)]}]}
+        self.assertEqual(build_filter_pattern(many, 'g')[0], MATCH_ALL)
+        multiline = {"stream_types": [{"type": "x", "pattern": ".*", "filters": ["ERROR"], "multiline": {"start_pattern": "^2"}}]}
+        self.assertEqual(build_filter_pattern(multiline, 'g')[0], MATCH_ALL)
+
+    def test_superset_check(self):
+        messages = ['ERROR one', 'tImEoUt two', 'INFO fine', 'database error', 'kelvin \u212a', 'FATAL.TASK']
+        config = {"stream_types": CONFIG["stream_types"] + [
+            {"type": "k", "log_group_pattern": "^/aws/lambda/api$", "filters": ["Kill", "wifi"]}
+        ]}
+        pattern, _ = build_filter_pattern(config, '/aws/lambda/api')
+        self.assertEqual(check_superset(config, '/aws/lambda/api', pattern, messages + ['\u212aILL', 'WIF\u0130']), [])
+        # A pattern that misses a keyword is caught
+        self.assertIn('Timeout', check_superset(config, '/aws/lambda/api', '%[Ee]rror%', messages))
+
+    def test_cli_writes_template(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, 'config.json')
+            template_path = os.path.join(tmpdir, 'subscriptions.yaml')
+            with open(config_path, 'w') as f:
+                json.dump(CONFIG, f)
+            with patch('sys.stdout'), patch('sys.stderr'):
+                code = main(['--config', config_path, '--log-group', '/aws/lambda/api',
+                             '--log-group', '/aws/lambda/json', '--template', template_path])
+            self.assertEqual(code, 0)
+            with open(template_path) as f:
+                template = f.read()
+        self.assertEqual(template.count('AWS::Logs::SubscriptionFilter'), 2)
+        self.assertIn('LogGroupName: "/aws/lambda/api"', template)
+        self.assertIn('FilterPattern: ""', template)
+
+if __name__ == '__main__':
+    unittest.main()